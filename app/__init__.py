@@ -1,6 +1,20 @@
 from flask import Flask
 from .extensions import ma, limiter, cache
-from .models import db
+from .models import (
+    db,
+    VerificationLog,
+    AlertLog,
+    ReplicaHeartbeat,
+    Kiosk,
+    Program,
+    SystemConfig,
+)
+from .utils.shared_cache import init_cache_invalidation
+from .utils.config_store import system_settings
+from .utils.audit_log import init_audit_writer
+from .utils.rollups import init_rollups
+from .utils.metrics import init_request_metrics
+from .utils.replicas import init_replica_routing
 from .blueprints.admin import admin_bp
 from .blueprints.client import client_bp
 from .blueprints.employees import employees_bp
@@ -34,9 +48,15 @@ def create_app(config_name):
 
     # Initialize extensions
     db.init_app(app)
+    init_replica_routing(app, db, ReplicaHeartbeat)
     ma.init_app(app)
     limiter.init_app(app)
     cache.init_app(app)
+    init_cache_invalidation(db.session, (Program, Kiosk, SystemConfig))
+    system_settings.init_app(app)
+    init_audit_writer(app, (VerificationLog, AlertLog))
+    init_rollups(app)
+    init_request_metrics(app)
 
     # Import and register blueprints
     app.register_blueprint(admin_bp, url_prefix="/admin")
@@ -1,3 +1,17 @@
 from flask import Blueprint
+from app.models import db, AlertLog
+from app.utils.rollups import register_rollup, track_rekeying
 
 alert_logs_bp = Blueprint("alert_logs", __name__)
+
+from . import routes
+from .aggregator import init_alert_aggregator
+from .rollup import alert_rollup
+
+# Runs after create_app has set up the audit writer and rollup refresher
+alert_logs_bp.record_once(lambda state: init_alert_aggregator(state.app))
+alert_logs_bp.record_once(lambda state: register_rollup(state.app, alert_rollup))
+# Status changes after absorption move the alert to its new rollup row
+alert_logs_bp.record_once(
+    lambda state: track_rekeying(db.session, alert_rollup, AlertLog)
+)
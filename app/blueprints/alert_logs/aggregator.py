@@ -0,0 +1,259 @@
+# Alert storm deduplication in front of the audit writer
+import atexit
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import bindparam, update
+from app.models import db, AlertLog
+
+DEFAULT_WINDOW = 300.0  # Seconds repeats fold into the same alert row
+DEFAULT_MAX_FINGERPRINTS = 10000  # LRU bound on tracked alert storms
+DEFAULT_FOLD_INTERVAL = 5.0  # Seconds between count write-backs
+MAX_FOLD_ATTEMPTS = 60  # Fold-backs to wait for the alert row to be written
+FINGERPRINT_FIELDS = ("alert_type", "alert_category", "source_system", "area_code")
+
+alert_logs = AlertLog.__table__
+
+_fold_statement = (
+    update(alert_logs)
+    .where(alert_logs.c.aggregation_id == bindparam("b_aggregation_id"))
+    .values(
+        occurrence_count=alert_logs.c.occurrence_count + bindparam("b_repeats"),
+        last_seen_at=bindparam("b_last_seen"),
+    )
+)
+
+
+def alert_fingerprint(row):
+    """Identity of an alert for deduplication (FINGERPRINT_FIELDS)"""
+    key = "|".join(str(row.get(field) or "") for field in FINGERPRINT_FIELDS)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class _Storm:
+    """One aggregated alert row and the repeats not yet written to it"""
+
+    __slots__ = (
+        "fingerprint",
+        "aggregation_id",
+        "first_seen",
+        "last_seen",
+        "repeats",
+        "attempts",
+    )
+
+    def __init__(self, fingerprint, now):
+        self.fingerprint = fingerprint
+        self.aggregation_id = uuid.uuid4().hex
+        self.first_seen = now
+        self.last_seen = now
+        self.repeats = 0
+        self.attempts = 0
+
+
+class AlertAggregator:
+    """Folds repeated alerts into one AlertLog row per fingerprint and window
+
+    The first alert with a fingerprint is queued on the audit writer as a
+    new row (occurrence_count 1, first/last seen). Repeats within window
+    seconds of it only bump an in-memory counter; every fold_interval
+    seconds a background thread adds the counts to their rows in one
+    transaction. Tracked fingerprints are an LRU bounded by
+    max_fingerprints; an evicted storm's pending count is still written.
+    Each worker aggregates on its own, so a storm costs at most one row per
+    worker per window. Counts whose row has not been written yet (still in
+    the writer's queue or spill file) are retried on later fold-backs.
+    """
+
+    def __init__(
+        self,
+        app,
+        writer,
+        window=DEFAULT_WINDOW,
+        max_fingerprints=DEFAULT_MAX_FINGERPRINTS,
+        fold_interval=DEFAULT_FOLD_INTERVAL,
+    ):
+        self.app = app
+        self.writer = writer
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self.fold_interval = fold_interval
+        self._storms = OrderedDict()  # fingerprint -> _Storm, oldest first
+        self._retired = []  # Expired or evicted storms with repeats to write
+        self._lock = threading.Lock()
+        self._fold_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.received = 0
+        self.rows = 0
+        self.folded = 0
+        self.dropped = 0
+        atexit.register(self.close)
+
+    def record(self, row):
+        """Count one alert; returns (fingerprint, True if it was folded)"""
+        fingerprint = alert_fingerprint(row)
+        now = datetime.now().replace(microsecond=0)
+        self._ensure_thread()
+        with self._lock:
+            self.received += 1
+            storm = self._storms.get(fingerprint)
+            if storm is not None:
+                if (now - storm.first_seen).total_seconds() < self.window:
+                    storm.repeats += 1
+                    storm.last_seen = max(storm.last_seen, now)
+                    self._storms.move_to_end(fingerprint)
+                    return fingerprint, True
+                self._retire(self._storms.pop(fingerprint))
+            storm = self._storms[fingerprint] = _Storm(fingerprint, now)
+            while len(self._storms) > self.max_fingerprints:
+                self._retire(self._storms.popitem(last=False)[1])
+            self.rows += 1
+        try:
+            self.writer.write(
+                AlertLog,
+                dict(
+                    row,
+                    alert_fingerprint=fingerprint,
+                    aggregation_id=storm.aggregation_id,
+                    occurrence_count=1,
+                    first_seen_at=now,
+                    last_seen_at=now,
+                ),
+            )
+        except Exception:
+            with self._lock:
+                if self._storms.get(fingerprint) is storm:
+                    del self._storms[fingerprint]
+                self.rows -= 1
+            raise
+        return fingerprint, False
+
+    def _retire(self, storm):
+        if storm.repeats:
+            self._retired.append(storm)
+
+    def _ensure_thread(self):
+        # Started lazily so forked workers each get their own folder
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="alert-aggregator", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._wake.wait(self.fold_interval):
+            try:
+                self.fold()
+            except Exception:
+                self.app.logger.exception("Alert count fold-back failed")
+
+    def fold(self):
+        """Add pending repeat counts to their alert rows; returns rows updated"""
+        with self._fold_lock:
+            with self._lock:
+                storms, self._retired = self._retired, []
+                for storm in self._storms.values():
+                    if storm.repeats:
+                        storms.append(storm)
+                # Counts taken now; repeats arriving meanwhile start from zero
+                pending = [(storm, storm.repeats, storm.last_seen) for storm in storms]
+                for storm in storms:
+                    storm.repeats = 0
+            if not pending:
+                return 0
+
+            missing = []
+            try:
+                with self.app.app_context():
+                    for storm, repeats, last_seen in pending:
+                        updated = db.session.execute(
+                            _fold_statement,
+                            {
+                                "b_aggregation_id": storm.aggregation_id,
+                                "b_repeats": repeats,
+                                "b_last_seen": last_seen,
+                            },
+                        ).rowcount
+                        if not updated:
+                            missing.append((storm, repeats))
+                    db.session.commit()
+            except Exception:
+                with self._lock:
+                    for storm, repeats, _ in pending:
+                        self._give_back(storm, repeats)
+                raise
+
+            with self._lock:
+                for storm, repeats in missing:
+                    self._give_back(storm, repeats)
+                self.folded += sum(repeats for _, repeats, _ in pending)
+                self.folded -= sum(repeats for _, repeats in missing)
+            return len(pending) - len(missing)
+
+    def _give_back(self, storm, repeats):
+        """Keep unwritten repeats for the next fold (caller holds _lock)"""
+        storm.attempts += 1
+        if storm.attempts > MAX_FOLD_ATTEMPTS:
+            self.app.logger.warning(
+                "Dropped %d repeats of alert %s: its row was never written",
+                repeats,
+                storm.aggregation_id,
+            )
+            self.dropped += repeats
+            return
+        live = self._storms.get(storm.fingerprint) is storm
+        if storm.repeats == 0 and not live:
+            self._retired.append(storm)
+        storm.repeats += repeats
+
+    def close(self):
+        """Stop the fold-back thread and write the counts still pending"""
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.fold_interval + 5)
+        try:
+            # Rows queued on the writer must exist before their counts are added
+            self.writer.flush()
+            self.fold()
+        except Exception:
+            self.app.logger.exception("Alert counts not folded on shutdown")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "received": self.received,
+                "rows": self.rows,
+                "folded": self.folded,
+                "pending": sum(storm.repeats for storm in self._storms.values())
+                + sum(storm.repeats for storm in self._retired),
+                "dropped": self.dropped,
+                # Alerts received per row inserted
+                "dedup_ratio": (
+                    round(self.received / self.rows, 2) if self.rows else None
+                ),
+                "tracked_fingerprints": len(self._storms),
+                "window": self.window,
+            }
+
+
+def init_alert_aggregator(app):
+    app.extensions["alert_aggregator"] = AlertAggregator(
+        app,
+        app.extensions["audit_writer"],
+        window=app.config.get("ALERT_DEDUP_WINDOW", DEFAULT_WINDOW),
+        max_fingerprints=app.config.get(
+            "ALERT_DEDUP_MAX_FINGERPRINTS", DEFAULT_MAX_FINGERPRINTS
+        ),
+        fold_interval=app.config.get("ALERT_FOLD_INTERVAL", DEFAULT_FOLD_INTERVAL),
+    )
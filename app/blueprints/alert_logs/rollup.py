@@ -0,0 +1,45 @@
+# Dashboard rollup of alert_logs
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import Integer, cast, func, or_
+from app.models import AlertLog, AlertRollup
+from app.utils.rollups import Rollup
+from .aggregator import DEFAULT_WINDOW, DEFAULT_FOLD_INTERVAL, MAX_FOLD_ATTEMPTS
+
+
+def _settled(now):
+    """Alerts whose occurrence_count can no longer grow
+
+    Repeats arrive for the dedup window, and a fold that cannot find the row
+    yet is retried for up to MAX_FOLD_ATTEMPTS intervals before it gives up.
+    """
+    config = current_app.config
+    fold_interval = config.get("ALERT_FOLD_INTERVAL", DEFAULT_FOLD_INTERVAL)
+    settle = (
+        config.get("ALERT_DEDUP_WINDOW", DEFAULT_WINDOW)
+        + (MAX_FOLD_ATTEMPTS + 1) * fold_interval
+    )
+    return or_(
+        AlertLog.first_seen_at.is_(None),
+        AlertLog.first_seen_at <= now - timedelta(seconds=settle),
+    )
+
+
+alert_rollup = Rollup(
+    "alert_logs",
+    AlertRollup,
+    AlertLog.alert_id,
+    keys={
+        "day": AlertLog.alert_timestamp,
+        "alert_severity": AlertLog.alert_severity,
+        "alert_status": func.coalesce(AlertLog.alert_status, "OPEN"),
+        "area_code": func.coalesce(AlertLog.area_code, ""),
+    },
+    measures={
+        "alert_rows": cast(func.count(), Integer),
+        "occurrences": cast(
+            func.sum(func.coalesce(AlertLog.occurrence_count, 1)), Integer
+        ),
+    },
+    settled=_settled,
+)
@@ -1 +1,107 @@
 # AlertLog routes
+from .schema import alert_logs_schema, alert_log_row_schema
+from datetime import date
+from flask import request, jsonify, current_app
+from marshmallow import ValidationError
+from sqlalchemy import select
+from app.models import AlertLog
+from app.utils.pagination import paginate, page_args, CursorError
+from app.utils.serializer import fast_dump
+from app.extensions import limiter
+from app.utils.audit_log import AuditError
+from app.utils.rollups import dashboard, RollupError
+from .rollup import alert_rollup
+from . import alert_logs_bp
+
+
+@alert_logs_bp.route("/", methods=["GET"])
+def get_alert_logs():
+    """List alerts, newest first (keyset paginated)
+
+    Query params: cursor, page_size, alert_status, alert_severity, area_code
+    """
+    query = select(AlertLog)
+    alert_status = request.args.get("alert_status")
+    if alert_status:
+        query = query.where(AlertLog.alert_status == alert_status)
+    alert_severity = request.args.get("alert_severity")
+    if alert_severity:
+        query = query.where(AlertLog.alert_severity == alert_severity)
+    area_code = request.args.get("area_code")
+    if area_code:
+        query = query.where(AlertLog.area_code == area_code)
+
+    try:
+        cursor, page_size = page_args()
+        page = paginate(
+            query,
+            AlertLog.alert_timestamp,
+            AlertLog.alert_id,
+            cursor=cursor,
+            page_size=page_size,
+        )
+    except CursorError as e:
+        return jsonify({"Error": str(e)}), 400
+
+    return (
+        jsonify(
+            {
+                "alert_logs": fast_dump(alert_logs_schema, page.items),
+                "next_cursor": page.next_cursor,
+                "page_size": page.page_size,
+            }
+        ),
+        200,
+    )
+
+
+@alert_logs_bp.route("/", methods=["POST"])
+@limiter.exempt  # Kiosk audit path; every attempt must be recorded
+def create_alert_log():
+    """Raise an alert through the storm aggregator and audit writer
+
+    Repeats of an alert (same type, category, source system and area)
+    within the dedup window only raise the first row's occurrence_count.
+    Responds 202 once queued; alert_timestamp defaults to today.
+    """
+    data = request.get_json(silent=True) or {}
+    data.setdefault("alert_timestamp", date.today().isoformat())
+    try:
+        row = alert_log_row_schema.load(data)
+        fingerprint, folded = current_app.extensions["alert_aggregator"].record(row)
+    except ValidationError as e:
+        return jsonify({"Error": e.messages}), 400
+    except AuditError as e:
+        return jsonify({"Error": str(e)}), 400
+    return (
+        jsonify(
+            {"status": "accepted", "alert_fingerprint": fingerprint, "folded": folded}
+        ),
+        202,
+    )
+
+
+@alert_logs_bp.route("/aggregator", methods=["GET"])
+def get_alert_aggregator_stats():
+    """Dedup ratio and pending counts of this worker's alert aggregator"""
+    return jsonify(current_app.extensions["alert_aggregator"].stats()), 200
+
+
+@alert_logs_bp.route("/dashboard", methods=["GET"])
+def get_alert_dashboard():
+    """Alert counts per day, severity, status and area from the rollup
+
+    Query params: start_date, end_date, alert_severity, alert_status,
+    area_code. as_of_id is the last alert_id absorbed into the rollup;
+    newer alerts are aggregated live and included.
+    """
+    current_app.extensions["rollups"].ensure_running()
+    try:
+        result = dashboard(
+            alert_rollup, ("alert_severity", "alert_status", "area_code")
+        )
+    except RollupError as e:
+        return jsonify({"Error": str(e)}), 400
+    for row in result["rows"]:
+        row["area_code"] = row["area_code"] or None
+    return jsonify(result), 200
@@ -1 +1,17 @@
 # AlertLog schemas
+from app.extensions import ma
+from app.models import AlertLog
+
+
+class AlertLogSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = AlertLog
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+alert_log_schema = AlertLogSchema()
+alert_logs_schema = AlertLogSchema(many=True)
+# Plain column dicts for the audit writer (ids come from the database)
+alert_log_row_schema = AlertLogSchema(load_instance=False, exclude=("alert_id",))
@@ -1,3 +1,5 @@
 from flask import Blueprint
 
 client_bp = Blueprint("client", __name__)
+
+from . import routes
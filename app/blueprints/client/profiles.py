@@ -0,0 +1,29 @@
+# Client loading profiles
+from app.models import Client, VerificationLog
+from app.utils.loading import COUNT, LoadingProfile, Related
+
+RECENT_VERIFICATIONS = 5
+
+# Client overview: wallets in full, token count, latest verifications
+client_summary = LoadingProfile(
+    "client_summary",
+    Client,
+    columns=("client_name", "area_code", "created_at", "is_active"),
+    wallets=Related(
+        columns=("wallet_balance", "wallet_status", "last_activity", "created_at")
+    ),
+    tokens=Related(COUNT),
+    verification_logs=Related(
+        columns=(
+            "verification_status",
+            "verification_timestamp",
+            "kiosk_id",
+            "geographic_violation",
+        ),
+        limit=RECENT_VERIFICATIONS,
+        order_by=(
+            VerificationLog.verification_timestamp.desc(),
+            VerificationLog.log_id.desc(),
+        ),
+    ),
+)
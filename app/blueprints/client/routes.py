@@ -1 +1,67 @@
 # Client routes
+from flask import request, jsonify
+from app.models import db, Client
+from app.blueprints.wallets.schema import WalletSchema
+from app.blueprints.verification.schema import VerificationLogSchema
+from app.utils.pagination import CursorError, page_args, paginate
+from .profiles import client_summary
+from .schema import client_summary_schema
+from . import client_bp
+
+summary_wallets_schema = WalletSchema(many=True, only=client_summary.fields("wallets"))
+summary_verifications_schema = VerificationLogSchema(
+    many=True, only=client_summary.fields("verification_logs")
+)
+
+
+def dump_summaries(loaded):
+    return loaded.dump(
+        client_summary_schema,
+        wallets=summary_wallets_schema,
+        verification_logs=summary_verifications_schema,
+    )
+
+
+@client_bp.route("/<client_id>/summary", methods=["GET"])
+def get_client_summary(client_id):
+    """Client overview: wallets, token count and latest verifications"""
+    loaded = client_summary.get(db.session, client_id)
+    if loaded is None:
+        return jsonify({"Error": "Client not found"}), 404
+    return jsonify(dump_summaries(loaded)[0]), 200
+
+
+@client_bp.route("/summaries", methods=["GET"])
+def list_client_summaries():
+    """Client overviews, newest first; the statement count does not grow
+    with the page size
+
+    Query string: area_code, cursor, page_size
+    """
+    query = client_summary.select()
+    area_code = request.args.get("area_code")
+    if area_code:
+        query = query.where(Client.area_code == area_code)
+    try:
+        cursor, page_size = page_args()
+        page = paginate(
+            query,
+            Client.created_at,
+            Client.client_id,
+            cursor=cursor,
+            page_size=page_size,
+        )
+    except CursorError as e:
+        return jsonify({"Error": str(e)}), 400
+
+    loaded = client_summary.complete(db.session, page.items)
+    return (
+        jsonify(
+            {
+                "clients": dump_summaries(loaded),
+                "next_cursor": page.next_cursor,
+                "page_size": page.page_size,
+            }
+        ),
+        200,
+    )
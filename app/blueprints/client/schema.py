@@ -1 +1,18 @@
 # Client schemas
+from app.extensions import ma
+from app.models import Client
+from .profiles import client_summary
+
+
+class ClientSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Client
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+client_schema = ClientSchema()
+clients_schema = ClientSchema(many=True)
+# Only the columns the client_summary profile loads
+client_summary_schema = ClientSchema(only=client_summary.fields())
@@ -0,0 +1,43 @@
+# Command line entry point: python -m app.blueprints.fakedata OUTPUT_DIR
+import argparse
+from .loadfiles import generate_load_files, DELIMITERS, DEFAULT_SHARD_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate LandLink seed load files in parallel"
+    )
+    parser.add_argument("output_dir")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--format", choices=sorted(DELIMITERS), default="csv")
+    parser.add_argument(
+        "--scale",
+        action="append",
+        default=[],
+        metavar="TABLE=COUNT",
+        help="Row count override, e.g. --scale tokens=1000000",
+    )
+    args = parser.parse_args()
+
+    scale = {}
+    for item in args.scale:
+        table, _, count = item.partition("=")
+        scale[table] = int(count)
+
+    manifest = generate_load_files(
+        args.output_dir,
+        scale=scale,
+        seed=args.seed,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        file_format=args.format,
+    )
+    for table, details in manifest["tables"].items():
+        print(f"{table}: {details['rows']} rows in {len(details['files'])} files")
+    print(f"seed: {manifest['seed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# Parallel load-file generation and native bulk loading for seed datasets
+import csv
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from sqlalchemy import select
+from app.models import db, SystemConfig
+from .seeding import SEED_PLAN, SeedContext, resolve_scale
+
+DEFAULT_SHARD_SIZE = 100000
+MANIFEST_NAME = "manifest.json"
+NULL_MARKER = "\\N"  # MySQL LOAD DATA default for NULL
+DELIMITERS = {"csv": ",", "tsv": "\t"}
+
+# Rows are generated per table, so tables are looked up by name in the workers
+ROW_GENERATORS = {table: row_generator for table, _, row_generator in SEED_PLAN}
+MODELS = {table: model for table, model, _ in SEED_PLAN}
+
+# One SeedContext per worker process and dataset (faker pools are costly)
+_worker_contexts = {}
+
+
+def encode_value(value):
+    """Encode a row value for a load file (MySQL LOAD DATA conventions)"""
+    if value is None:
+        return NULL_MARKER
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.replace("\\", "\\\\")
+    return str(value)
+
+
+def decode_value(value):
+    """Reverse encode_value for loaders that read the files themselves"""
+    if value == NULL_MARKER:
+        return None
+    return value.replace("\\\\", "\\")
+
+
+def load_columns(model, row):
+    """Columns to write for a table, with the Python-side defaults to fill in
+
+    Native loaders bypass SQLAlchemy, so column defaults the generators leave
+    out (e.g. Admin.can_create_programs) must be written into the file.
+    """
+    columns = []
+    defaults = {}
+    for column in model.__table__.columns:
+        if column.name in row:
+            columns.append(column.name)
+        elif column.default is not None and column.default.is_scalar:
+            columns.append(column.name)
+            defaults[column.name] = column.default.arg
+    return columns, defaults
+
+
+def plan_shards(scale, shard_size):
+    """Split every table's row range into fixed-size shards
+
+    Shard boundaries depend only on the scale and shard size, never on the
+    worker count, so the same seed always produces the same files.
+    """
+    shards = []
+    for table, _, _ in SEED_PLAN:
+        total = scale[table]
+        for shard, start in enumerate(range(0, total, shard_size)):
+            shards.append((table, shard, start, min(start + shard_size, total)))
+    return shards
+
+
+def _shard_context(scale, seed):
+    key = (seed, tuple(sorted(scale.items())))
+    ctx = _worker_contexts.get(key)
+    if ctx is None:
+        ctx = SeedContext(scale, seed=seed)
+        _worker_contexts[key] = ctx
+    return ctx
+
+
+def write_shard(output_dir, file_format, scale, seed, table, shard, start, stop):
+    """Generate one shard of a table and write it as a load file"""
+    ctx = _shard_context(scale, seed)
+    rows = ROW_GENERATORS[table](ctx, ctx.rng_for(table, shard), start, stop)
+
+    table_dir = os.path.join(output_dir, table)
+    os.makedirs(table_dir, exist_ok=True)
+    path = os.path.join(table_dir, f"{shard:05d}.{file_format}")
+
+    columns = None
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(
+            handle, delimiter=DELIMITERS[file_format], lineterminator="\n"
+        )
+        for row in rows:
+            if columns is None:
+                columns, defaults = load_columns(MODELS[table], row)
+            row = {**defaults, **row}
+            writer.writerow([encode_value(row[column]) for column in columns])
+            count += 1
+
+    return {
+        "table": table,
+        "shard": shard,
+        "path": os.path.relpath(path, output_dir),
+        "rows": count,
+        "columns": columns,
+    }
+
+
+def generate_load_files(
+    output_dir,
+    scale=None,
+    seed=None,
+    workers=None,
+    shard_size=DEFAULT_SHARD_SIZE,
+    file_format="csv",
+):
+    """Generate every table in parallel shards and write a manifest"""
+    if file_format not in DELIMITERS:
+        raise ValueError(f"file_format must be one of: {', '.join(DELIMITERS)}")
+    if shard_size < 1:
+        raise ValueError("shard_size must be a positive integer")
+    if seed is None:
+        seed = random.randrange(2**31)  # Recorded in the manifest for reruns
+    scale = resolve_scale(scale)
+    os.makedirs(output_dir, exist_ok=True)
+
+    shards = plan_shards(scale, shard_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(write_shard, output_dir, file_format, scale, seed, *shard_spec)
+            for shard_spec in shards
+        ]
+        results = [future.result() for future in futures]
+
+    tables = {}
+    for table, _, _ in SEED_PLAN:
+        table_results = [result for result in results if result["table"] == table]
+        columns = next(
+            (result["columns"] for result in table_results if result["columns"]), []
+        )
+        tables[table] = {
+            "columns": columns,
+            "rows": sum(result["rows"] for result in table_results),
+            "files": [result["path"] for result in table_results],
+        }
+
+    manifest = {
+        "seed": seed,
+        "format": file_format,
+        "shard_size": shard_size,
+        "scale": scale,
+        "tables": tables,
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def _load_sqlite(connection, table, columns, path, delimiter, ignore_duplicates):
+    verb = "INSERT OR IGNORE" if ignore_duplicates else "INSERT"
+    placeholders = ", ".join("?" for _ in columns)
+    statement = f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    with open(path, newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle, delimiter=delimiter)
+        rows = [tuple(decode_value(value) for value in row) for row in reader]
+    if rows:
+        connection.exec_driver_sql(statement, rows)
+    return len(rows)
+
+
+def _load_mysql(connection, table, columns, path, delimiter, ignore_duplicates):
+    # Needs local_infile enabled on both the server and the pymysql connection
+    ignore = "IGNORE " if ignore_duplicates else ""
+    delimiter_sql = "\\t" if delimiter == "\t" else delimiter
+    statement = (
+        f"LOAD DATA LOCAL INFILE '{os.path.abspath(path)}' {ignore}"
+        f"INTO TABLE {table} "
+        f"FIELDS TERMINATED BY '{delimiter_sql}' OPTIONALLY ENCLOSED BY '\"' "
+        "ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+        f"({', '.join(columns)})"
+    )
+    result = connection.exec_driver_sql(statement)
+    return result.rowcount
+
+
+LOADERS = {"sqlite": _load_sqlite, "mysql": _load_mysql}
+
+
+def load_files(output_dir):
+    """Ingest a generated dataset with the database's native bulk-load path"""
+    with open(os.path.join(output_dir, MANIFEST_NAME)) as handle:
+        manifest = json.load(handle)
+
+    dialect = db.engine.dialect.name
+    loader = LOADERS.get(dialect)
+    if loader is None:
+        raise ValueError(f"No bulk loader for database dialect: {dialect}")
+    delimiter = DELIMITERS[manifest["format"]]
+
+    existing_keys = set(db.session.execute(select(SystemConfig.config_key)).scalars())
+
+    loaded = {}
+    for table, _, _ in SEED_PLAN:
+        details = manifest["tables"][table]
+        # Fixed config keys may already exist from an earlier seed
+        ignore_duplicates = table == "system_configs" and bool(existing_keys)
+        loaded[table] = 0
+        for relative_path in details["files"]:
+            path = os.path.join(output_dir, relative_path)
+            connection = db.session.connection()
+            loaded[table] += loader(
+                connection,
+                MODELS[table].__tablename__,
+                details["columns"],
+                path,
+                delimiter,
+                ignore_duplicates,
+            )
+            db.session.commit()  # One commit per shard file
+    return loaded
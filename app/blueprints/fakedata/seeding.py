@@ -0,0 +1,590 @@
+# Bulk seeding engine for load-test datasets
+import hashlib
+import random
+import string
+import uuid
+from datetime import date, timedelta
+from itertools import islice
+from faker import Faker
+from werkzeug.security import generate_password_hash
+from sqlalchemy import select
+from app.models import (
+    db,
+    Admin,
+    Client,
+    Supervisor,
+    Employee,
+    Wallet,
+    Transaction,
+    Token,
+    PublicPoolToken,
+    Organization,
+    Program,
+    Kiosk,
+    KioskSession,
+    VerificationLog,
+    AlertLog,
+    SystemConfig,
+)
+
+# Area codes used throughout the seeding
+AREA_CODES = ["NY001", "CA002", "TX003", "FL004", "WA005"]
+
+# Default row counts per table (matches the original hand-written seed)
+DEFAULT_SCALE = {
+    "admins": 3,
+    "employees": 10,
+    "organizations": 5,
+    "supervisors": 5,
+    "clients": 25,
+    "programs": 8,
+    "kiosks": 15,
+    "wallets": 15,
+    "tokens": 100,
+    "public_pool_tokens": 200,
+    "transactions": 30,
+    "kiosk_sessions": 30,
+    "verification_logs": 50,
+    "alert_logs": 25,
+    "system_configs": 5,
+}
+
+# Tables that must have rows before the given table can be seeded
+PARENT_TABLES = {
+    "supervisors": ("organizations",),
+    "kiosks": ("organizations",),
+    "wallets": ("clients",),
+    "tokens": ("clients", "programs"),
+    "public_pool_tokens": ("clients", "programs"),
+    "transactions": ("wallets", "tokens", "kiosks"),
+    "kiosk_sessions": ("kiosks", "clients"),
+    "verification_logs": ("clients", "programs", "kiosks", "supervisors"),
+    "alert_logs": ("admins", "clients", "programs", "kiosks"),
+}
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_CHUNK_SIZE = 50000
+
+# Size of the pre-generated faker value pools (faker is far too slow per row)
+FAKER_POOL_SIZE = 500
+
+# Safe test configs only
+SAFE_CONFIGS = [
+    {
+        "key": "TEST_MODE_ENABLED",
+        "value": "true",
+        "type": "BOOLEAN",
+        "category": "TESTING",
+        "description": "Enable test mode for development",
+    },
+    {
+        "key": "FAKE_DATA_VERSION",
+        "value": "v1.0",
+        "type": "STRING",
+        "category": "TESTING",
+        "description": "Version of fake data generation",
+    },
+    {
+        "key": "MAX_FAKE_TRANSACTIONS_PER_DAY",
+        "value": "1000",
+        "type": "INTEGER",
+        "category": "TESTING",
+        "description": "Maximum fake transactions per day",
+    },
+    {
+        "key": "DEVELOPMENT_AI_THRESHOLD",
+        "value": "0.75",
+        "type": "FLOAT",
+        "category": "AI",
+        "description": "AI confidence threshold for development",
+    },
+    {
+        "key": "TEST_GEOGRAPHIC_CODES",
+        "value": '["NY001", "CA002", "TX003", "FL004", "WA005"]',
+        "type": "JSON",
+        "category": "TESTING",
+        "description": "Test area codes for development",
+    },
+]
+
+
+def resolve_scale(overrides=None):
+    """Merge per-table overrides into the default scale and validate it"""
+    scale = dict(DEFAULT_SCALE)
+    for table, count in (overrides or {}).items():
+        if table not in scale:
+            raise ValueError(f"Unknown table in scale: {table}")
+        if isinstance(count, bool) or not isinstance(count, int) or count < 0:
+            raise ValueError(f"Scale for {table} must be a non-negative integer")
+        scale[table] = count
+
+    scale["system_configs"] = min(scale["system_configs"], len(SAFE_CONFIGS))
+    scale["wallets"] = min(scale["wallets"], scale["clients"])  # One per client
+
+    for table, parents in PARENT_TABLES.items():
+        if scale[table] == 0:
+            continue
+        for parent in parents:
+            if scale[parent] == 0:
+                raise ValueError(f"Cannot seed {table} without any {parent}")
+    return scale
+
+
+def seeded_password_hash(password, rng, n=32768, r=8, p=1):
+    """Werkzeug-compatible scrypt hash with a salt drawn from rng
+
+    Same format as generate_password_hash (so check_password_hash accepts it),
+    but reproducible for seeded datasets.
+    """
+    salt = "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(16))
+    digest = hashlib.scrypt(
+        password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=132 * n * r * p
+    )
+    return f"scrypt:{n}:{r}:{p}${salt}${digest.hex()}"
+
+
+class SeedContext:
+    """Shared state for one seeding run
+
+    Primary keys are derived from (table, row index) so child rows can
+    reference any parent row without keeping the parents in memory.
+    """
+
+    def __init__(self, scale, seed=None):
+        self.scale = scale
+        self.seed = seed
+        if seed is None:
+            self.namespace = uuid.uuid4()
+        else:
+            self.namespace = uuid.uuid5(uuid.NAMESPACE_OID, f"landlink-seed:{seed}")
+        self.tag = self.namespace.hex[:6]  # Keeps unique columns unique across runs
+        self.today = date.today()
+        self._id_prefixes = {}
+
+        faker = Faker()
+        faker.seed_instance(seed)
+        self.names = [faker.name() for _ in range(FAKER_POOL_SIZE)]
+        self.user_names = [faker.user_name() for _ in range(FAKER_POOL_SIZE)]
+        self.emails = [faker.email() for _ in range(FAKER_POOL_SIZE)]
+        self.phones = [faker.phone_number() for _ in range(FAKER_POOL_SIZE)]
+        self.cities = [faker.city() for _ in range(FAKER_POOL_SIZE)]
+        self.states = [faker.state() for _ in range(FAKER_POOL_SIZE)]
+        self.companies = [faker.company() for _ in range(FAKER_POOL_SIZE)]
+        self.addresses = [
+            faker.address().replace("\n", ", ") for _ in range(FAKER_POOL_SIZE)
+        ]  # Single line so every row is one line in a load file
+        self.sentences = [faker.sentence() for _ in range(FAKER_POOL_SIZE)]
+        self.short_sentences = [
+            faker.sentence(nb_words=4) for _ in range(FAKER_POOL_SIZE)
+        ]
+        self.texts = [faker.text(max_nb_chars=200) for _ in range(FAKER_POOL_SIZE)]
+        self.coordinates = [
+            f"{faker.latitude()}, {faker.longitude()}" for _ in range(FAKER_POOL_SIZE)
+        ]
+
+        # Hashing is deliberately slow, so every seeded account shares one hash
+        if seed is None:
+            self.admin_password_hash = generate_password_hash("AdminPassword123!")
+            self.employee_password_hash = generate_password_hash("Employee123!")
+        else:
+            salt_rng = random.Random(f"{seed}:passwords")
+            self.admin_password_hash = seeded_password_hash(
+                "AdminPassword123!", salt_rng
+            )
+            self.employee_password_hash = seeded_password_hash("Employee123!", salt_rng)
+
+    def rng_for(self, table, shard=0):
+        """Random generator for one table (and shard) of this run"""
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f"{self.seed}:{table}:{shard}")
+
+    def row_id(self, table, index):
+        """UUID-shaped id: per-table prefix plus the row index in the last group"""
+        prefix = self._id_prefixes.get(table)
+        if prefix is None:
+            prefix = str(uuid.uuid5(self.namespace, table))[:24]
+            self._id_prefixes[table] = prefix
+        return f"{prefix}{index:012x}"
+
+    def pick_id(self, rng, table):
+        """Id of a random existing row of the given table"""
+        return self.row_id(table, rng.randrange(self.scale[table]))
+
+    def kiosk_location(self, index):
+        return f"{self.cities[index % FAKER_POOL_SIZE]} Relief Center"
+
+    def recent_date(self, rng, days=365):
+        return self.today - timedelta(days=rng.randrange(days))
+
+
+# Row generators - each yields plain dicts for rows [start, stop) of a table
+
+
+def admin_rows(ctx, rng, start, stop):
+    for i in range(start, stop):
+        yield {
+            "admin_id": ctx.row_id("admins", i),
+            "admin_username": f"{rng.choice(ctx.user_names)}_{ctx.tag}{i}",
+            "hashed_password": ctx.admin_password_hash,
+            "admin_email": f"admin_{ctx.tag}{i}_{rng.choice(ctx.emails)}",
+            "admin_role": rng.choice(["CEO", "ADMIN", "SECURITY_ADMIN"]),
+            "clearance_level": rng.randint(3, 5),
+            "created_at": ctx.today,
+            "is_active": True,
+            "notes": f"Test admin created by faker - {rng.choice(ctx.sentences)}",
+        }
+
+
+def employee_rows(ctx, rng, start, stop):
+    departments = ["IT", "Security", "Operations", "Finance", "HR"]
+    for i in range(start, stop):
+        yield {
+            "employee_id": ctx.row_id("employees", i),
+            "employee_username": f"{rng.choice(ctx.user_names)}_{ctx.tag}{i}",
+            "hashed_password": ctx.employee_password_hash,
+            "employee_email": f"employee_{ctx.tag}{i}_{rng.choice(ctx.emails)}",
+            "employee_role": rng.choice(["EMPLOYEE", "SENIOR_EMPLOYEE", "LEAD"]),
+            "department": rng.choice(departments),
+            "login_location_IP": rng.randint(1000000, 9999999),
+            "created_at": ctx.today,
+            "is_active": rng.choice([True, True, True, False]),  # Mostly active
+        }
+
+
+def organization_rows(ctx, rng, start, stop):
+    org_types = ["NGO", "GOVERNMENT", "PRIVATE", "INTERNATIONAL"]
+    for i in range(start, stop):
+        yield {
+            "org_id": ctx.row_id("organizations", i),
+            "organization_name": rng.choice(ctx.companies),
+            "organization_type": rng.choice(org_types),
+            "authorized_regions": f'["{rng.choice(AREA_CODES)}", "{rng.choice(AREA_CODES)}"]',
+            "contact_email": rng.choice(ctx.emails),
+            "emergency_contact": rng.choice(ctx.phones),
+            "registered_at": ctx.today,
+            "last_access": ctx.today if rng.random() < 0.5 else None,
+        }
+
+
+def supervisor_rows(ctx, rng, start, stop):
+    position_titles = [
+        "Field Supervisor",
+        "Regional Manager",
+        "Site Coordinator",
+        "Operations Lead",
+        "Program Director",
+    ]
+    for i in range(start, stop):
+        yield {
+            "supervisor_id": ctx.row_id("supervisors", i),
+            "supervisor_name": rng.choice(ctx.names),
+            "supervisor_email": f"supervisor_{ctx.tag}{i}_{rng.choice(ctx.emails)}",
+            "employee_id": f"{ctx.tag}-{i}",
+            "organization_id": ctx.pick_id(rng, "organizations"),
+            "position_title": rng.choice(position_titles),
+            "clearance_level": rng.randint(1, 3),
+            "can_verify_clients": True,
+            "can_suspend_programs": rng.random() < 0.5,
+            "can_access_logs": True,
+            "can_emergency_override": rng.random() < 0.5,
+            "authorized_area_codes": f'["{rng.choice(AREA_CODES)}", "{rng.choice(AREA_CODES)}"]',
+            "supervisor_status": "ACTIVE",
+            "hire_date": ctx.today,
+        }
+
+
+def client_rows(ctx, rng, start, stop):
+    for i in range(start, stop):
+        yield {
+            "client_id": ctx.row_id("clients", i),
+            "client_name": rng.choice(ctx.names),
+            "client_email": rng.choice(ctx.emails) if rng.random() < 0.5 else "",
+            "client_phone": rng.choice(ctx.phones) if rng.random() < 0.5 else "",
+            "area_code": rng.choice(AREA_CODES),
+            "created_at": ctx.today,
+            "is_active": True,
+            "login_location_IP": rng.randint(1000000, 9999999),
+        }
+
+
+def program_rows(ctx, rng, start, stop):
+    for i in range(start, stop):
+        yield {
+            "hashed_program_id": ctx.row_id("programs", i),
+            "region": rng.choice(ctx.states),
+            "estimated_beneficiaries": rng.randint(100, 5000),
+            "area_code": rng.choice(AREA_CODES),
+            "created_at": ctx.today,
+            "expiration_deadline": ctx.today,
+            "program_status": rng.choice(["ACTIVE", "SUSPENDED"]),
+            "violation_count": rng.randint(0, 3),
+        }
+
+
+def kiosk_rows(ctx, rng, start, stop):
+    kiosk_statuses = ["ONLINE", "OFFLINE", "MAINTENANCE", "ERROR"]
+    for i in range(start, stop):
+        status = rng.choice(kiosk_statuses)
+        yield {
+            "kiosk_id": ctx.row_id("kiosks", i),
+            "kiosk_location": ctx.kiosk_location(i),
+            "area_code": rng.choice(AREA_CODES),
+            "gps_coordinates": rng.choice(ctx.coordinates),
+            "physical_address": rng.choice(ctx.addresses),
+            "kiosk_model": rng.choice(
+                ["AidStation-Pro", "HelpPoint-2000", "ReliefKiosk-X1"]
+            ),
+            "software_version": f"v{rng.randint(1, 3)}.{rng.randint(0, 9)}.{rng.randint(0, 9)}",
+            "camera_specs": rng.choice(["HD-1080p", "4K-Ultra", "Biometric-Pro"]),
+            "kiosk_status": status,
+            "last_heartbeat": ctx.today if status == "ONLINE" else None,
+            "uptime_percentage": round(rng.uniform(85.0, 99.9), 2),
+            "daily_transaction_limit": rng.randint(50, 200),
+            "current_daily_count": rng.randint(0, 50),
+            "daily_count_date": ctx.today,
+            "total_transactions_processed": rng.randint(100, 5000),
+            "installed_date": ctx.today,
+            "installed_by_org": ctx.pick_id(rng, "organizations"),
+        }
+
+
+def wallet_rows(ctx, rng, start, stop):
+    for i in range(start, stop):
+        yield {
+            "wallet_id": ctx.row_id("wallets", i),
+            "client_id": ctx.row_id("clients", i),  # Wallet i belongs to client i
+            "wallet_balance": round(rng.uniform(0, 1000), 2),
+            "total_tokens_received": rng.randint(5, 50),
+            "total_tokens_redeemed": rng.randint(0, 30),
+            "wallet_hash": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "created_at": ctx.today,
+            "last_activity": ctx.today if rng.random() < 0.5 else None,
+            "wallet_status": rng.choice(["ACTIVE", "SUSPENDED"]),
+        }
+
+
+def token_rows(ctx, rng, start, stop):
+    for i in range(start, stop):
+        yield {
+            "token_id": ctx.row_id("tokens", i),
+            "client_id": ctx.pick_id(rng, "clients"),
+            "program_id": ctx.pick_id(rng, "programs"),
+            "token_amount": round(rng.uniform(50, 500), 2),
+            "weekly_limit": round(rng.uniform(25, 100), 2),
+            "weekly_redeemed": round(rng.uniform(0, 50), 2),
+            "area_code": rng.choice(AREA_CODES),
+            "claim_status": rng.choice(["ACTIVE", "REDEEMED", "TRANSFERRED_TO_POOL"]),
+            "issued_at": ctx.today,
+            "last_redemption": ctx.today if rng.random() < 0.5 else None,
+        }
+
+
+def public_pool_token_rows(ctx, rng, start, stop):
+    for i in range(start, stop):
+        claimed = rng.random() < 0.5
+        yield {
+            "token_id": ctx.row_id("public_pool_tokens", i),
+            "token_amount": round(rng.uniform(25, 200), 2),
+            "area_code": rng.choice(AREA_CODES),
+            "pool_entry_date": ctx.today,
+            "claim_status": "CLAIMED" if claimed else "AVAILABLE",
+            "original_program_id": ctx.pick_id(rng, "programs"),
+            "transfer_reason": rng.choice(["EXPIRED", "SUSPENDED"]),
+            "claimed_by_user_id": ctx.pick_id(rng, "clients") if claimed else None,
+            "claimed_at": ctx.today if claimed else None,
+        }
+
+
+def transaction_rows(ctx, rng, start, stop):
+    for i in range(start, stop):
+        status = rng.choice(["COMPLETED", "PENDING", "FAILED"])
+        timestamp = ctx.recent_date(rng)
+        yield {
+            "transaction_id": ctx.row_id("transactions", i),
+            "wallet_id": ctx.pick_id(rng, "wallets"),
+            "token_id": ctx.pick_id(rng, "tokens") if rng.random() < 0.5 else None,
+            "kiosk_id": ctx.pick_id(rng, "kiosks") if rng.random() < 0.8 else None,
+            "transaction_type": rng.choice(["REDEMPTION", "TRANSFER", "ISSUANCE"]),
+            "transaction_amount": round(rng.uniform(10, 300), 2),
+            "transaction_status": status,
+            "transaction_hash": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "transaction_location": rng.choice(ctx.cities),
+            "transaction_timestamp": timestamp,
+            "completed_at": timestamp if status == "COMPLETED" else None,
+            "retry_count": rng.randint(0, 2),
+        }
+
+
+def kiosk_session_rows(ctx, rng, start, stop):
+    session_statuses = ["ACTIVE", "COMPLETED", "ABANDONED"]
+    for i in range(start, stop):
+        status = rng.choice(session_statuses)
+        yield {
+            "session_id": ctx.row_id("kiosk_sessions", i),
+            "kiosk_id": ctx.pick_id(rng, "kiosks"),
+            "hashed_user_id": (
+                ctx.pick_id(rng, "clients") if rng.random() < 0.5 else None
+            ),
+            "session_status": status,
+            "identity_verified": rng.random() < 0.5,
+            "un_staff_present": rng.random() < 0.5,
+            "dual_photo_captured": rng.random() < 0.5,
+            "session_start": ctx.today,
+            "last_activity": ctx.today,
+            "session_end": ctx.today if status != "ACTIVE" else None,
+        }
+
+
+def verification_log_rows(ctx, rng, start, stop):
+    verification_statuses = ["SUCCESS", "FAILED", "FLAGGED"]
+    failure_reasons = [
+        "Low confidence score",
+        "Biometric mismatch",
+        "Document invalid",
+        "Geographic violation",
+    ]
+    for i in range(start, stop):
+        status = rng.choice(verification_statuses)
+        kiosk_index = rng.randrange(ctx.scale["kiosks"])
+        yield {
+            "client_id": ctx.pick_id(rng, "clients") if rng.random() < 0.5 else None,
+            "program_id": ctx.pick_id(rng, "programs"),
+            "verification_status": status,
+            "ai_confidence_score": round(rng.uniform(0.3, 0.99), 3),
+            "dual_verification_passed": rng.random() < 0.5,
+            "failure_reason": (
+                rng.choice(failure_reasons) if status == "FAILED" else None
+            ),
+            "geographic_violation": rng.random() < 0.5,
+            "kiosk_location": ctx.kiosk_location(kiosk_index),
+            "kiosk_id": ctx.row_id("kiosks", kiosk_index),
+            "supervisor_id": (
+                ctx.pick_id(rng, "supervisors") if rng.random() < 0.5 else None
+            ),
+            "verification_timestamp": ctx.recent_date(rng),
+        }
+
+
+def alert_log_rows(ctx, rng, start, stop):
+    alert_types = ["SECURITY", "SYSTEM", "VIOLATION", "MAINTENANCE"]
+    alert_severities = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+    alert_statuses = ["OPEN", "ACKNOWLEDGED", "RESOLVED", "DISMISSED"]
+    alert_categories = [
+        "FRAUD_DETECTION",
+        "SYSTEM_ERROR",
+        "BIOMETRIC_FAILURE",
+        "NETWORK_ISSUE",
+        "MAINTENANCE_DUE",
+        "SUSPICIOUS_ACTIVITY",
+    ]
+    source_systems = ["KIOSK", "VERIFICATION", "ADMIN", "AI_SYSTEM"]
+    for i in range(start, stop):
+        alert_type = rng.choice(alert_types)
+        source_system = rng.choice(source_systems)
+        status = rng.choice(alert_statuses)
+        acknowledged = status in ["ACKNOWLEDGED", "RESOLVED"]
+        resolved = status == "RESOLVED"
+        yield {
+            "alert_type": alert_type,
+            "alert_severity": rng.choice(alert_severities),
+            "alert_category": rng.choice(alert_categories),
+            "alert_title": f"{alert_type}: {rng.choice(ctx.short_sentences)}",
+            "alert_description": rng.choice(ctx.texts),
+            "source_system": source_system,
+            "source_id": (
+                ctx.pick_id(rng, "kiosks")
+                if source_system == "KIOSK"
+                else str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            ),
+            "affected_user_id": (
+                ctx.pick_id(rng, "clients") if rng.random() < 0.5 else None
+            ),
+            "affected_program_id": (
+                ctx.pick_id(rng, "programs") if rng.random() < 0.5 else None
+            ),
+            "alert_location": rng.choice(ctx.cities) if rng.random() < 0.5 else None,
+            "area_code": rng.choice(AREA_CODES) if rng.random() < 0.5 else None,
+            "alert_timestamp": ctx.recent_date(rng),
+            "alert_status": status,
+            "acknowledged_by": ctx.pick_id(rng, "admins") if acknowledged else None,
+            "acknowledged_at": ctx.today if acknowledged else None,
+            "resolved_by": ctx.pick_id(rng, "admins") if resolved else None,
+            "resolved_at": ctx.today if resolved else None,
+            "resolution_notes": rng.choice(ctx.sentences) if resolved else None,
+        }
+
+
+def system_config_rows(ctx, rng, start, stop):
+    for config_data in SAFE_CONFIGS[start:stop]:
+        yield {
+            "config_key": config_data["key"],
+            "config_value": config_data["value"],
+            "config_type": config_data["type"],
+            "config_description": config_data["description"],
+            "config_category": config_data["category"],
+            "requires_admin": True,
+            "requires_restart": False,
+            "is_sensitive": False,
+            "default_value": config_data["value"],
+            "created_at": ctx.today,
+            "environment": "DEV",
+        }
+
+
+# Seeding order (parents before children) with the model and row generator
+SEED_PLAN = [
+    ("admins", Admin, admin_rows),
+    ("employees", Employee, employee_rows),
+    ("organizations", Organization, organization_rows),
+    ("supervisors", Supervisor, supervisor_rows),
+    ("clients", Client, client_rows),
+    ("programs", Program, program_rows),
+    ("kiosks", Kiosk, kiosk_rows),
+    ("wallets", Wallet, wallet_rows),
+    ("tokens", Token, token_rows),
+    ("public_pool_tokens", PublicPoolToken, public_pool_token_rows),
+    ("transactions", Transaction, transaction_rows),
+    ("kiosk_sessions", KioskSession, kiosk_session_rows),
+    ("verification_logs", VerificationLog, verification_log_rows),
+    ("alert_logs", AlertLog, alert_log_rows),
+    ("system_configs", SystemConfig, system_config_rows),
+]
+
+
+def chunked(rows, chunk_size):
+    """Split a row stream into lists of at most chunk_size rows"""
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_insert(model, rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write a row stream with one multi-row INSERT and commit per chunk"""
+    statement = model.__table__.insert()
+    total = 0
+    for chunk in chunked(rows, chunk_size):
+        db.session.execute(statement, chunk)
+        db.session.commit()
+        total += len(chunk)
+    return total
+
+
+def seed(scale=None, chunk_size=DEFAULT_CHUNK_SIZE, seed=None):
+    """Seed every table in dependency order and return rows written per table"""
+    if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}")
+    ctx = SeedContext(resolve_scale(scale), seed=seed)
+
+    # Config keys are fixed, so skip the ones left over from an earlier seed
+    existing_keys = set(db.session.execute(select(SystemConfig.config_key)).scalars())
+
+    created = {}
+    for table, model, row_generator in SEED_PLAN:
+        rows = row_generator(ctx, ctx.rng_for(table), 0, ctx.scale[table])
+        if table == "system_configs":
+            rows = (row for row in rows if row["config_key"] not in existing_keys)
+        created[table] = bulk_insert(model, rows, chunk_size)
+    return created
@@ -1,3 +1,5 @@
 from flask import Blueprint
 
 kiosk_sessions_bp = Blueprint("kiosk_sessions", __name__)
+
+from . import routes
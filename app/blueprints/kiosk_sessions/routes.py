@@ -1 +1,68 @@
 # KioskSession routes
+import uuid
+from datetime import date
+from flask import request, jsonify
+from app.extensions import limiter
+from app.models import db, Kiosk, KioskSession
+from .schema import kiosk_session_schema
+from . import kiosk_sessions_bp
+
+END_STATUSES = ("COMPLETED", "ABANDONED")
+SESSION_FLAGS = ("identity_verified", "un_staff_present", "dual_photo_captured")
+
+
+@kiosk_sessions_bp.route("/", methods=["POST"])
+@limiter.exempt  # One per visitor at every kiosk
+def start_session():
+    """Start an ACTIVE session at a kiosk
+
+    JSON body: kiosk_id, hashed_user_id (optional)
+    """
+    data = request.get_json(silent=True) or {}
+    kiosk_id = data.get("kiosk_id")
+    if not kiosk_id:
+        return jsonify({"Error": "kiosk_id is required"}), 400
+    if db.session.get(Kiosk, kiosk_id) is None:
+        return jsonify({"Error": "Kiosk not found"}), 404
+    today = date.today()
+    session = KioskSession(
+        session_id=str(uuid.uuid4()),
+        kiosk_id=kiosk_id,
+        hashed_user_id=data.get("hashed_user_id"),
+        session_status="ACTIVE",
+        session_start=today,
+        last_activity=today,
+    )
+    db.session.add(session)
+    db.session.commit()
+    return jsonify(kiosk_session_schema.dump(session)), 201
+
+
+@kiosk_sessions_bp.route("/<session_id>/end", methods=["POST"])
+@limiter.exempt
+def end_session(session_id):
+    """Close an ACTIVE session
+
+    JSON body: session_status (COMPLETED or ABANDONED, default COMPLETED),
+    identity_verified, un_staff_present, dual_photo_captured
+    """
+    data = request.get_json(silent=True) or {}
+    status = data.get("session_status", "COMPLETED")
+    if status not in END_STATUSES:
+        allowed = ", ".join(END_STATUSES)
+        return jsonify({"Error": f"session_status must be one of: {allowed}"}), 400
+    for flag in SESSION_FLAGS:
+        if flag in data and not isinstance(data[flag], bool):
+            return jsonify({"Error": f"{flag} must be true or false"}), 400
+    session = db.session.get(KioskSession, session_id)
+    if session is None:
+        return jsonify({"Error": "Session not found"}), 404
+    if session.session_status != "ACTIVE":
+        return jsonify({"Error": f"Session is already {session.session_status}"}), 409
+    for flag in SESSION_FLAGS:
+        if flag in data:
+            setattr(session, flag, data[flag])
+    session.session_status = status
+    session.last_activity = session.session_end = date.today()
+    db.session.commit()
+    return jsonify(kiosk_session_schema.dump(session)), 200
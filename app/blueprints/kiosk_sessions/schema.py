@@ -1 +1,15 @@
 # KioskSession schemas
+from app.extensions import ma
+from app.models import KioskSession
+
+
+class KioskSessionSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = KioskSession
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+kiosk_session_schema = KioskSessionSchema()
+kiosk_sessions_schema = KioskSessionSchema(many=True)
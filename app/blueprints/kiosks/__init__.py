@@ -1,3 +1,11 @@
 from flask import Blueprint
 
 kiosks_bp = Blueprint("kiosks", __name__)
+
+from . import routes
+from .heartbeats import init_heartbeats
+from .counters import init_counters
+
+# One heartbeat buffer and counter shard per app the blueprint is registered on
+kiosks_bp.record_once(lambda state: init_heartbeats(state.app))
+kiosks_bp.record_once(lambda state: init_counters(state.app))
@@ -0,0 +1,257 @@
+# Sharded daily transaction counters for kiosks
+import atexit
+import os
+import threading
+from datetime import date
+from sqlalchemy import bindparam, case, or_, select, update
+from app.models import db, Kiosk
+from app.utils.shared_cache import ALL_ROWS, invalidate_on_commit, model_tag
+
+DEFAULT_LEASE_SIZE = 10  # Transactions reserved per DB round trip
+DEFAULT_FOLD_INTERVAL = 30.0  # Seconds between fold-backs
+
+kiosks = Kiosk.__table__
+
+# Return unused reservations and add used counts to the lifetime total
+_fold_statement = (
+    update(kiosks)
+    .where(kiosks.c.kiosk_id == bindparam("b_kiosk_id"))
+    .values(
+        # Reservations from a day that has since rolled over are not returned
+        current_daily_count=kiosks.c.current_daily_count
+        - case(
+            (kiosks.c.daily_count_date == bindparam("b_day"), bindparam("b_unused")),
+            else_=0,
+        ),
+        total_transactions_processed=kiosks.c.total_transactions_processed
+        + bindparam("b_used"),
+    )
+)
+
+
+def _kiosk_tags(kiosk_ids):
+    """Cache tags of kiosk rows changed by a Core statement"""
+    return [model_tag(Kiosk)] + [model_tag(Kiosk, kiosk_id) for kiosk_id in kiosk_ids]
+
+
+class UnknownKiosk(LookupError):
+    """Raised when a counter is requested for a kiosk that does not exist"""
+
+
+class _Lease:
+    """Part of a kiosk's daily quota this process reserved in the DB"""
+
+    __slots__ = ("day", "remaining", "used")
+
+    def __init__(self, day):
+        self.day = day
+        self.remaining = 0
+        self.used = 0
+
+
+class KioskCounters:
+    """Enforces Kiosk.daily_transaction_limit without a write per transaction
+
+    Each process (shard) reserves quota in blocks of lease_size with
+    `UPDATE ... SET current_daily_count = current_daily_count + n WHERE
+    current_daily_count + n <= daily_transaction_limit`, then hands it out
+    from memory. The DB count therefore always includes every shard's
+    outstanding reservation and the limit can never be exceeded; near the
+    limit a shard may refuse while another still holds spare quota, which
+    fold-back returns. Every fold_interval seconds a background thread
+    returns unused quota and adds used counts to total_transactions_processed
+    in one batched UPDATE. The first reservation of a new day resets every
+    kiosk's count with one bulk UPDATE.
+    """
+
+    def __init__(
+        self, app, lease_size=DEFAULT_LEASE_SIZE, fold_interval=DEFAULT_FOLD_INTERVAL
+    ):
+        self.app = app
+        self.lease_size = lease_size
+        self.fold_interval = fold_interval
+        self._leases = {}
+        self._stale = []  # Leases replaced at rollover, still to be folded
+        self._lock = threading.Lock()
+        self._reserve_lock = threading.Lock()
+        self._rolled_over = None  # Last day this process checked the rollover
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.close)
+
+    def acquire(self, kiosk_id):
+        """Count one transaction; False if the kiosk is at its daily limit"""
+        today = date.today()
+        with self._lock:
+            lease = self._leases.get(kiosk_id)
+            if lease is not None and lease.day == today and lease.remaining:
+                lease.remaining -= 1
+                lease.used += 1
+                return True
+
+        with self._reserve_lock:
+            with self._lock:
+                # Another thread may have refilled while we waited
+                lease = self._leases.get(kiosk_id)
+                if lease is not None and lease.day == today and lease.remaining:
+                    lease.remaining -= 1
+                    lease.used += 1
+                    return True
+            reserved = self._reserve(kiosk_id, today)
+            with self._lock:
+                lease = self._leases.get(kiosk_id)
+                if lease is None or lease.day != today:
+                    if lease is not None:
+                        self._stale.append((kiosk_id, lease))
+                    lease = self._leases[kiosk_id] = _Lease(today)
+                lease.remaining += reserved
+                if not lease.remaining:
+                    return False
+                lease.remaining -= 1
+                lease.used += 1
+        self._ensure_thread()
+        return True
+
+    def release(self, kiosk_id):
+        """Give back a count taken by acquire() for a transaction that failed"""
+        with self._lock:
+            lease = self._leases.get(kiosk_id)
+            if lease is not None and lease.day == date.today() and lease.used:
+                lease.used -= 1
+                lease.remaining += 1
+
+    def _reserve(self, kiosk_id, today):
+        """Reserve up to lease_size in the DB; returns how many were granted"""
+        with self.app.app_context():
+            self.rollover(today)
+            wanted = self.lease_size
+            while wanted:
+                granted = db.session.execute(
+                    update(kiosks)
+                    .where(kiosks.c.kiosk_id == kiosk_id)
+                    .where(kiosks.c.daily_count_date >= today)
+                    .where(
+                        kiosks.c.current_daily_count + wanted
+                        <= kiosks.c.daily_transaction_limit
+                    )
+                    .values(current_daily_count=kiosks.c.current_daily_count + wanted)
+                ).rowcount
+                if granted:
+                    invalidate_on_commit(db.session, _kiosk_tags([kiosk_id]))
+                db.session.commit()
+                if granted:
+                    return wanted
+                row = db.session.execute(
+                    select(
+                        kiosks.c.current_daily_count,
+                        kiosks.c.daily_transaction_limit,
+                        kiosks.c.daily_count_date,
+                    ).where(kiosks.c.kiosk_id == kiosk_id)
+                ).first()
+                db.session.commit()
+                if row is None:
+                    raise UnknownKiosk(f"Kiosk {kiosk_id} not found")
+                if row.daily_count_date is None or row.daily_count_date < today:
+                    self.rollover(today, force=True)
+                    continue
+                # Take whatever is left, if anything
+                left = row.daily_transaction_limit - row.current_daily_count
+                wanted = max(0, min(wanted - 1, left))
+            return 0
+
+    def rollover(self, today=None, force=False):
+        """Reset every kiosk whose count belongs to an earlier day (one UPDATE)
+
+        Idempotent and safe to race: rows already on today are untouched.
+        """
+        today = today or date.today()
+        if self._rolled_over == today and not force:
+            return 0
+        reset = db.session.execute(
+            update(kiosks)
+            .where(
+                or_(
+                    kiosks.c.daily_count_date.is_(None),
+                    kiosks.c.daily_count_date < today,
+                )
+            )
+            .values(current_daily_count=0, daily_count_date=today)
+        ).rowcount
+        if reset:
+            invalidate_on_commit(
+                db.session, [model_tag(Kiosk), model_tag(Kiosk, ALL_ROWS)]
+            )
+        db.session.commit()
+        self._rolled_over = today
+        return reset
+
+    def fold(self):
+        """Write used counts and return unused quota; returns kiosks folded"""
+        with self._lock:
+            leases, self._leases = self._leases, {}
+            leases = list(leases.items()) + self._stale
+            self._stale = []
+        rows = [
+            {
+                "b_kiosk_id": kiosk_id,
+                "b_unused": lease.remaining,
+                "b_used": lease.used,
+                "b_day": lease.day,
+            }
+            for kiosk_id, lease in leases
+            if lease.remaining or lease.used
+        ]
+        if not rows:
+            return 0
+        try:
+            with self.app.app_context():
+                db.session.execute(_fold_statement, rows)
+                invalidate_on_commit(
+                    db.session, _kiosk_tags(row["b_kiosk_id"] for row in rows)
+                )
+                db.session.commit()
+        except Exception:
+            with self._lock:
+                # Retry on the next fold; reservations stay counted meanwhile
+                self._stale.extend(leases)
+            raise
+        return len(rows)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="kiosk-counter-fold", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._wake.wait(self.fold_interval):
+            try:
+                self.fold()
+            except Exception:
+                self.app.logger.exception("Kiosk counter fold-back failed")
+
+    def close(self):
+        """Stop the fold-back thread and fold whatever is outstanding"""
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.fold_interval + 5)
+        try:
+            self.fold()
+        except Exception:
+            self.app.logger.exception("Kiosk counters not folded on shutdown")
+
+
+def init_counters(app):
+    app.extensions["kiosk_counters"] = KioskCounters(
+        app,
+        app.config.get("KIOSK_COUNTER_LEASE_SIZE", DEFAULT_LEASE_SIZE),
+        app.config.get("KIOSK_COUNTER_FOLD_INTERVAL", DEFAULT_FOLD_INTERVAL),
+    )
@@ -0,0 +1,179 @@
+# Coalesced kiosk heartbeat ingestion
+import atexit
+import os
+import threading
+import time
+from datetime import date
+from sqlalchemy import bindparam, select, update
+from app.models import db, Kiosk
+from app.utils.shared_cache import invalidate_on_commit, model_tag
+from .counters import UnknownKiosk
+
+DEFAULT_FLUSH_INTERVAL = 5.0  # Seconds; HEARTBEAT_FLUSH_INTERVAL overrides
+KIOSK_STATUSES = ("ONLINE", "OFFLINE", "MAINTENANCE", "ERROR")
+
+_flush_statement = (
+    update(Kiosk.__table__)
+    .where(Kiosk.__table__.c.kiosk_id == bindparam("b_kiosk_id"))
+    .values(
+        last_heartbeat=bindparam("b_last_heartbeat"),
+        kiosk_status=bindparam("b_kiosk_status"),
+        uptime_percentage=bindparam("b_uptime_percentage"),
+    )
+)
+
+
+class HeartbeatError(ValueError):
+    """Raised for malformed heartbeats (respond with 400)"""
+
+
+class HeartbeatBuffer:
+    """Latest heartbeat per kiosk, written to the kiosks table in batches
+
+    record() only touches memory. A background thread flushes every
+    interval seconds with one executemany UPDATE and one commit, however
+    many heartbeats arrived meanwhile; only the newest state per kiosk is
+    written. A failed flush puts its rows back unless newer ones arrived,
+    and the process flushes once more on a graceful exit. A kiosk id is
+    looked up in the database the first time it beats, then remembered.
+    """
+
+    def __init__(self, app, interval=DEFAULT_FLUSH_INTERVAL):
+        self.app = app
+        self.interval = interval
+        self._pending = {}
+        self._known = set()  # Kiosk ids seen in the database
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.received = 0
+        self.written = 0
+        self.flushes = 0
+        self.last_flush_ms = None
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        atexit.register(self.close)
+
+    def record(self, kiosk_id, kiosk_status, uptime_percentage):
+        if kiosk_status not in KIOSK_STATUSES:
+            raise HeartbeatError(
+                f"kiosk_status must be one of: {', '.join(KIOSK_STATUSES)}"
+            )
+        try:
+            uptime_percentage = float(uptime_percentage)
+        except (TypeError, ValueError):
+            raise HeartbeatError("uptime_percentage must be a number")
+        if not 0 <= uptime_percentage <= 100:
+            raise HeartbeatError("uptime_percentage must be between 0 and 100")
+        if kiosk_id not in self._known:
+            exists = db.session.scalar(
+                select(Kiosk.kiosk_id).where(Kiosk.kiosk_id == kiosk_id)
+            )
+            if exists is None:
+                raise UnknownKiosk(f"Kiosk {kiosk_id} not found")
+            with self._lock:
+                self._known.add(kiosk_id)
+
+        with self._lock:
+            self._pending[kiosk_id] = {
+                "b_kiosk_id": kiosk_id,
+                "b_last_heartbeat": date.today(),
+                "b_kiosk_status": kiosk_status,
+                "b_uptime_percentage": uptime_percentage,
+            }
+            self.received += 1
+        self._ensure_thread()
+
+    def _ensure_thread(self):
+        # Started lazily so forked workers each get their own flusher
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="kiosk-heartbeat-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._wake.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Kiosk heartbeat flush failed")
+
+    def flush(self):
+        """Write buffered heartbeats now; returns the number of kiosks written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    db.session.execute(_flush_statement, list(batch.values()))
+                    invalidate_on_commit(
+                        db.session, [model_tag(Kiosk, kiosk_id) for kiosk_id in batch]
+                    )
+                    db.session.commit()
+            except Exception:
+                with self._lock:
+                    # Keep anything newer that arrived while we were writing
+                    batch.update(self._pending)
+                    self._pending = batch
+                raise
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.written += len(batch)
+                self.flushes += 1
+                self.last_flush_ms = elapsed_ms
+                self.total_flush_ms += elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            return len(batch)
+
+    def close(self):
+        """Stop the flusher and write whatever is still buffered"""
+        self._wake.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.interval + 5)
+        try:
+            self.flush()
+        except Exception:
+            self.app.logger.exception(
+                "Kiosk heartbeats lost on shutdown: %d kiosks", len(self._pending)
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "received": self.received,
+                "written": self.written,
+                "pending": len(self._pending),
+                "flushes": self.flushes,
+                # Heartbeats received per row actually written
+                "coalescing_ratio": (
+                    round(self.received / self.written, 2) if self.written else None
+                ),
+                "last_flush_ms": self.last_flush_ms,
+                "avg_flush_ms": (
+                    round(self.total_flush_ms / self.flushes, 3)
+                    if self.flushes
+                    else None
+                ),
+                "max_flush_ms": self.max_flush_ms,
+                "flush_interval": self.interval,
+            }
+
+
+def init_heartbeats(app):
+    app.extensions["kiosk_heartbeats"] = HeartbeatBuffer(
+        app, app.config.get("HEARTBEAT_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+    )
@@ -0,0 +1,31 @@
+# Kiosk loading profiles
+from app.models import Kiosk, KioskSession, Transaction
+from app.utils.loading import COUNT, LoadingProfile, Related
+
+RECENT_SESSIONS = 10
+RECENT_TRANSACTIONS = 20
+
+# Kiosk detail page: latest sessions and transactions, verification count
+kiosk_detail = LoadingProfile(
+    "kiosk_detail",
+    Kiosk,
+    sessions=Related(
+        limit=RECENT_SESSIONS,
+        order_by=(KioskSession.session_start.desc(), KioskSession.session_id.desc()),
+    ),
+    transactions=Related(
+        columns=(
+            "wallet_id",
+            "transaction_type",
+            "transaction_amount",
+            "transaction_status",
+            "transaction_timestamp",
+        ),
+        limit=RECENT_TRANSACTIONS,
+        order_by=(
+            Transaction.transaction_timestamp.desc(),
+            Transaction.transaction_id.desc(),
+        ),
+    ),
+    verification_logs=Related(COUNT),
+)
@@ -1 +1,72 @@
 # Kiosk routes
+from flask import request, jsonify, current_app
+from app.extensions import cache, limiter
+from app.models import db, Kiosk
+from app.utils.shared_cache import cached_read, row_tags
+from app.blueprints.kiosk_sessions.schema import KioskSessionSchema
+from app.blueprints.transactions.schema import TransactionSchema
+from .counters import UnknownKiosk
+from .heartbeats import HeartbeatError
+from .profiles import kiosk_detail
+from .schema import kiosk_schema, kiosks_schema, kiosk_detail_schema
+from . import kiosks_bp
+
+detail_sessions_schema = KioskSessionSchema(
+    many=True, only=kiosk_detail.fields("sessions")
+)
+detail_transactions_schema = TransactionSchema(
+    many=True, only=kiosk_detail.fields("transactions")
+)
+
+
+@kiosks_bp.route("/<kiosk_id>", methods=["GET"])
+def get_kiosk(kiosk_id):
+    """Get one kiosk (cached until a commit touches it)"""
+
+    def load():
+        kiosk = db.session.get(Kiosk, kiosk_id)
+        return None if kiosk is None else kiosk_schema.dump(kiosk)
+
+    data = cached_read(cache, f"kiosk:{kiosk_id}", load, tags=row_tags(Kiosk, kiosk_id))
+    if data is None:
+        return jsonify({"Error": "Kiosk not found"}), 404
+    return jsonify(data), 200
+
+
+@kiosks_bp.route("/<kiosk_id>/detail", methods=["GET"])
+def get_kiosk_detail(kiosk_id):
+    """Kiosk with its latest sessions and transactions and verification count"""
+    loaded = kiosk_detail.get(db.session, kiosk_id)
+    if loaded is None:
+        return jsonify({"Error": "Kiosk not found"}), 404
+    data = loaded.dump(
+        kiosk_detail_schema,
+        sessions=detail_sessions_schema,
+        transactions=detail_transactions_schema,
+    )
+    return jsonify(data[0]), 200
+
+
+@kiosks_bp.route("/<kiosk_id>/heartbeat", methods=["POST"])
+@limiter.exempt  # Every kiosk beats every few seconds
+def kiosk_heartbeat(kiosk_id):
+    """Accept a heartbeat; it reaches the kiosks table on the next flush
+
+    JSON body: kiosk_status, uptime_percentage
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        current_app.extensions["kiosk_heartbeats"].record(
+            kiosk_id, data.get("kiosk_status"), data.get("uptime_percentage")
+        )
+    except HeartbeatError as e:
+        return jsonify({"Error": str(e)}), 400
+    except UnknownKiosk as e:
+        return jsonify({"Error": str(e)}), 404
+    return jsonify({"accepted": True}), 202
+
+
+@kiosks_bp.route("/heartbeats/stats", methods=["GET"])
+def heartbeat_stats():
+    """Coalescing ratio and flush latency of this worker's heartbeat buffer"""
+    return jsonify(current_app.extensions["kiosk_heartbeats"].stats()), 200
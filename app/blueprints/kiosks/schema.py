@@ -1 +1,18 @@
 # Kiosk schemas
+from app.extensions import ma
+from app.models import Kiosk
+from .profiles import kiosk_detail
+
+
+class KioskSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Kiosk
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+kiosk_schema = KioskSchema()
+kiosks_schema = KioskSchema(many=True)
+# Only the columns the kiosk_detail profile loads
+kiosk_detail_schema = KioskSchema(only=kiosk_detail.fields())
@@ -0,0 +1,137 @@
+# Set-based sweeper: expire programs and move their tokens to the public pool
+from datetime import date
+from flask import current_app
+from sqlalchemy import select, update, insert, exists, literal
+from sqlalchemy.exc import IntegrityError
+from app.models import db, Program, Token, PublicPoolToken
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_BATCH_SIZE = 50000
+POOLED_STATUSES = ("EXPIRED", "SUSPENDED")  # Also the pool transfer_reason
+MAX_RETRIES = 20  # Conflicting attempts at one batch before giving up
+
+
+class SweepError(ValueError):
+    """Raised for bad sweep parameters (respond with 400)"""
+
+
+def expire_programs(today):
+    """Mark ACTIVE programs past their deadline EXPIRED; returns the count"""
+    result = db.session.execute(
+        update(Program)
+        .where(Program.program_status == "ACTIVE")
+        .where(Program.expiration_deadline < today)
+        .values(program_status="EXPIRED")
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def _batch_filter(program_id, batch_size):
+    """ACTIVE tokens of the program up to the batch_size-th token_id
+
+    The boundary is found with one index-only lookup on
+    (program_id, claim_status), so the batch itself never leaves the
+    database.
+    """
+    criteria = [Token.program_id == program_id, Token.claim_status == "ACTIVE"]
+    boundary = db.session.execute(
+        select(Token.token_id)
+        .where(*criteria)
+        .order_by(Token.token_id)
+        .offset(batch_size - 1)
+        .limit(1)
+    ).scalar()
+    if boundary is not None:
+        criteria.append(Token.token_id <= boundary)
+    return criteria
+
+
+def _move_batch(program_id, reason, today, batch_size):
+    """Move one bounded batch of tokens to the pool; returns tokens moved"""
+    criteria = _batch_filter(program_id, batch_size)
+    already_pooled = exists().where(PublicPoolToken.token_id == Token.token_id)
+    db.session.execute(
+        insert(PublicPoolToken).from_select(
+            [
+                PublicPoolToken.token_id,
+                PublicPoolToken.token_amount,
+                PublicPoolToken.area_code,
+                PublicPoolToken.pool_entry_date,
+                PublicPoolToken.claim_status,
+                PublicPoolToken.original_program_id,
+                PublicPoolToken.transfer_reason,
+            ],
+            select(
+                Token.token_id,
+                Token.token_amount,
+                Token.area_code,
+                literal(today),
+                literal("AVAILABLE"),
+                Token.program_id,
+                literal(reason),
+            ).where(*criteria, ~already_pooled),
+        )
+    )
+    moved = db.session.execute(
+        update(Token)
+        .where(*criteria)
+        .values(claim_status="TRANSFERRED_TO_POOL")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return moved
+
+
+def sweep_expired_programs(today=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Expire overdue programs and pool the ACTIVE tokens of every
+    EXPIRED/SUSPENDED program
+
+    Each batch is an INSERT ... SELECT into public_pool_tokens plus a bulk
+    claim_status update over the same key range, committed together. Tokens
+    already in the pool are skipped and only ACTIVE tokens are selected, so
+    an interrupted or repeated sweep picks up exactly where it stopped.
+    A batch that still breaks a constraint after MAX_RETRIES attempts
+    re-raises the IntegrityError.
+    """
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise SweepError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+    today = today or date.today()
+    summary = {"programs_expired": expire_programs(today), "programs": {}}
+
+    programs = db.session.execute(
+        select(Program.hashed_program_id, Program.program_status)
+        .where(Program.program_status.in_(POOLED_STATUSES))
+        .where(
+            exists().where(
+                Token.program_id == Program.hashed_program_id,
+                Token.claim_status == "ACTIVE",
+            )
+        )
+    ).all()
+    for program_id, reason in programs:
+        moved, retries = 0, 0
+        while True:
+            try:
+                batch = _move_batch(program_id, reason, today, batch_size)
+            except IntegrityError:
+                # A concurrent sweep pooled part of this batch first
+                db.session.rollback()
+                retries += 1
+                if retries >= MAX_RETRIES:
+                    current_app.logger.exception(
+                        "Pool sweep of program %s gave up after %d conflicts",
+                        program_id,
+                        retries,
+                    )
+                    raise
+                continue
+            retries = 0
+            moved += batch
+            if batch < batch_size:
+                break
+        summary["programs"][program_id] = moved
+
+    summary["tokens_moved"] = sum(summary["programs"].values())
+    return summary
@@ -0,0 +1,206 @@
+# Bulk token issuance for a program
+import uuid
+from datetime import date, datetime, timezone
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from app.extensions import cache
+from app.models import db, Client, Program, Token, Wallet
+from app.blueprints.wallets.ledger import new_transaction, apply_transactions, to_amount
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+PROGRESS_TIMEOUT = 24 * 60 * 60  # Seconds a finished run stays visible
+
+# Token and transaction ids are derived from (program, client), so a re-run
+# recreates exactly the same ids and skips the rows that already exist
+ISSUANCE_NAMESPACE = uuid.UUID("6f1c5d0e-5b7e-4c52-9a43-2f0b1c9e7a10")
+
+
+class IssuanceError(ValueError):
+    """Raised for issuance requests that cannot run (respond with 400)"""
+
+
+def issued_token_id(program_id, client_id):
+    return str(uuid.uuid5(ISSUANCE_NAMESPACE, f"token:{program_id}:{client_id}"))
+
+
+def issuance_transaction_id(token_id):
+    return str(uuid.uuid5(ISSUANCE_NAMESPACE, f"issuance:{token_id}"))
+
+
+def progress_key(program_id):
+    return f"issuance:{program_id}"
+
+
+def get_progress(program_id):
+    """Last reported progress of a program's issuance (any worker), or None"""
+    return cache.get(progress_key(program_id))
+
+
+def _report(progress):
+    progress["updated_at"] = datetime.now(timezone.utc).isoformat()
+    cache.set(progress_key(progress["program_id"]), progress, PROGRESS_TIMEOUT)
+
+
+def _client_filter(area_code, client_ids):
+    if client_ids is not None:
+        return Client.client_id.in_(client_ids)
+    return (Client.area_code == area_code) & Client.is_active.is_(True)
+
+
+def _client_chunks(criteria, chunk_size):
+    """Selected client ids in primary key order, one keyset chunk at a time"""
+    last_id = None
+    while True:
+        query = select(Client.client_id).where(criteria)
+        if last_id is not None:
+            query = query.where(Client.client_id > last_id)
+        chunk = (
+            db.session.execute(query.order_by(Client.client_id).limit(chunk_size))
+            .scalars()
+            .all()
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]
+
+
+def _issue_chunk(program_id, area_code, client_ids, token_amount, weekly_limit, today):
+    """Insert one chunk's missing tokens and credit their wallets atomically
+
+    Returns (issued, skipped, transactions) for the chunk.
+    """
+    existing = set(
+        db.session.execute(
+            select(Token.client_id).where(
+                Token.program_id == program_id,
+                Token.client_id.in_(client_ids),
+            )
+        ).scalars()
+    )
+    missing = [client_id for client_id in client_ids if client_id not in existing]
+    if not missing:
+        return 0, len(client_ids), []
+
+    wallets = {}
+    for client_id, wallet_id in db.session.execute(
+        select(Wallet.client_id, func.min(Wallet.wallet_id))
+        .where(Wallet.client_id.in_(missing))
+        .group_by(Wallet.client_id)
+    ):
+        wallets[client_id] = wallet_id
+
+    token_rows = []
+    transactions = []
+    for client_id in missing:
+        token_id = issued_token_id(program_id, client_id)
+        token_rows.append(
+            {
+                "token_id": token_id,
+                "client_id": client_id,
+                "program_id": program_id,
+                "token_amount": token_amount,
+                "weekly_limit": weekly_limit,
+                "weekly_redeemed": 0.0,
+                "area_code": area_code,
+                "claim_status": "ACTIVE",
+                "issued_at": today,
+            }
+        )
+        if client_id in wallets:
+            transaction = new_transaction(
+                wallets[client_id], token_amount, "ISSUANCE", token_id=token_id
+            )
+            transaction.transaction_id = issuance_transaction_id(token_id)
+            transactions.append(transaction)
+
+    def insert_tokens(session):
+        session.execute(Token.__table__.insert(), token_rows)
+
+    applied = apply_transactions(transactions, before_commit=insert_tokens)
+    return len(missing), len(existing), applied
+
+
+def issue_tokens(
+    program_id,
+    token_amount,
+    weekly_limit=None,
+    area_code=None,
+    client_ids=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """Issue one token per selected client, chunk by chunk
+
+    Clients are picked by client_ids, or else every active client in
+    area_code (default: the program's area). Each chunk inserts its tokens
+    with one multi-row INSERT and credits the matching ISSUANCE transactions
+    through the wallet ledger in the same commit, so an interrupted run
+    leaves whole chunks behind and simply continues when called again.
+    Progress is published after every chunk (see get_progress).
+    """
+    if not 1 <= chunk_size <= MAX_CHUNK_SIZE:
+        raise IssuanceError(f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}")
+    program = db.session.get(Program, program_id)
+    if program is None:
+        raise IssuanceError("Program not found")
+    today = date.today()
+    if program.program_status != "ACTIVE" or program.expiration_deadline < today:
+        raise IssuanceError("Program is not active")
+    token_amount = float(to_amount(token_amount))
+    weekly_limit = (
+        token_amount if weekly_limit is None else float(to_amount(weekly_limit))
+    )
+    if client_ids is not None:
+        client_ids = sorted(set(client_ids))
+        if not client_ids:
+            raise IssuanceError("client_ids must not be empty")
+    criteria = _client_filter(area_code or program.area_code, client_ids)
+    # Kept as a plain value: the ledger commits per chunk, expiring program
+    program_area = program.area_code
+
+    progress = {
+        "program_id": program_id,
+        "status": "RUNNING",
+        "selected": db.session.execute(
+            select(func.count()).select_from(Client).where(criteria)
+        ).scalar_one(),
+        "processed": 0,
+        "issued": 0,
+        "skipped": 0,
+        "transactions_completed": 0,
+        "transactions_failed": 0,
+        "without_wallet": 0,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+    _report(progress)
+
+    try:
+        for chunk in _client_chunks(criteria, chunk_size):
+            try:
+                issued, skipped, applied = _issue_chunk(
+                    program_id, program_area, chunk, token_amount, weekly_limit, today
+                )
+            except IntegrityError:
+                # A concurrent run took part of this chunk; redo it without them
+                db.session.rollback()
+                issued, skipped, applied = _issue_chunk(
+                    program_id, program_area, chunk, token_amount, weekly_limit, today
+                )
+            completed = sum(t.transaction_status == "COMPLETED" for t in applied)
+            progress["processed"] += len(chunk)
+            progress["issued"] += issued
+            progress["skipped"] += skipped
+            progress["transactions_completed"] += completed
+            progress["transactions_failed"] += len(applied) - completed
+            progress["without_wallet"] += issued - len(applied)
+            _report(progress)
+    except Exception:
+        db.session.rollback()
+        progress["status"] = "FAILED"
+        _report(progress)
+        raise
+
+    progress["status"] = "COMPLETED"
+    _report(progress)
+    return progress
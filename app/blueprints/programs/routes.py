@@ -1 +1,85 @@
 # Program routes
+from flask import request, jsonify
+from app.extensions import cache
+from app.models import db, Program
+from app.utils.shared_cache import cached_read, row_tags
+from app.blueprints.wallets.ledger import LedgerError, LedgerConflict
+from .issuance import issue_tokens, get_progress, IssuanceError, DEFAULT_CHUNK_SIZE
+from .expiry import (
+    sweep_expired_programs,
+    SweepError,
+    DEFAULT_BATCH_SIZE as SWEEP_BATCH_SIZE,
+)
+from .schema import program_schema, programs_schema
+from . import programs_bp
+
+
+@programs_bp.route("/<program_id>", methods=["GET"])
+def get_program(program_id):
+    """Get one program (cached until a commit touches it)"""
+
+    def load():
+        program = db.session.get(Program, program_id)
+        return None if program is None else program_schema.dump(program)
+
+    data = cached_read(
+        cache,
+        f"program:{program_id}",
+        load,
+        tags=row_tags(Program, program_id),
+    )
+    if data is None:
+        return jsonify({"Error": "Program not found"}), 404
+    return jsonify(data), 200
+
+
+@programs_bp.route("/<program_id>/issue-tokens", methods=["POST"])
+def issue_program_tokens(program_id):
+    """Issue one token per beneficiary of a program (idempotent, resumable)
+
+    JSON body: token_amount, weekly_limit, chunk_size and either client_ids
+    or area_code (default: the program's area_code)
+    """
+    data = request.get_json(silent=True) or {}
+    client_ids = data.get("client_ids")
+    if client_ids is not None and not isinstance(client_ids, list):
+        return jsonify({"Error": "client_ids must be a list"}), 400
+    try:
+        progress = issue_tokens(
+            program_id,
+            data.get("token_amount"),
+            weekly_limit=data.get("weekly_limit"),
+            area_code=data.get("area_code"),
+            client_ids=client_ids,
+            chunk_size=int(data.get("chunk_size", DEFAULT_CHUNK_SIZE)),
+        )
+    except (IssuanceError, LedgerError, TypeError, ValueError) as e:
+        return jsonify({"Error": str(e)}), 400
+    except LedgerConflict as e:
+        return jsonify({"Error": str(e)}), 409
+    return jsonify(progress), 201
+
+
+@programs_bp.route("/<program_id>/issuance", methods=["GET"])
+def get_issuance_progress(program_id):
+    """Progress of the program's latest bulk issuance"""
+    progress = get_progress(program_id)
+    if progress is None:
+        return jsonify({"Error": "No issuance found for this program"}), 404
+    return jsonify(progress), 200
+
+
+@programs_bp.route("/sweep-expired", methods=["POST"])
+def sweep_expired():
+    """Expire overdue programs and move their ACTIVE tokens to the public pool
+
+    JSON body: batch_size (tokens committed per batch). Safe to re-run.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        summary = sweep_expired_programs(
+            batch_size=int(data.get("batch_size", SWEEP_BATCH_SIZE))
+        )
+    except (SweepError, TypeError, ValueError) as e:
+        return jsonify({"Error": str(e)}), 400
+    return jsonify(summary), 200
@@ -1 +1,15 @@
 # Program schemas
+from app.extensions import ma
+from app.models import Program
+
+
+class ProgramSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Program
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+program_schema = ProgramSchema()
+programs_schema = ProgramSchema(many=True)
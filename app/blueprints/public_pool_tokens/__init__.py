@@ -1,3 +1,5 @@
 from flask import Blueprint
 
 public_pool_tokens_bp = Blueprint("public_pool_tokens", __name__)
+
+from . import routes
@@ -0,0 +1,197 @@
+# Public pool claim allocator for many concurrent kiosks
+import os
+import random
+import string
+import threading
+from collections import deque
+from datetime import date
+from sqlalchemy import select, update
+from app.models import db, PublicPoolToken
+
+REFILL_SIZE = 64  # Candidate token ids fetched per area refill
+SKIP_LOCKED_DIALECTS = ("postgresql", "mysql", "mariadb", "oracle")
+# Digit sets a token id suffix is read in, smallest first, each in sort order
+ID_ALPHABETS = (string.digits, "0123456789abcdef", "".join(map(chr, range(32, 127))))
+
+
+class ClaimError(ValueError):
+    """Raised for bad claim requests (respond with 400)"""
+
+
+class PoolExhausted(LookupError):
+    """Raised when an area has no AVAILABLE tokens left (respond with 404)"""
+
+
+def _claim_statement(token_id, user_id, kiosk_id, today):
+    """Claim one token only if it is still AVAILABLE"""
+    return (
+        update(PublicPoolToken)
+        .where(PublicPoolToken.token_id == token_id)
+        .where(PublicPoolToken.claim_status == "AVAILABLE")
+        .values(
+            claim_status="CLAIMED",
+            claimed_by_user_id=user_id,
+            claimed_at=today,
+            claiming_kiosk=kiosk_id,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _random_between(low, high):
+    """A random string from low to high, spread evenly over the ids between
+
+    Characters after the common prefix are read as digits in the smallest
+    alphabet holding them (decimal, hex, printable ASCII), so sequential and
+    uuid ids both get an even spread of starting points.
+    """
+    prefix = os.path.commonprefix([low, high])
+    low, high = low[len(prefix) :], high[len(prefix) :]
+    alphabet = next(
+        (chars for chars in ID_ALPHABETS if set(low + high) <= set(chars)), None
+    )
+    if alphabet is None:
+        return prefix + low
+    width, base = max(len(low), len(high)), len(alphabet)
+
+    def value(text):
+        number = 0
+        for char in text.ljust(width, alphabet[0]):
+            number = number * base + alphabet.index(char)
+        return number
+
+    number = random.randint(value(low), value(high))
+    chars = []
+    for _ in range(width):
+        number, digit = divmod(number, base)
+        chars.append(alphabet[digit])
+    return prefix + "".join(reversed(chars))
+
+
+class ClaimAllocator:
+    """Hands out distinct AVAILABLE pool tokens to concurrent claimants
+
+    On databases with SKIP LOCKED each claim locks the first row nobody else
+    holds, so claimants never queue behind each other. Elsewhere (SQLite)
+    every process keeps a per-area free list of candidate ids, refilled in
+    batches by walking the available ids from a keyset cursor that starts at
+    a random point, so different processes start on different rows. Either
+    way the final UPDATE is conditional on the row still being AVAILABLE, so
+    a token is never claimed twice; a candidate someone else took is just skipped (counted in conflicts).
+    """
+
+    def __init__(self, refill_size=REFILL_SIZE):
+        self.refill_size = refill_size
+        self._free = {}  # area_code -> deque of candidate token ids
+        self._cursors = {}  # area_code -> last token id handed to the free list
+        self._lock = threading.Lock()
+        self.conflicts = 0
+
+    def claim(self, area_code, user_id, kiosk_id=None, session=None):
+        """Claim a token in the area for user_id; returns its token_id"""
+        if not area_code or not user_id:
+            raise ClaimError("area_code and user_id are required")
+        session = session or db.session
+        if session.get_bind().dialect.name in SKIP_LOCKED_DIALECTS:
+            return self._claim_skip_locked(session, area_code, user_id, kiosk_id)
+        return self._claim_free_list(session, area_code, user_id, kiosk_id)
+
+    def _claim_skip_locked(self, session, area_code, user_id, kiosk_id):
+        token_id = session.execute(
+            select(PublicPoolToken.token_id)
+            .where(PublicPoolToken.area_code == area_code)
+            .where(PublicPoolToken.claim_status == "AVAILABLE")
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar()
+        if token_id is None:
+            session.rollback()
+            raise PoolExhausted(f"No available pool tokens in {area_code}")
+        session.execute(_claim_statement(token_id, user_id, kiosk_id, date.today()))
+        session.commit()
+        return token_id
+
+    def _claim_free_list(self, session, area_code, user_id, kiosk_id):
+        today = date.today()
+        while True:
+            token_id = self._next_candidate(session, area_code)
+            if token_id is None:
+                raise PoolExhausted(f"No available pool tokens in {area_code}")
+            claimed = session.execute(
+                _claim_statement(token_id, user_id, kiosk_id, today)
+            ).rowcount
+            session.commit()
+            if claimed:
+                return token_id
+            with self._lock:
+                self.conflicts += 1
+
+    def _next_candidate(self, session, area_code):
+        with self._lock:
+            free = self._free.get(area_code)
+            if free:
+                return free.popleft()
+        candidates = self._refill(session, area_code)
+        with self._lock:
+            free = self._free.setdefault(area_code, deque())
+            free.extend(candidates)
+            return free.popleft() if free else None
+
+    def _refill(self, session, area_code):
+        """Up to refill_size AVAILABLE ids after the area's cursor, wrapping"""
+        available = (
+            select(PublicPoolToken.token_id)
+            .where(PublicPoolToken.area_code == area_code)
+            .where(PublicPoolToken.claim_status == "AVAILABLE")
+            .order_by(PublicPoolToken.token_id)
+        )
+        with self._lock:
+            cursor = self._cursors.get(area_code)
+        if cursor is None:
+            # A random start keeps processes refilling at once on different rows
+            low = session.execute(available.limit(1)).scalar()
+            if low is None:
+                session.commit()
+                return []
+            high = session.execute(
+                available.order_by(None)
+                .order_by(PublicPoolToken.token_id.desc())
+                .limit(1)
+            ).scalar()
+            cursor = _random_between(low, high)
+        candidates = (
+            session.execute(
+                available.where(PublicPoolToken.token_id > cursor).limit(
+                    self.refill_size
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if len(candidates) < self.refill_size:
+            # Wrap around to the start of the id space
+            wrap = available.where(PublicPoolToken.token_id <= cursor).limit(
+                self.refill_size - len(candidates)
+            )
+            candidates += session.execute(wrap).scalars().all()
+        session.commit()  # End the read so writers are not held up
+        with self._lock:
+            if candidates:
+                self._cursors[area_code] = candidates[-1]
+            else:
+                self._cursors.pop(area_code, None)
+        random.shuffle(candidates)
+        return candidates
+
+    def forget(self, area_code=None):
+        """Drop cached candidates (all areas by default)"""
+        with self._lock:
+            if area_code is None:
+                self._free.clear()
+                self._cursors.clear()
+            else:
+                self._free.pop(area_code, None)
+                self._cursors.pop(area_code, None)
+
+
+pool_allocator = ClaimAllocator()
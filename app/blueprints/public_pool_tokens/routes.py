@@ -1 +1,25 @@
 # PublicPoolToken routes
+from flask import request, jsonify
+from app.models import db, PublicPoolToken
+from .claims import pool_allocator, ClaimError, PoolExhausted
+from .schema import public_pool_token_schema, public_pool_tokens_schema
+from . import public_pool_tokens_bp
+
+
+@public_pool_tokens_bp.route("/claim", methods=["POST"])
+def claim_pool_token():
+    """Claim an AVAILABLE pool token in an area for a user
+
+    JSON body: area_code, user_id, kiosk_id
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        token_id = pool_allocator.claim(
+            data.get("area_code"), data.get("user_id"), data.get("kiosk_id")
+        )
+    except ClaimError as e:
+        return jsonify({"Error": str(e)}), 400
+    except PoolExhausted as e:
+        return jsonify({"Error": str(e)}), 404
+    token = db.session.get(PublicPoolToken, token_id)
+    return jsonify(public_pool_token_schema.dump(token)), 201
@@ -1 +1,15 @@
 # PublicPoolToken schemas
+from app.extensions import ma
+from app.models import PublicPoolToken
+
+
+class PublicPoolTokenSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = PublicPoolToken
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+public_pool_token_schema = PublicPoolTokenSchema()
+public_pool_tokens_schema = PublicPoolTokenSchema(many=True)
@@ -1,3 +1,5 @@
 from flask import Blueprint
 
 system_config_bp = Blueprint("system_config", __name__)
+
+from . import routes
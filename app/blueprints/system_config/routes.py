@@ -1 +1,62 @@
 # SystemConfig routes
+from flask import jsonify
+from sqlalchemy import select
+from app.extensions import cache
+from app.models import db, SystemConfig
+from app.utils.config_store import system_settings
+from app.utils.shared_cache import cached_read, model_tag, row_tags
+from .schema import system_config_schema, system_configs_schema
+from . import system_config_bp
+
+
+@system_config_bp.route("/", methods=["GET"])
+def get_system_configs():
+    """List every config entry (cached until any entry changes)"""
+
+    def load():
+        configs = db.session.execute(
+            select(SystemConfig).order_by(SystemConfig.config_key)
+        ).scalars()
+        return system_configs_schema.dump(configs)
+
+    data = cached_read(cache, "system_configs", load, tags=[model_tag(SystemConfig)])
+    return jsonify({"system_configs": data}), 200
+
+
+@system_config_bp.route("/snapshot", methods=["GET"])
+def get_config_snapshot():
+    """Typed values the app is running with (sensitive values hidden)"""
+    snapshot = system_settings.snapshot()
+    return (
+        jsonify(
+            {
+                "version": snapshot.version,
+                "values": {
+                    key: "***" if key in snapshot.sensitive else value
+                    for key, value in snapshot.values.items()
+                },
+                "pending_restart": sorted(snapshot.pending_restart),
+                "errors": dict(snapshot.errors),
+            }
+        ),
+        200,
+    )
+
+
+@system_config_bp.route("/<config_key>", methods=["GET"])
+def get_system_config(config_key):
+    """Get one config entry (cached until a commit touches it)"""
+
+    def load():
+        config = db.session.get(SystemConfig, config_key)
+        return None if config is None else system_config_schema.dump(config)
+
+    data = cached_read(
+        cache,
+        f"system_config:{config_key}",
+        load,
+        tags=row_tags(SystemConfig, config_key),
+    )
+    if data is None:
+        return jsonify({"Error": "Config not found"}), 404
+    return jsonify(data), 200
@@ -1 +1,15 @@
 # SystemConfig schemas
+from app.extensions import ma
+from app.models import SystemConfig
+
+
+class SystemConfigSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = SystemConfig
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+system_config_schema = SystemConfigSchema()
+system_configs_schema = SystemConfigSchema(many=True)
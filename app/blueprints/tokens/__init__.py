@@ -1,3 +1,5 @@
 from flask import Blueprint
 
 tokens_bp = Blueprint("tokens", __name__)
+
+from . import routes
@@ -1 +1,52 @@
 # Token routes
+from .schema import tokens_schema
+from flask import request, jsonify
+from sqlalchemy import select
+from app.models import Token
+from app.utils.pagination import paginate, page_args, CursorError
+from app.utils.serializer import fast_dump
+from . import tokens_bp
+
+
+@tokens_bp.route("/", methods=["GET"])
+def get_tokens():
+    """List tokens, most recently issued first (keyset paginated)
+
+    Query params: cursor, page_size, area_code, claim_status, program_id, client_id
+    """
+    query = select(Token)
+    area_code = request.args.get("area_code")
+    if area_code:
+        query = query.where(Token.area_code == area_code)
+    claim_status = request.args.get("claim_status")
+    if claim_status:
+        query = query.where(Token.claim_status == claim_status)
+    program_id = request.args.get("program_id")
+    if program_id:
+        query = query.where(Token.program_id == program_id)
+    client_id = request.args.get("client_id")
+    if client_id:
+        query = query.where(Token.client_id == client_id)
+
+    try:
+        cursor, page_size = page_args()
+        page = paginate(
+            query,
+            Token.issued_at,
+            Token.token_id,
+            cursor=cursor,
+            page_size=page_size,
+        )
+    except CursorError as e:
+        return jsonify({"Error": str(e)}), 400
+
+    return (
+        jsonify(
+            {
+                "tokens": fast_dump(tokens_schema, page.items),
+                "next_cursor": page.next_cursor,
+                "page_size": page.page_size,
+            }
+        ),
+        200,
+    )
@@ -1 +1,15 @@
 # Token schemas
+from app.extensions import ma
+from app.models import Token
+
+
+class TokenSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Token
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+token_schema = TokenSchema()
+tokens_schema = TokenSchema(many=True)
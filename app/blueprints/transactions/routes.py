@@ -1 +1,80 @@
 # Transaction routes
+from .schema import transactions_schema
+from flask import request, jsonify
+from sqlalchemy import select
+from app.models import Transaction, Kiosk
+from app.utils.pagination import paginate, page_args, CursorError
+from app.utils.serializer import fast_dump, schema_columns
+from app.utils.export import export_args, export_response, ExportError
+from . import transactions_bp
+
+
+@transactions_bp.route("/", methods=["GET"])
+def get_transactions():
+    """List transactions, newest first (keyset paginated)
+
+    Query params: cursor, page_size, wallet_id, kiosk_id, transaction_status
+    """
+    query = select(Transaction)
+    wallet_id = request.args.get("wallet_id")
+    if wallet_id:
+        query = query.where(Transaction.wallet_id == wallet_id)
+    kiosk_id = request.args.get("kiosk_id")
+    if kiosk_id:
+        query = query.where(Transaction.kiosk_id == kiosk_id)
+    transaction_status = request.args.get("transaction_status")
+    if transaction_status:
+        query = query.where(Transaction.transaction_status == transaction_status)
+
+    try:
+        cursor, page_size = page_args()
+        page = paginate(
+            query,
+            Transaction.transaction_timestamp,
+            Transaction.transaction_id,
+            cursor=cursor,
+            page_size=page_size,
+        )
+    except CursorError as e:
+        return jsonify({"Error": str(e)}), 400
+
+    return (
+        jsonify(
+            {
+                "transactions": fast_dump(transactions_schema, page.items),
+                "next_cursor": page.next_cursor,
+                "page_size": page.page_size,
+            }
+        ),
+        200,
+    )
+
+
+@transactions_bp.route("/export", methods=["GET"])
+def export_transactions():
+    """Stream the full transactions history as NDJSON or CSV
+
+    Query params: format (ndjson|csv), start_date, end_date (inclusive ISO
+    dates) and area_code (area of the kiosk it happened at)
+    """
+    try:
+        options = export_args()
+    except ExportError as e:
+        return jsonify({"Error": str(e)}), 400
+
+    query = select(*schema_columns(transactions_schema, Transaction))
+    if options["start_date"]:
+        query = query.where(Transaction.transaction_timestamp >= options["start_date"])
+    if options["end_date"]:
+        query = query.where(Transaction.transaction_timestamp <= options["end_date"])
+    if options["area_code"]:
+        query = query.join(Kiosk, Kiosk.kiosk_id == Transaction.kiosk_id).where(
+            Kiosk.area_code == options["area_code"]
+        )
+    query = query.order_by(
+        Transaction.transaction_timestamp, Transaction.transaction_id
+    )
+
+    return export_response(
+        query, transactions_schema, options["export_format"], "transactions"
+    )
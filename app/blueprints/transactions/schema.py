@@ -1 +1,15 @@
 # Transaction schemas
+from app.extensions import ma
+from app.models import Transaction
+
+
+class TransactionSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Transaction
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+transaction_schema = TransactionSchema()
+transactions_schema = TransactionSchema(many=True)
@@ -1,3 +1,11 @@
 from flask import Blueprint
+from app.utils.rollups import register_rollup
 
 verification_bp = Blueprint("verification", __name__)
+
+from . import routes
+from .rollup import verification_rollup
+
+verification_bp.record_once(
+    lambda state: register_rollup(state.app, verification_rollup)
+)
@@ -0,0 +1,16 @@
+# Dashboard rollup of verification_logs
+from sqlalchemy import Integer, cast, func
+from app.models import VerificationLog, VerificationRollup
+from app.utils.rollups import Rollup
+
+verification_rollup = Rollup(
+    "verification_logs",
+    VerificationRollup,
+    VerificationLog.log_id,
+    keys={
+        "day": VerificationLog.verification_timestamp,
+        "verification_status": VerificationLog.verification_status,
+        "kiosk_id": VerificationLog.kiosk_id,
+    },
+    measures={"attempts": cast(func.count(), Integer)},
+)
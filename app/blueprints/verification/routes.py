@@ -1 +1,159 @@
 # VerificationLog routes
+from .schema import verification_logs_schema, verification_log_row_schema
+from datetime import date
+from flask import request, jsonify, current_app
+from marshmallow import ValidationError
+from sqlalchemy import select
+from app.models import VerificationLog, Kiosk
+from app.utils.pagination import paginate, page_args, CursorError
+from app.utils.serializer import fast_dump, schema_columns
+from app.utils.export import export_args, export_response, ExportError
+from app.extensions import limiter
+from app.utils.audit_log import AuditError
+from app.utils.rollups import dashboard, RollupError
+from .rollup import verification_rollup
+from .fraud import score_verifications, FraudScanError
+from . import verification_bp
+
+
+@verification_bp.route("/", methods=["GET"])
+def get_verification_logs():
+    """List verification logs, newest first (keyset paginated)
+
+    Query params: cursor, page_size, kiosk_id, client_id, verification_status
+    """
+    query = select(VerificationLog)
+    kiosk_id = request.args.get("kiosk_id")
+    if kiosk_id:
+        query = query.where(VerificationLog.kiosk_id == kiosk_id)
+    client_id = request.args.get("client_id")
+    if client_id:
+        query = query.where(VerificationLog.client_id == client_id)
+    verification_status = request.args.get("verification_status")
+    if verification_status:
+        query = query.where(VerificationLog.verification_status == verification_status)
+
+    try:
+        cursor, page_size = page_args()
+        page = paginate(
+            query,
+            VerificationLog.verification_timestamp,
+            VerificationLog.log_id,
+            cursor=cursor,
+            page_size=page_size,
+        )
+    except CursorError as e:
+        return jsonify({"Error": str(e)}), 400
+
+    return (
+        jsonify(
+            {
+                "verification_logs": fast_dump(verification_logs_schema, page.items),
+                "next_cursor": page.next_cursor,
+                "page_size": page.page_size,
+            }
+        ),
+        200,
+    )
+
+
+@verification_bp.route("/", methods=["POST"])
+@limiter.exempt  # Kiosk audit path; every attempt must be recorded
+def create_verification_log():
+    """Record a verification attempt through the audit writer
+
+    The row is written asynchronously; responds 202 once it is queued (or
+    spilled to disk). verification_timestamp defaults to today.
+    """
+    data = request.get_json(silent=True) or {}
+    data.setdefault("verification_timestamp", date.today().isoformat())
+    try:
+        row = verification_log_row_schema.load(data)
+        current_app.extensions["audit_writer"].write(VerificationLog, row)
+    except ValidationError as e:
+        return jsonify({"Error": e.messages}), 400
+    except AuditError as e:
+        return jsonify({"Error": str(e)}), 400
+    return jsonify({"status": "accepted"}), 202
+
+
+@verification_bp.route("/audit-writer", methods=["GET"])
+def get_audit_writer_stats():
+    """Queue depth, batches, spills and rejects of this worker's audit writer"""
+    return jsonify(current_app.extensions["audit_writer"].stats()), 200
+
+
+@verification_bp.route("/dashboard", methods=["GET"])
+def get_verification_dashboard():
+    """Verification attempts per day, status and kiosk from the rollup
+
+    Query params: start_date, end_date, verification_status, kiosk_id.
+    as_of_id is the last log_id absorbed into the rollup; newer logs are
+    aggregated live and included.
+    """
+    current_app.extensions["rollups"].ensure_running()
+    try:
+        result = dashboard(verification_rollup, ("verification_status", "kiosk_id"))
+    except RollupError as e:
+        return jsonify({"Error": str(e)}), 400
+    return jsonify(result), 200
+
+
+@verification_bp.route("/fraud-scan", methods=["POST"])
+def run_fraud_scan():
+    """Score clients and kiosks over the verification history
+
+    JSON body: since (ISO date, default all history), emit (raise
+    FRAUD_DETECTION alerts, default true), limit (findings returned,
+    default 100).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        since = date.fromisoformat(data["since"]) if data.get("since") else None
+        limit = int(data.get("limit", 100))
+    except (TypeError, ValueError):
+        return jsonify({"Error": "since must be an ISO date, limit an integer"}), 400
+    if limit < 0:
+        return jsonify({"Error": "limit must not be negative"}), 400
+    emit = data.get("emit", True)
+    if not isinstance(emit, bool):
+        return jsonify({"Error": "emit must be true or false"}), 400
+    try:
+        summary = score_verifications(since=since, emit=emit, limit=limit)
+    except FraudScanError as e:
+        return jsonify({"Error": str(e)}), 400
+    return jsonify(summary), 200
+
+
+@verification_bp.route("/export", methods=["GET"])
+def export_verification_logs():
+    """Stream the full verification logs history as NDJSON or CSV
+
+    Query params: format (ndjson|csv), start_date, end_date (inclusive ISO
+    dates) and area_code (area of the kiosk it happened at)
+    """
+    try:
+        options = export_args()
+    except ExportError as e:
+        return jsonify({"Error": str(e)}), 400
+
+    query = select(*schema_columns(verification_logs_schema, VerificationLog))
+    if options["start_date"]:
+        query = query.where(
+            VerificationLog.verification_timestamp >= options["start_date"]
+        )
+    if options["end_date"]:
+        query = query.where(
+            VerificationLog.verification_timestamp <= options["end_date"]
+        )
+    if options["area_code"]:
+        query = query.join(Kiosk, Kiosk.kiosk_id == VerificationLog.kiosk_id).where(
+            Kiosk.area_code == options["area_code"]
+        )
+    query = query.order_by(
+        VerificationLog.verification_timestamp, VerificationLog.log_id
+    )
+
+    return export_response(
+        query, verification_logs_schema, options["export_format"], "verification_logs"
+    )
@@ -1 +1,19 @@
 # VerificationLog schemas
+from app.extensions import ma
+from app.models import VerificationLog
+
+
+class VerificationLogSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = VerificationLog
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+verification_log_schema = VerificationLogSchema()
+verification_logs_schema = VerificationLogSchema(many=True)
+# Plain column dicts for the audit writer (ids come from the database)
+verification_log_row_schema = VerificationLogSchema(
+    load_instance=False, exclude=("log_id",)
+)
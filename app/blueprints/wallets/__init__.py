@@ -1,3 +1,5 @@
 from flask import Blueprint
 
 wallets_bp = Blueprint("wallets", __name__)
+
+from . import routes
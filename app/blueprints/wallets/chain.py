@@ -0,0 +1,286 @@
+# Incremental verification of the per-wallet transaction hash chains
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from sqlalchemy import create_engine, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import db, Wallet, Transaction, WalletChainCheckpoint
+from .ledger import chain_hash
+
+DEFAULT_CHUNK_SIZE = 500  # Wallets per worker task
+INLINE_WALLETS = 2000  # Fewer wallets than this are not worth a process pool
+
+checkpoints = WalletChainCheckpoint.__table__
+_engines = {}  # Per worker process, by database URL
+
+
+class ChainError(ValueError):
+    """Raised for bad chain verification requests (respond with 400)"""
+
+
+def wallets_to_verify(session, wallet_ids=None, full=False):
+    """Wallets whose chain head moved since their checkpoint (or all, full)
+
+    Wallets with a BROKEN checkpoint are always included, so a break keeps
+    being reported until it is repaired.
+    """
+    head = func.coalesce(Wallet.last_transaction_hash, Wallet.wallet_hash)
+    query = select(Wallet.wallet_id).outerjoin(
+        WalletChainCheckpoint, WalletChainCheckpoint.wallet_id == Wallet.wallet_id
+    )
+    if wallet_ids is not None:
+        query = query.where(Wallet.wallet_id.in_(wallet_ids))
+    if not full:
+        query = query.where(
+            or_(
+                WalletChainCheckpoint.wallet_id.is_(None),
+                WalletChainCheckpoint.last_hash != head,
+                WalletChainCheckpoint.chain_status != "OK",
+            )
+        )
+    return session.execute(query.order_by(Wallet.wallet_id)).scalars().all()
+
+
+def _candidates(session, wallet_ids, since):
+    """COMPLETED transactions per wallet, completed on or after since[wallet]"""
+    columns = Transaction.__table__.c
+    by_day = {}
+    for wallet_id in wallet_ids:
+        by_day.setdefault(since.get(wallet_id), []).append(wallet_id)
+    rows = {wallet_id: [] for wallet_id in wallet_ids}
+    for day, wallets in by_day.items():
+        query = select(
+            columns.transaction_id,
+            columns.wallet_id,
+            columns.transaction_type,
+            columns.transaction_amount,
+            columns.transaction_timestamp,
+            columns.completed_at,
+            columns.transaction_hash,
+            columns.previous_hash,
+        ).where(
+            columns.wallet_id.in_(wallets), columns.transaction_status == "COMPLETED"
+        )
+        if day is not None:
+            query = query.where(columns.completed_at >= day)
+        for row in session.execute(query):
+            rows[row.wallet_id].append(row)
+    return rows
+
+
+def _walk(start, head, rows):
+    """Follow the chain from start to head; returns (last row, verified, breaks)
+
+    Rows already verified by earlier runs (on the checkpoint's day) are
+    recognised by walking backwards from start. Verification stops at the
+    first broken link, so the checkpoint never moves past it.
+    """
+    by_hash = {row.transaction_hash: row for row in rows}
+    known = set()
+    link = start
+    while link in by_hash and link not in known:
+        known.add(link)
+        link = by_hash[link].previous_hash
+
+    following = {}
+    for row in rows:
+        if row.previous_hash is not None and row.transaction_hash not in known:
+            following.setdefault(row.previous_hash, []).append(row)
+
+    last, verified, breaks = None, 0, []
+    current = start
+    while current != head:
+        links = following.pop(current, [])
+        if not links:
+            breaks.append(
+                {
+                    "kind": "missing_link",
+                    "transaction_id": last.transaction_id if last else None,
+                    "detail": f"Nothing follows {current}; wallet head is {head}",
+                }
+            )
+            return last, verified, breaks
+        if len(links) > 1:
+            breaks.append(
+                {
+                    "kind": "fork",
+                    "transaction_id": links[0].transaction_id,
+                    "detail": "Transactions "
+                    + ", ".join(sorted(row.transaction_id for row in links))
+                    + f" all follow {current}",
+                }
+            )
+            return last, verified, breaks
+        row = links[0]
+        if chain_hash(row.previous_hash, row) != row.transaction_hash:
+            breaks.append(
+                {
+                    "kind": "hash_mismatch",
+                    "transaction_id": row.transaction_id,
+                    "detail": "Stored hash does not match the transaction's contents",
+                }
+            )
+            return last, verified, breaks
+        current, last = row.transaction_hash, row
+        verified += 1
+
+    # Chained transactions the walk never reached are not part of the chain
+    for row in sorted(
+        (row for links in following.values() for row in links),
+        key=lambda row: row.transaction_id,
+    ):
+        breaks.append(
+            {
+                "kind": "orphan",
+                "transaction_id": row.transaction_id,
+                "detail": f"Links to {row.previous_hash}, which is not on the chain",
+            }
+        )
+    return last, verified, breaks
+
+
+def verify_wallets(session, wallet_ids, full=False):
+    """Verify the given wallets from their checkpoints and move them forward
+
+    Returns one report per wallet. full ignores the stored checkpoints and
+    re-verifies every wallet from its first transaction.
+    """
+    if not wallet_ids:
+        return []
+    wallets = {
+        row.wallet_id: row
+        for row in session.execute(
+            select(
+                Wallet.wallet_id, Wallet.wallet_hash, Wallet.last_transaction_hash
+            ).where(Wallet.wallet_id.in_(wallet_ids))
+        )
+    }
+    stored = {
+        row.wallet_id: row
+        for row in session.execute(
+            select(checkpoints).where(checkpoints.c.wallet_id.in_(list(wallets)))
+        )
+    }
+    saved = {} if full else stored
+    candidates = _candidates(
+        session,
+        list(wallets),
+        {wallet_id: saved[wallet_id].last_day for wallet_id in saved},
+    )
+
+    now = datetime.now().replace(microsecond=0)
+    reports, inserts = [], []
+    for wallet_id, wallet in wallets.items():
+        checkpoint = saved.get(wallet_id)
+        start = checkpoint.last_hash if checkpoint else wallet.wallet_hash
+        head = wallet.last_transaction_hash or wallet.wallet_hash
+        rows = candidates[wallet_id]
+        last, verified, breaks = _walk(start, head, rows)
+        values = {
+            "last_transaction_id": (
+                last.transaction_id
+                if last
+                else checkpoint.last_transaction_id if checkpoint else None
+            ),
+            "last_hash": last.transaction_hash if last else start,
+            "last_day": (
+                last.completed_at
+                if last
+                else checkpoint.last_day if checkpoint else None
+            ),
+            "verified_count": (checkpoint.verified_count if checkpoint else 0)
+            + verified,
+            "chain_status": "BROKEN" if breaks else "OK",
+            "broken_reason": breaks[0]["detail"][:500] if breaks else None,
+            "verified_at": now,
+        }
+        if wallet_id in stored:
+            # Skipped if a concurrent run already moved this checkpoint
+            session.execute(
+                update(checkpoints)
+                .where(checkpoints.c.wallet_id == wallet_id)
+                .where(checkpoints.c.last_hash == stored[wallet_id].last_hash)
+                .values(values)
+            )
+        else:
+            inserts.append(dict(values, wallet_id=wallet_id))
+        reports.append(
+            {
+                "wallet_id": wallet_id,
+                "verified": verified,
+                "unchained": sum(row.previous_hash is None for row in rows),
+                "chain_status": values["chain_status"],
+                "breaks": breaks,
+            }
+        )
+    if inserts:
+        session.execute(insert(checkpoints), inserts)
+    try:
+        session.commit()
+    except IntegrityError:
+        # A concurrent run created some of these checkpoints; it wins
+        session.rollback()
+    return reports
+
+
+def _verify_chunk(url, wallet_ids, full):
+    """Process pool task: verify one chunk of wallets on its own connection"""
+    engine = _engines.get(url)
+    if engine is None:
+        engine = _engines[url] = create_engine(url)
+    with Session(engine) as session:
+        return verify_wallets(session, wallet_ids, full)
+
+
+def verify_chains(
+    session=None,
+    wallet_ids=None,
+    full=False,
+    processes=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """Verify every wallet whose chain moved since its checkpoint
+
+    Wallets are split into chunks of chunk_size. With enough of them the
+    chunks run on a pool of processes (default: one per CPU), each with
+    its own database connection; hashing is CPU bound, so threads would
+    not help. Only transactions completed since each wallet's checkpoint
+    day are read. Returns a summary with every broken link found.
+    """
+    if not 1 <= chunk_size <= 10 * DEFAULT_CHUNK_SIZE:
+        raise ChainError(f"chunk_size must be between 1 and {10 * DEFAULT_CHUNK_SIZE}")
+    if processes is not None and processes < 1:
+        raise ChainError("processes must be at least 1")
+    session = session or db.session
+    started = time.perf_counter()
+    pending = wallets_to_verify(session, wallet_ids, full)
+    session.commit()
+    chunks = [
+        pending[start : start + chunk_size]
+        for start in range(0, len(pending), chunk_size)
+    ]
+    processes = min(processes or os.cpu_count() or 1, len(chunks) or 1)
+    if processes == 1 or len(pending) < INLINE_WALLETS:
+        results = [verify_wallets(session, chunk, full) for chunk in chunks]
+    else:
+        url = session.get_bind().url.render_as_string(hide_password=False)
+        # Spawned, not forked: the parent runs background threads
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(processes, mp_context=context) as pool:
+            results = list(pool.map(_verify_chunk, repeat(url), chunks, repeat(full)))
+
+    reports = [report for result in results for report in result]
+    broken = [report for report in reports if report["breaks"]]
+    return {
+        "wallets_checked": len(reports),
+        "transactions_verified": sum(report["verified"] for report in reports),
+        "unchained_transactions": sum(report["unchained"] for report in reports),
+        "wallets_broken": len(broken),
+        "broken": broken,
+        "processes": processes if len(pending) >= INLINE_WALLETS else 1,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
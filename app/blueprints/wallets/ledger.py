@@ -0,0 +1,336 @@
+# Wallet ledger: exact, contention-safe balance updates
+import hashlib
+import random
+import time
+import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import OperationalError
+from app.models import db, Wallet, Transaction
+
+CENT = Decimal("0.01")
+CREDIT_TYPES = ("ISSUANCE",)
+DEBIT_TYPES = ("REDEMPTION", "TRANSFER")
+MAX_RETRIES = 20  # Optimistic retries before giving up on a hot wallet
+RETRY_BACKOFF = 0.005  # Seconds; doubled per retry (jittered), capped below
+MAX_BACKOFF = 0.25
+DEFAULT_BATCH_SIZE = 500
+
+
+class LedgerError(ValueError):
+    """Raised for transactions the ledger refuses (respond with 400)"""
+
+
+class LedgerConflict(RuntimeError):
+    """Raised when a wallet kept changing under us for MAX_RETRIES attempts"""
+
+
+def to_amount(value):
+    """Exact positive amount rounded to cents"""
+    try:
+        amount = Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        raise LedgerError(f"Invalid amount {value!r}")
+    if amount <= 0:
+        raise LedgerError("Amount must be positive")
+    return amount
+
+
+def chain_hash(previous_hash, transaction):
+    """Hash linking a transaction to the wallet's previous one"""
+    payload = "|".join(
+        [
+            previous_hash or "",
+            transaction.transaction_id,
+            transaction.wallet_id,
+            transaction.transaction_type,
+            f"{Decimal(transaction.transaction_amount):.2f}",
+            transaction.transaction_timestamp.isoformat(),
+        ]
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def new_transaction(
+    wallet_id,
+    amount,
+    transaction_type,
+    token_id=None,
+    kiosk_id=None,
+    transaction_location=None,
+):
+    """PENDING Transaction for the ledger to apply"""
+    if transaction_type not in CREDIT_TYPES + DEBIT_TYPES:
+        raise LedgerError(f"Unknown transaction_type {transaction_type!r}")
+    return Transaction(
+        transaction_id=str(uuid.uuid4()),
+        wallet_id=wallet_id,
+        token_id=token_id,
+        kiosk_id=kiosk_id,
+        transaction_type=transaction_type,
+        transaction_amount=to_amount(amount),
+        transaction_status="PENDING",
+        transaction_hash="",  # Set when applied
+        transaction_location=transaction_location,
+        transaction_timestamp=date.today(),
+        retry_count=0,
+    )
+
+
+def _backoff(attempt):
+    # Full jitter keeps retrying writers from colliding again in lockstep
+    time.sleep(random.uniform(0, min(MAX_BACKOFF, RETRY_BACKOFF * 2**attempt)))
+
+
+class _WalletState:
+    """Working copy of one wallet's ledger columns while a batch is planned"""
+
+    def __init__(self, row):
+        self.wallet_id = row.wallet_id
+        self.version = row.version
+        self.status = row.wallet_status
+        self.balance = Decimal(row.wallet_balance or 0).quantize(CENT)
+        self.received = row.total_tokens_received or 0  # Counts, not amounts
+        self.redeemed = row.total_tokens_redeemed or 0
+        self.last_hash = row.last_transaction_hash or row.wallet_hash
+        self.changed = False
+
+    def apply(self, transaction):
+        """Apply in memory; returns the failure reason or None"""
+        try:
+            amount = to_amount(transaction.transaction_amount)
+        except LedgerError as e:
+            return str(e)
+        if self.status != "ACTIVE":
+            return f"Wallet is {self.status}"
+        if transaction.transaction_type in DEBIT_TYPES:
+            if self.balance < amount:
+                return "Insufficient balance"
+            self.balance -= amount
+            self.redeemed += 1
+        else:
+            self.balance += amount
+            self.received += 1
+
+        transaction.transaction_amount = amount
+        transaction.previous_hash = self.last_hash
+        transaction.transaction_hash = chain_hash(self.last_hash, transaction)
+        self.last_hash = transaction.transaction_hash
+        self.changed = True
+        return None
+
+
+def _plan(session, transactions):
+    """Apply transactions in order against fresh wallet rows (in memory)
+
+    Transactions whose wallet does not exist are left untouched; callers
+    must not write them (see missing_wallets).
+    """
+    wallet_ids = {transaction.wallet_id for transaction in transactions}
+    rows = session.execute(
+        select(
+            Wallet.wallet_id,
+            Wallet.version,
+            Wallet.wallet_status,
+            Wallet.wallet_balance,
+            Wallet.total_tokens_received,
+            Wallet.total_tokens_redeemed,
+            Wallet.last_transaction_hash,
+            Wallet.wallet_hash,
+        ).where(Wallet.wallet_id.in_(wallet_ids))
+    ).all()
+    wallets = {row.wallet_id: _WalletState(row) for row in rows}
+
+    today = date.today()
+    for transaction in transactions:
+        wallet = wallets.get(transaction.wallet_id)
+        if wallet is None:
+            continue
+        reason = wallet.apply(transaction)
+        if reason is None:
+            transaction.transaction_status = "COMPLETED"
+            transaction.completed_at = today
+            transaction.failure_reason = None
+        else:
+            transaction.transaction_status = "FAILED"
+            transaction.failure_reason = reason
+            if not transaction.transaction_hash:
+                transaction.transaction_hash = chain_hash(None, transaction)
+    return wallets, today
+
+
+def missing_wallets(transactions, wallets):
+    """Transactions planned against a wallet that does not exist"""
+    return [t for t in transactions if t.wallet_id not in wallets]
+
+
+def _write_wallets(session, wallets, today):
+    """Conditional UPDATE per changed wallet; False if any lost the race"""
+    for wallet in wallets.values():
+        if not wallet.changed:
+            continue
+        result = session.execute(
+            update(Wallet)
+            .where(Wallet.wallet_id == wallet.wallet_id)
+            .where(Wallet.version == wallet.version)
+            .values(
+                wallet_balance=wallet.balance,
+                total_tokens_received=wallet.received,
+                total_tokens_redeemed=wallet.redeemed,
+                last_transaction_hash=wallet.last_hash,
+                last_activity=today,
+                version=wallet.version + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+    return True
+
+
+def _snapshot(transaction):
+    return {
+        "transaction_id": transaction.transaction_id,
+        "wallet_id": transaction.wallet_id,
+        "token_id": transaction.token_id,
+        "kiosk_id": transaction.kiosk_id,
+        "transaction_type": transaction.transaction_type,
+        "transaction_amount": transaction.transaction_amount,
+        "transaction_location": transaction.transaction_location,
+        "transaction_timestamp": transaction.transaction_timestamp,
+        "retry_count": transaction.retry_count or 0,
+    }
+
+
+def apply_transactions(
+    transactions, session=None, max_retries=MAX_RETRIES, before_commit=None
+):
+    """Apply new transactions atomically, in order
+
+    Each wallet is read, the whole list is applied in memory (debits that
+    would overdraw are marked FAILED) and every touched wallet is written
+    with `UPDATE ... WHERE version = <read version>`. If another writer got
+    there first (or the database reports a lock timeout or deadlock),
+    everything is rolled back and replanned against the new balances, so no
+    update is ever lost. Commits on success; before_commit(session), if
+    given, runs inside the same database transaction on every attempt.
+    Raises LedgerError, writing nothing, if a wallet does not exist.
+    """
+    session = session or db.session
+    originals = [_snapshot(transaction) for transaction in transactions]
+    for attempt in range(max_retries):
+        batch = [Transaction(**original) for original in originals]
+        for transaction in batch:
+            transaction.transaction_hash = ""
+            transaction.retry_count += attempt
+        try:
+            wallets, today = _plan(session, batch)
+            missing = missing_wallets(batch, wallets)
+            if missing:
+                session.rollback()
+                raise LedgerError(f"Wallet not found: {missing[0].wallet_id}")
+            if _write_wallets(session, wallets, today):
+                if before_commit is not None:
+                    before_commit(session)
+                session.add_all(batch)
+                session.commit()
+                return batch
+        except OperationalError:
+            pass  # Lock timeout or deadlock: same as losing the race
+        session.rollback()
+        _backoff(attempt)
+    raise LedgerConflict(f"Wallets still contended after {max_retries} attempts")
+
+
+def apply_transaction(transaction, session=None, max_retries=MAX_RETRIES):
+    """Apply a single new transaction (see apply_transactions)"""
+    return apply_transactions([transaction], session, max_retries)[0]
+
+
+def apply_pending(session=None, batch_size=DEFAULT_BATCH_SIZE, max_retries=MAX_RETRIES):
+    """Apply queued PENDING transactions, oldest first, one batch per commit
+
+    The status change is conditional on the row still being PENDING, so two
+    workers draining the queue at once never apply a transaction twice.
+    PENDING rows whose wallet does not exist (possible only without a
+    foreign key, e.g. SQLite) are deleted rather than kept as FAILED, and
+    counted as failed. Returns (completed, failed) counts.
+    """
+    session = session or db.session
+    columns = Transaction.__table__.c
+    completed = failed = 0
+    while True:
+        for attempt in range(max_retries):
+            rows = session.execute(
+                select(*columns)
+                .where(columns.transaction_status == "PENDING")
+                .order_by(columns.transaction_timestamp, columns.transaction_id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return completed, failed
+
+            # Transient copies: planned in memory, written with Core below
+            batch = [Transaction(**row._asdict()) for row in rows]
+            for transaction in batch:
+                transaction.transaction_hash = ""
+            try:
+                wallets, today = _plan(session, batch)
+                orphans = missing_wallets(batch, wallets)
+                planned = [t for t in batch if t.wallet_id in wallets]
+                if (
+                    _discard(session, orphans)
+                    and _claim(session, planned)
+                    and _write_wallets(session, wallets, today)
+                ):
+                    session.commit()
+                    completed += sum(
+                        t.transaction_status == "COMPLETED" for t in planned
+                    )
+                    failed += len(orphans)
+                    failed += sum(t.transaction_status == "FAILED" for t in planned)
+                    break
+            except OperationalError:
+                pass  # Lock timeout or deadlock: same as losing the race
+            session.rollback()
+            _backoff(attempt)
+        else:
+            raise LedgerConflict(
+                f"Pending queue still contended after {max_retries} attempts"
+            )
+
+
+def _discard(session, orphans):
+    """Delete still-PENDING orphan rows; False if one was taken"""
+    if not orphans:
+        return True
+    result = session.execute(
+        delete(Transaction)
+        .where(Transaction.transaction_id.in_([t.transaction_id for t in orphans]))
+        .where(Transaction.transaction_status == "PENDING")
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(orphans)
+
+
+def _claim(session, batch):
+    """Write planned outcomes to still-PENDING rows; False if one was taken"""
+    for transaction in batch:
+        result = session.execute(
+            update(Transaction)
+            .where(Transaction.transaction_id == transaction.transaction_id)
+            .where(Transaction.transaction_status == "PENDING")
+            .values(
+                transaction_status=transaction.transaction_status,
+                transaction_amount=transaction.transaction_amount,
+                transaction_hash=transaction.transaction_hash,
+                previous_hash=transaction.previous_hash,
+                completed_at=transaction.completed_at,
+                failure_reason=transaction.failure_reason,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+    return True
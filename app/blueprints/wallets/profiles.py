@@ -0,0 +1,28 @@
+# Wallet loading profiles
+from app.models import Transaction, Wallet
+from app.utils.loading import JOINED, LoadingProfile, Related
+
+RECENT_TRANSACTIONS = 20
+
+# Wallet detail page: owner's name and the latest transactions
+wallet_detail = LoadingProfile(
+    "wallet_detail",
+    Wallet,
+    client=Related(JOINED, columns=("client_name", "area_code")),
+    transactions=Related(
+        columns=(
+            "token_id",
+            "kiosk_id",
+            "transaction_type",
+            "transaction_amount",
+            "transaction_status",
+            "transaction_timestamp",
+            "completed_at",
+        ),
+        limit=RECENT_TRANSACTIONS,
+        order_by=(
+            Transaction.transaction_timestamp.desc(),
+            Transaction.transaction_id.desc(),
+        ),
+    ),
+)
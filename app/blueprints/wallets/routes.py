@@ -1 +1,154 @@
 # Wallet routes
+from flask import request, jsonify, current_app
+from sqlalchemy import select
+from app.models import db, Wallet, WalletChainCheckpoint
+from app.blueprints.kiosks.counters import UnknownKiosk
+from app.blueprints.client.schema import ClientSchema
+from app.blueprints.transactions.schema import transaction_schema, TransactionSchema
+from .ledger import (
+    new_transaction,
+    apply_transaction,
+    apply_pending,
+    LedgerError,
+    LedgerConflict,
+    DEFAULT_BATCH_SIZE,
+)
+from .chain import (
+    verify_chains,
+    ChainError,
+    DEFAULT_CHUNK_SIZE as DEFAULT_CHAIN_CHUNK_SIZE,
+)
+from .profiles import wallet_detail
+from .schema import (
+    wallet_schema,
+    wallets_schema,
+    chain_checkpoint_schema,
+    wallet_detail_schema,
+)
+from . import wallets_bp
+
+detail_client_schema = ClientSchema(only=wallet_detail.fields("client"))
+detail_transactions_schema = TransactionSchema(
+    many=True, only=wallet_detail.fields("transactions")
+)
+
+
+@wallets_bp.route("/<wallet_id>", methods=["GET"])
+def get_wallet(wallet_id):
+    wallet = db.session.get(Wallet, wallet_id)
+    if wallet is None:
+        return jsonify({"Error": "Wallet not found"}), 404
+    return jsonify(wallet_schema.dump(wallet)), 200
+
+
+@wallets_bp.route("/<wallet_id>/detail", methods=["GET"])
+def get_wallet_detail(wallet_id):
+    """Wallet with its owner's name and latest transactions"""
+    loaded = wallet_detail.get(db.session, wallet_id)
+    if loaded is None:
+        return jsonify({"Error": "Wallet not found"}), 404
+    data = loaded.dump(
+        wallet_detail_schema,
+        client=detail_client_schema,
+        transactions=detail_transactions_schema,
+    )
+    return jsonify(data[0]), 200
+
+
+@wallets_bp.route("/<wallet_id>/transactions", methods=["POST"])
+def create_wallet_transaction(wallet_id):
+    """Apply a redemption, transfer or issuance to a wallet through the ledger
+
+    JSON body: transaction_type, amount, token_id, kiosk_id,
+    transaction_location. Responds 201 with the COMPLETED transaction, 422
+    with the FAILED one (e.g. insufficient balance), 404 for an unknown
+    wallet, 429 when the kiosk has reached its daily transaction limit.
+    """
+    data = request.get_json(silent=True) or {}
+    if (
+        db.session.scalar(select(Wallet.wallet_id).where(Wallet.wallet_id == wallet_id))
+        is None
+    ):
+        return jsonify({"Error": "Wallet not found"}), 404
+    kiosk_id = data.get("kiosk_id")
+    counters = current_app.extensions["kiosk_counters"]
+    if kiosk_id:
+        try:
+            if not counters.acquire(kiosk_id):
+                return jsonify({"Error": "Kiosk daily transaction limit reached"}), 429
+        except UnknownKiosk as e:
+            return jsonify({"Error": str(e)}), 404
+    try:
+        transaction = new_transaction(
+            wallet_id,
+            data.get("amount"),
+            data.get("transaction_type"),
+            token_id=data.get("token_id"),
+            kiosk_id=kiosk_id,
+            transaction_location=data.get("transaction_location"),
+        )
+        transaction = apply_transaction(transaction)
+    except (LedgerError, LedgerConflict) as e:
+        if kiosk_id:
+            counters.release(kiosk_id)
+        return jsonify({"Error": str(e)}), 400 if isinstance(e, LedgerError) else 409
+
+    completed = transaction.transaction_status == "COMPLETED"
+    if kiosk_id and not completed:
+        counters.release(kiosk_id)
+    status = 201 if completed else 422
+    return jsonify(transaction_schema.dump(transaction)), status
+
+
+@wallets_bp.route("/apply-pending", methods=["POST"])
+def apply_pending_transactions():
+    """Drain the PENDING transaction queue in batches"""
+    data = request.get_json(silent=True) or {}
+    try:
+        batch_size = int(data.get("batch_size", DEFAULT_BATCH_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({"Error": "batch_size must be an integer"}), 400
+    try:
+        completed, failed = apply_pending(batch_size=batch_size)
+    except LedgerConflict as e:
+        return jsonify({"Error": str(e)}), 409
+    return jsonify({"completed": completed, "failed": failed}), 200
+
+
+@wallets_bp.route("/verify-chains", methods=["POST"])
+def verify_wallet_chains():
+    """Verify transaction hash chains from each wallet's checkpoint
+
+    JSON body: wallet_ids (default every wallet with new transactions),
+    full (ignore checkpoints, default false), processes, chunk_size.
+    Responds with counts and every broken link found.
+    """
+    data = request.get_json(silent=True) or {}
+    wallet_ids = data.get("wallet_ids")
+    if wallet_ids is not None and not isinstance(wallet_ids, list):
+        return jsonify({"Error": "wallet_ids must be a list"}), 400
+    try:
+        processes = data.get("processes")
+        processes = None if processes is None else int(processes)
+        chunk_size = int(data.get("chunk_size", DEFAULT_CHAIN_CHUNK_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({"Error": "processes and chunk_size must be integers"}), 400
+    try:
+        summary = verify_chains(
+            wallet_ids=wallet_ids,
+            full=bool(data.get("full", False)),
+            processes=processes,
+            chunk_size=chunk_size,
+        )
+    except ChainError as e:
+        return jsonify({"Error": str(e)}), 400
+    return jsonify(summary), 200
+
+
+@wallets_bp.route("/<wallet_id>/chain", methods=["GET"])
+def get_wallet_chain(wallet_id):
+    """The wallet's chain checkpoint: how far it was verified and the outcome"""
+    checkpoint = db.session.get(WalletChainCheckpoint, wallet_id)
+    if checkpoint is None:
+        return jsonify({"Error": "Wallet chain not verified yet"}), 404
+    return jsonify(chain_checkpoint_schema.dump(checkpoint)), 200
@@ -1 +1,26 @@
 # Wallet schemas
+from app.extensions import ma
+from app.models import Wallet, WalletChainCheckpoint
+from .profiles import wallet_detail
+
+
+class WalletSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Wallet
+        include_fk = True
+        load_instance = True
+
+
+class WalletChainCheckpointSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = WalletChainCheckpoint
+        include_fk = True
+        load_instance = True
+
+
+# Creating instances of the schemas
+wallet_schema = WalletSchema()
+wallets_schema = WalletSchema(many=True)
+chain_checkpoint_schema = WalletChainCheckpointSchema()
+# Only the columns the wallet_detail profile loads
+wallet_detail_schema = WalletSchema(only=wallet_detail.fields())
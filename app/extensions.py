@@ -9,4 +9,4 @@ ma = Marshmallow()
 limiter = Limiter(
     key_func=get_remote_address, default_limits=["200 per day", "50 per hour"]
 )
-cache = Cache(config={"CACHE_TYPE": "SimpleCache"})
+cache = Cache()  # Backend comes from CACHE_TYPE in config.py
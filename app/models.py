@@ -1,14 +1,32 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, Integer, Date, ForeignKey, Float
+from sqlalchemy import (
+    String,
+    Integer,
+    Date,
+    DateTime,
+    ForeignKey,
+    Float,
+    Index,
+    Numeric,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from datetime import date
+from datetime import date, datetime
+from decimal import Decimal
+from app.utils.metrics import TimedQueuePool
+from app.utils.replicas import RoutingSession
 
 
 class Base(DeclarativeBase):
     pass
 
 
-db = SQLAlchemy(model_class=Base)
+# Reads may go to a replica (app.utils.replicas); pools report checkout
+# waits to /metrics (in-memory SQLite keeps its StaticPool)
+db = SQLAlchemy(
+    model_class=Base,
+    session_options={"class_": RoutingSession},
+    engine_options={"poolclass": TimedQueuePool},
+)
 
 
 # Define models for LandLink System
@@ -103,6 +121,10 @@ class Client(db.Model):
     """Clients or beneficiaries of the system"""
 
     __tablename__ = "clients"
+    __table_args__ = (
+        # List order (keyset pagination of client summaries)
+        Index("ix_clients_created_at_id", "created_at", "client_id"),
+    )
 
     client_id: Mapped[str] = mapped_column(String(255), primary_key=True)
     client_name: Mapped[str] = mapped_column(String(200), nullable=False)
@@ -150,6 +172,15 @@ class Token(db.Model):
     """Individual compensation tokens tied to users and programs"""
 
     __tablename__ = "tokens"
+    __table_args__ = (
+        # Area dashboards and kiosk lookups: area_code alone or with claim_status
+        Index("ix_tokens_area_code_claim_status", "area_code", "claim_status"),
+        # Per-program status sweeps (expiry, suspension) and Program.tokens
+        Index("ix_tokens_program_id_claim_status", "program_id", "claim_status"),
+        Index("ix_tokens_client_id", "client_id"),  # Client.tokens
+        # List order (keyset pagination)
+        Index("ix_tokens_issued_at_id", "issued_at", "token_id"),
+    )
 
     token_id: Mapped[str] = mapped_column(String(255), primary_key=True)
 
@@ -184,6 +215,21 @@ class VerificationLog(db.Model):
     """Audit trail for all kiosk verification attempts"""
 
     __tablename__ = "verification_logs"
+    __table_args__ = (
+        # Kiosk and client history in time order
+        Index(
+            "ix_verification_logs_kiosk_id_timestamp",
+            "kiosk_id",
+            "verification_timestamp",
+        ),
+        Index(
+            "ix_verification_logs_client_id_timestamp",
+            "client_id",
+            "verification_timestamp",
+        ),
+        # List order (keyset pagination) and date-range audits
+        Index("ix_verification_logs_timestamp_id", "verification_timestamp", "log_id"),
+    )
 
     log_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -230,6 +276,12 @@ class PublicPoolToken(db.Model):
     """Tokens transferred to public pool from expired/suspended programs"""
 
     __tablename__ = "public_pool_tokens"
+    __table_args__ = (
+        # Pool claims: available tokens in an area
+        Index(
+            "ix_public_pool_tokens_area_code_claim_status", "area_code", "claim_status"
+        ),
+    )
 
     token_id: Mapped[str] = mapped_column(String(255), primary_key=True)
 
@@ -328,11 +380,15 @@ class Wallet(db.Model):
     # Client association
     client_id: Mapped[str] = mapped_column(String(255), ForeignKey("clients.client_id"))
 
-    # Wallet details
-    wallet_balance: Mapped[float] = mapped_column(Float(precision=2), default=0.0)
+    # Wallet details (exact amount, only changed through the ledger)
+    wallet_balance: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=0)
+    # Counts of COMPLETED credits and debits
     total_tokens_received: Mapped[int] = mapped_column(Integer, default=0)
     total_tokens_redeemed: Mapped[int] = mapped_column(Integer, default=0)
 
+    # Optimistic lock: bumped on every balance change
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
     # Security
     wallet_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     last_transaction_hash: Mapped[str] = mapped_column(String(255), nullable=True)
@@ -350,11 +406,23 @@ class Wallet(db.Model):
     client = relationship("Client", back_populates="wallets")
     transactions = relationship("Transaction", back_populates="wallet")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class Transaction(db.Model):
     """Token redemption and transfer history"""
 
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Wallet history in time order (also serves Wallet.transactions)
+        Index(
+            "ix_transactions_wallet_id_timestamp", "wallet_id", "transaction_timestamp"
+        ),
+        # List order (keyset pagination)
+        Index(
+            "ix_transactions_timestamp_id", "transaction_timestamp", "transaction_id"
+        ),
+    )
 
     transaction_id: Mapped[str] = mapped_column(String(255), primary_key=True)
 
@@ -371,15 +439,16 @@ class Transaction(db.Model):
     transaction_type: Mapped[str] = mapped_column(
         String(50), nullable=False
     )  # REDEMPTION, TRANSFER, ISSUANCE
-    transaction_amount: Mapped[float] = mapped_column(
-        Float(precision=2), nullable=False
-    )
+    transaction_amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
     transaction_status: Mapped[str] = mapped_column(
         String(20), default="PENDING"
     )  # PENDING, COMPLETED, FAILED
 
     # Security and verification
     transaction_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    previous_hash: Mapped[str] = mapped_column(
+        String(255), nullable=True
+    )  # Wallet hash chain link, set when the ledger applies it
     verification_signature: Mapped[str] = mapped_column(String(255), nullable=True)
 
     # Location and timing
@@ -397,6 +466,29 @@ class Transaction(db.Model):
     kiosk = relationship("Kiosk", back_populates="transactions")
 
 
+class WalletChainCheckpoint(db.Model):
+    """How far each wallet's transaction hash chain has been verified"""
+
+    __tablename__ = "wallet_chain_checkpoints"
+
+    wallet_id: Mapped[str] = mapped_column(
+        String(255), ForeignKey("wallets.wallet_id"), primary_key=True
+    )
+
+    # Last verified link: the chain continues from last_hash
+    last_transaction_id: Mapped[str] = mapped_column(String(255), nullable=True)
+    last_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    last_day: Mapped[date] = mapped_column(
+        Date, nullable=True
+    )  # transaction_timestamp of the last verified transaction
+    verified_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    # Outcome of the latest run
+    chain_status: Mapped[str] = mapped_column(String(20), default="OK")  # OK, BROKEN
+    broken_reason: Mapped[str] = mapped_column(String(500), nullable=True)
+    verified_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
 class Kiosk(db.Model):
     """Physical kiosk location and status data"""
 
@@ -425,6 +517,9 @@ class Kiosk(db.Model):
     # Capacity and usage
     daily_transaction_limit: Mapped[int] = mapped_column(Integer, default=100)
     current_daily_count: Mapped[int] = mapped_column(Integer, default=0)
+    daily_count_date: Mapped[date] = mapped_column(
+        Date, nullable=True
+    )  # Day current_daily_count belongs to (reset in bulk at rollover)
     total_transactions_processed: Mapped[int] = mapped_column(Integer, default=0)
 
     # Maintenance
@@ -499,6 +594,14 @@ class AlertLog(db.Model):
     """System alerts and notifications"""
 
     __tablename__ = "alert_logs"
+    __table_args__ = (
+        # Triage queues: open/acknowledged alerts by severity
+        Index("ix_alert_logs_status_severity", "alert_status", "alert_severity"),
+        # List order (keyset pagination)
+        Index("ix_alert_logs_timestamp_id", "alert_timestamp", "alert_id"),
+        # Folding repeats into their aggregated alert
+        Index("ix_alert_logs_aggregation_id", "aggregation_id", unique=True),
+    )
 
     alert_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -553,6 +656,13 @@ class AlertLog(db.Model):
     escalated_to: Mapped[str] = mapped_column(String(255), nullable=True)
     escalation_reason: Mapped[str] = mapped_column(String(500), nullable=True)
 
+    # Storm aggregation: near-identical alerts in a window share one row
+    alert_fingerprint: Mapped[str] = mapped_column(String(40), nullable=True)
+    aggregation_id: Mapped[str] = mapped_column(String(32), nullable=True)
+    occurrence_count: Mapped[int] = mapped_column(Integer, default=1)
+    first_seen_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    last_seen_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
 
 class SystemConfig(db.Model):
     """Global system settings and configuration"""
@@ -598,3 +708,54 @@ class SystemConfig(db.Model):
         String(20), default="ALL"
     )  # ALL, DEV, TEST, PROD
     version_introduced: Mapped[str] = mapped_column(String(20), nullable=True)
+
+
+class AlertRollup(db.Model):
+    """Alert counts per day, severity, status and area (maintained from alert_logs)"""
+
+    __tablename__ = "alert_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    alert_severity: Mapped[str] = mapped_column(String(20), primary_key=True)
+    alert_status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    area_code: Mapped[str] = mapped_column(
+        String(50), primary_key=True
+    )  # "" for alerts without an area
+
+    alert_rows: Mapped[int] = mapped_column(Integer, default=0)
+    occurrences: Mapped[int] = mapped_column(Integer, default=0)  # occurrence_count
+
+
+class VerificationRollup(db.Model):
+    """Verification attempts per day, status and kiosk (from verification_logs)"""
+
+    __tablename__ = "verification_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    verification_status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    kiosk_id: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class RollupWatermark(db.Model):
+    """Highest source id each rollup table has absorbed"""
+
+    __tablename__ = "rollup_watermarks"
+
+    rollup_name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    last_id: Mapped[int] = mapped_column(Integer, default=0)
+    # Highest id seen by the previous refresh; ids up to it are committed
+    seen_max_id: Mapped[int] = mapped_column(Integer, default=0)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+
+class ReplicaHeartbeat(db.Model):
+    """Bumped on the primary and read back from each replica to measure lag"""
+
+    __tablename__ = "replica_heartbeats"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    beat_at: Mapped[float] = mapped_column(
+        Float(precision=53), nullable=False
+    )  # Unix time in seconds
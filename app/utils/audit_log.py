@@ -0,0 +1,348 @@
+# Asynchronous batched writer for append-only audit tables
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, insert
+from sqlalchemy.exc import DBAPIError, OperationalError
+from app.models import db
+
+DEFAULT_QUEUE_SIZE = 10000  # Rows buffered in memory before backpressure
+DEFAULT_BATCH_SIZE = 500  # Rows per multi-row INSERT
+DEFAULT_FLUSH_INTERVAL = 1.0  # Seconds the writer waits to fill a batch
+DEFAULT_PUT_TIMEOUT = 0.05  # Seconds a request blocks on a full queue
+REPLAY_INTERVAL = 30.0  # Seconds between looks for spilled rows
+DEFAULT_SPILL_DIR = "audit_spill"  # Relative paths are under the instance folder
+REJECTED_FILE = "rejected.jsonl"
+
+
+class AuditError(ValueError):
+    """Raised for audit rows the table cannot hold (respond with 400)"""
+
+
+def _encode(row):
+    return {
+        key: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for key, value in row.items()
+    }
+
+
+def _decode(table, row):
+    """Undo _encode using the table's column types"""
+    decoded = dict(row)
+    for key, value in row.items():
+        if value is None:
+            continue
+        column_type = table.c[key].type
+        if isinstance(column_type, DateTime):
+            decoded[key] = datetime.fromisoformat(value)
+        elif isinstance(column_type, Date):
+            decoded[key] = date.fromisoformat(value)
+    return decoded
+
+
+class AuditWriter:
+    """Moves audit inserts off the request path
+
+    write() validates the row and puts it on a bounded queue; a background
+    thread drains the queue in multi-row INSERTs, one commit per batch.
+    When the queue is full the caller blocks for at most put_timeout and
+    then appends the row to a local spill file instead, so a slow database
+    costs requests a file append, never a lost row. Batches the database
+    refuses with an OperationalError are spilled too. Only the process
+    appending to a spill file seals it (renames it to *.ready), and only
+    sealed files are replayed, by whichever process's writer next finds the
+    database healthy; the file of a dead process is sealed by any other.
+    Rows that can never be inserted (constraint errors) go to
+    rejected.jsonl. Delivery is at-least-once: a crash between a replayed
+    commit and removing its file replays that file again.
+    """
+
+    def __init__(
+        self,
+        app,
+        models=(),
+        queue_size=DEFAULT_QUEUE_SIZE,
+        batch_size=DEFAULT_BATCH_SIZE,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        put_timeout=DEFAULT_PUT_TIMEOUT,
+        spill_dir=DEFAULT_SPILL_DIR,
+    ):
+        self.app = app
+        self.tables = {model.__table__.name: model.__table__ for model in models}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spill_dir = os.path.join(app.instance_path, spill_dir)
+        self._queue = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One writer at a time
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._next_replay = 0.0
+        self.queued = 0
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.max_batch_ms = 0.0
+        atexit.register(self.close)
+
+    def write(self, model, row):
+        """Queue one row for model's table; returns immediately"""
+        table = self.tables.get(model.__table__.name)
+        if table is None:
+            raise AuditError(f"{model.__name__} is not an audit table")
+        unknown = set(row) - set(table.c.keys())
+        if unknown:
+            raise AuditError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        item = (table.name, dict(row))
+        self._ensure_thread()
+        try:
+            self._queue.put(item, timeout=self.put_timeout)
+        except queue.Full:
+            # Backpressure: the writer is behind, keep the row on disk
+            self._spill([item])
+            return
+        with self._lock:
+            self.queued += 1
+
+    def _ensure_thread(self):
+        # Started lazily so forked workers each get their own writer
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="audit-writer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take(timeout=self.flush_interval)
+            try:
+                if batch:
+                    self._write_batch(batch)
+                elif time.monotonic() >= self._next_replay:
+                    self._next_replay = time.monotonic() + REPLAY_INTERVAL
+                    self.replay()
+            except Exception:
+                self.app.logger.exception("Audit writer failed")
+
+    def _take(self, timeout=None):
+        """Up to batch_size queued rows, waiting up to timeout for the first"""
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch):
+        """Insert a batch, spilling it if the database is unavailable"""
+        started = time.perf_counter()
+        try:
+            self._insert(batch)
+            written = len(batch)
+        except OperationalError:
+            self.app.logger.warning("Audit batch of %d rows spilled", len(batch))
+            self._spill(batch)
+            return
+        except DBAPIError:
+            # Some row breaks a constraint; keep the rest of the batch
+            written = self._insert_each(batch)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.written += written
+            self.batches += 1
+            self.max_batch_ms = max(self.max_batch_ms, elapsed_ms)
+
+    def _insert(self, batch):
+        rows = {}
+        for table_name, row in batch:
+            rows.setdefault(table_name, []).append(row)
+        with self.app.app_context():
+            try:
+                for table_name, table_rows in rows.items():
+                    # Rows of one table may name different columns
+                    by_keys = {}
+                    for row in table_rows:
+                        by_keys.setdefault(frozenset(row), []).append(row)
+                    for group in by_keys.values():
+                        db.session.execute(insert(self.tables[table_name]), group)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _insert_each(self, batch):
+        """Insert row by row, setting aside the ones that fail; returns written"""
+        written = 0
+        for item in batch:
+            try:
+                self._insert([item])
+                written += 1
+            except OperationalError:
+                self._spill([item])
+            except DBAPIError:
+                self.app.logger.exception("Audit row rejected by %s", item[0])
+                self._spill([item], REJECTED_FILE)
+                with self._lock:
+                    self.rejected += 1
+        return written
+
+    def _spill(self, batch, file_name=None):
+        """Append rows to this process's spill file (fsynced)"""
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, file_name or f"spill-{os.getpid()}.jsonl")
+        lines = "".join(
+            json.dumps({"table": table_name, "row": _encode(row)}) + "\n"
+            for table_name, row in batch
+        )
+        with self._spill_lock:
+            with open(path, "a", encoding="utf-8") as spill:
+                spill.write(lines)
+                spill.flush()
+                os.fsync(spill.fileno())
+            if file_name is None:
+                self.spilled += len(batch)
+
+    def _seal(self, pid):
+        """Rename pid's spill file so nothing appends to it any more"""
+        path = os.path.join(self.spill_dir, f"spill-{pid}.jsonl")
+        sealed = os.path.join(self.spill_dir, f"spill-{pid}-{time.time_ns()}.jsonl")
+        try:
+            os.rename(path, f"{sealed}.ready")
+        except FileNotFoundError:
+            pass  # Nothing spilled, or another process sealed it first
+
+    def replay(self):
+        """Insert spilled rows from every process; returns rows replayed"""
+        with self._spill_lock:
+            self._seal(os.getpid())
+        for path in glob.glob(os.path.join(self.spill_dir, "spill-*.jsonl")):
+            # Left open by a process that died before sealing it
+            owner = int(os.path.basename(path)[len("spill-") : -len(".jsonl")])
+            if owner != os.getpid() and not _alive(owner):
+                self._seal(owner)
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, "*.ready"))):
+            # Renaming claims the file, so concurrent replays never share one
+            claimed = f"{path}.{os.getpid()}.replaying"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            replayed += self._replay_file(claimed)
+        # Files claimed by a process that died mid-replay
+        for claimed in glob.glob(os.path.join(self.spill_dir, "*.replaying")):
+            owner = int(claimed.rsplit(".", 2)[1])
+            if owner == os.getpid() or _alive(owner):
+                continue
+            # Claim it under our pid first so only one survivor replays it
+            path = claimed.rsplit(".", 2)[0]
+            taken = f"{path}.{os.getpid()}.replaying"
+            try:
+                os.rename(claimed, taken)
+            except FileNotFoundError:
+                continue
+            replayed += self._replay_file(taken)
+        with self._lock:
+            self.replayed += replayed
+        return replayed
+
+    def _replay_file(self, path):
+        with open(path, encoding="utf-8") as spill:
+            items = [
+                (entry["table"], _decode(self.tables[entry["table"]], entry["row"]))
+                for entry in map(json.loads, spill)
+                if entry["table"] in self.tables
+            ]
+        for start in range(0, len(items), self.batch_size):
+            try:
+                self._insert(items[start : start + self.batch_size])
+            except OperationalError:
+                # Still unavailable: hand the rest back for a later replay
+                self._spill(items[start:])
+                os.remove(path)
+                return start
+            except DBAPIError:
+                self._insert_each(items[start : start + self.batch_size])
+        os.remove(path)
+        return len(items)
+
+    def flush(self):
+        """Write everything queued so far; returns rows taken off the queue"""
+        taken = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take(timeout=0) if not self._queue.empty() else []
+                if not batch:
+                    return taken
+                taken += len(batch)
+                self._write_batch(batch)
+
+    def close(self):
+        """Stop the writer and write (or spill) whatever is still queued"""
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout=self.flush_interval + 5)
+        try:
+            # Rows the database will not take now are spilled by flush()
+            self.flush()
+        except Exception:
+            self.app.logger.exception(
+                "Audit rows lost on shutdown: %d", self._queue.qsize()
+            )
+        with self._spill_lock:
+            self._seal(os.getpid())  # Let other processes replay what is left
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "written": self.written,
+                "batches": self.batches,
+                "max_batch_ms": round(self.max_batch_ms, 3),
+                "spilled": self.spilled,
+                "replayed": self.replayed,
+                "rejected": self.rejected,
+            }
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def init_audit_writer(app, models):
+    app.extensions["audit_writer"] = AuditWriter(
+        app,
+        models,
+        queue_size=app.config.get("AUDIT_QUEUE_SIZE", DEFAULT_QUEUE_SIZE),
+        batch_size=app.config.get("AUDIT_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        flush_interval=app.config.get("AUDIT_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL),
+        spill_dir=app.config.get("AUDIT_SPILL_DIR", DEFAULT_SPILL_DIR),
+    )
@@ -0,0 +1,209 @@
+# Typed, versioned in-memory snapshot of the SystemConfig table
+import json
+import re
+import threading
+from types import MappingProxyType
+from flask import current_app
+from sqlalchemy import select
+from app.models import db, SystemConfig
+from app.utils.replicas import read_primary
+from app.utils.shared_cache import model_tag
+
+TRUE_VALUES = {"true", "1", "yes", "on"}
+FALSE_VALUES = {"false", "0", "no", "off"}
+
+
+class ConfigValidationError(ValueError):
+    """Raised when a config value does not parse or fails its validation"""
+
+
+def _parse_boolean(raw):
+    lowered = raw.strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError(f"{raw!r} is not a boolean")
+
+
+PARSERS = {
+    "STRING": str,
+    "INTEGER": int,
+    "FLOAT": float,
+    "BOOLEAN": _parse_boolean,
+    "JSON": json.loads,
+}
+
+
+def parse_config_value(row, raw=None):
+    """Parse row.config_value (or raw) by config_type and validate it
+
+    min_value/max_value bound INTEGER and FLOAT values, allowed_values is a
+    JSON array the value must be in and validation_regex must match the
+    whole raw string.
+    """
+    raw = row.config_value if raw is None else raw
+    parser = PARSERS.get((row.config_type or "").upper())
+    if parser is None:
+        raise ConfigValidationError(f"Unknown config_type {row.config_type!r}")
+    try:
+        value = parser(raw)
+        _validate(row, parser, raw, value)
+    except ConfigValidationError:
+        raise
+    except (ValueError, re.error) as e:
+        raise ConfigValidationError(f"Invalid {row.config_type} value: {e}")
+    return value
+
+
+def _validate(row, parser, raw, value):
+    if parser in (int, float):
+        if row.min_value not in (None, "") and value < parser(row.min_value):
+            raise ConfigValidationError(f"{value} is below min_value {row.min_value}")
+        if row.max_value not in (None, "") and value > parser(row.max_value):
+            raise ConfigValidationError(f"{value} is above max_value {row.max_value}")
+    if row.allowed_values:
+        allowed = json.loads(row.allowed_values)
+        if value not in allowed and raw not in allowed:
+            raise ConfigValidationError(f"{raw!r} is not one of {allowed}")
+    if row.validation_regex and not re.fullmatch(row.validation_regex, raw):
+        raise ConfigValidationError(f"{raw!r} does not match {row.validation_regex!r}")
+
+
+class ConfigSnapshot:
+    """Immutable view of every config value at one version
+
+    values maps config_key to its typed value. pending_restart lists
+    requires_restart keys whose stored value changed after this process
+    loaded them (they keep the loaded value until a restart reload) and
+    errors maps keys whose stored value is invalid to the reason. sensitive
+    lists is_sensitive keys, whose values must not be logged or returned.
+    """
+
+    __slots__ = (
+        "version",
+        "source_version",
+        "values",
+        "pending_restart",
+        "errors",
+        "sensitive",
+    )
+
+    def __init__(
+        self, version, source_version, values, pending_restart, errors, sensitive
+    ):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "source_version", source_version)
+        object.__setattr__(self, "values", MappingProxyType(dict(values)))
+        object.__setattr__(self, "pending_restart", frozenset(pending_restart))
+        object.__setattr__(self, "errors", MappingProxyType(dict(errors)))
+        object.__setattr__(self, "sensitive", frozenset(sensitive))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfigSnapshot is immutable")
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+class ConfigStore:
+    """Process-wide SystemConfig snapshot, reloaded when the table changes
+
+    The snapshot is built once and served from memory. A commit touching
+    SystemConfig (in any worker) bumps the "SystemConfig" tag version in the
+    shared cache; the next snapshot() call sees the new version and reloads.
+    Backends without tag versions only reload on an explicit reload().
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["config_store"] = {
+            "snapshot": None,
+            "lock": threading.Lock(),
+        }
+
+    def _state(self):
+        return current_app.extensions["config_store"]
+
+    def _source_version(self):
+        backend = current_app.extensions["cache"]
+        for cache_backend in backend.values():
+            if hasattr(cache_backend, "tag_versions"):
+                tag = model_tag(SystemConfig)
+                return cache_backend.tag_versions([tag])[tag]
+        return None
+
+    def snapshot(self):
+        """Current snapshot, reloading first if SystemConfig has changed"""
+        state = self._state()
+        current = state["snapshot"]
+        if current is None or (
+            current.source_version is not None
+            and self._source_version() != current.source_version
+        ):
+            return self.reload()
+        return current
+
+    def get(self, key, default=None):
+        return self.snapshot().get(key, default)
+
+    def reload(self, restart=False):
+        """Rebuild the snapshot from the database
+
+        requires_restart keys keep their previously loaded value unless
+        restart is True (process start or an operator-triggered restart).
+        """
+        state = self._state()
+        with state["lock"]:
+            previous = state["snapshot"]
+            source_version = self._source_version()
+            with read_primary():  # Same source as source_version
+                rows = db.session.execute(select(SystemConfig)).scalars().all()
+
+            values = {}
+            pending_restart = set()
+            errors = {}
+            sensitive = {row.config_key for row in rows if row.is_sensitive}
+            for row in rows:
+                key = row.config_key
+                try:
+                    value = parse_config_value(row)
+                except ConfigValidationError as e:
+                    errors[key] = str(e)
+                    current_app.logger.warning("SystemConfig %s: %s", key, e)
+                    if previous is not None and key in previous:
+                        value = previous[key]  # Keep the last good value
+                    else:
+                        try:
+                            value = parse_config_value(row, row.default_value)
+                        except ConfigValidationError:
+                            continue
+
+                held = (
+                    row.requires_restart
+                    and not restart
+                    and previous is not None
+                    and key in previous
+                )
+                if held and previous[key] != value:
+                    pending_restart.add(key)
+                    value = previous[key]
+                values[key] = value
+
+            version = 1 if previous is None else previous.version + 1
+            state["snapshot"] = ConfigSnapshot(
+                version, source_version, values, pending_restart, errors, sensitive
+            )
+            return state["snapshot"]
+
+
+system_settings = ConfigStore()
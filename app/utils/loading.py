@@ -0,0 +1,215 @@
+# Named eager-loading profiles for aggregate (parent plus children) reads
+from sqlalchemy import func, select
+from sqlalchemy.orm import (
+    aliased,
+    joinedload,
+    load_only,
+    raiseload,
+    selectinload,
+)
+from sqlalchemy.orm.attributes import set_committed_value
+
+SELECTIN = "selectin"  # One IN query per relationship
+JOINED = "joined"  # LEFT OUTER JOIN in the parent query (many-to-one)
+COUNT = "count"  # Only the number of children, one grouped query
+IN_BATCH = 500  # Parent keys per IN list, same as selectinload
+
+PROFILES = {}
+
+
+class Related:
+    """How a profile loads one relationship
+
+    columns names the child attributes to load (keys are always loaded);
+    None loads every column. limit caps the children loaded per parent,
+    keeping the first ones by order_by; it is only valid with SELECTIN and
+    is served by one windowed query instead of selectinload.
+    """
+
+    def __init__(self, strategy=SELECTIN, columns=None, limit=None, order_by=()):
+        if strategy not in (SELECTIN, JOINED, COUNT):
+            raise ValueError(f"Unknown loading strategy {strategy!r}")
+        if limit is not None and (strategy != SELECTIN or limit < 1):
+            raise ValueError("limit needs the selectin strategy and at least 1 row")
+        if limit is not None and not order_by:
+            raise ValueError("limit needs an order_by to choose the children")
+        self.strategy = strategy
+        self.columns = tuple(columns) if columns is not None else None
+        self.limit = limit
+        self.order_by = order_by if isinstance(order_by, tuple) else (order_by,)
+
+
+class Loaded:
+    """Parents loaded by a profile, plus the COUNT relationships' totals"""
+
+    def __init__(self, profile, rows, counts):
+        self.profile = profile
+        self.rows = rows
+        self.counts = counts  # relationship -> {parent key: children}
+
+    def count(self, row, name):
+        key = getattr(row, self.profile.key_attribute(name))
+        return self.counts[name].get(key, 0)
+
+    def dump(self, schema, **related_schemas):
+        """One dict per row: schema's fields, then each related schema's
+        dump of that relationship, then <name>_count for COUNT ones"""
+        data = []
+        for row in self.rows:
+            item = schema.dump(row)
+            for name, related_schema in related_schemas.items():
+                value = getattr(row, name)
+                item[name] = None if value is None else related_schema.dump(value)
+            for name in self.counts:
+                item[f"{name}_count"] = self.count(row, name)
+            data.append(item)
+        return data
+
+
+class LoadingProfile:
+    """A named way to load a model and some of its relationships
+
+    Every relationship not in the profile raises instead of lazy loading
+    (only where that would emit SQL), so a response built from a profile
+    cannot quietly fall back to one query per row. The statements run per
+    load are fixed by the profile: one for the parents, one per SELECTIN
+    or COUNT relationship (per IN_BATCH parents), none for JOINED.
+
+    Collections loaded with a limit hold only the first children; treat
+    them as read-only.
+    """
+
+    def __init__(self, name, model, columns=None, **relationships):
+        if name in PROFILES:
+            raise ValueError(f"Loading profile {name!r} is already defined")
+        self.name = name
+        self.model = model
+        self.columns = tuple(columns) if columns is not None else None
+        self.relationships = relationships
+        for attribute in relationships:
+            getattr(model, attribute).property.mapper  # Fail early on typos
+        PROFILES[name] = self
+
+    def _attribute(self, name):
+        return getattr(self.model, name)
+
+    def _pairs(self, name):
+        pairs = self._attribute(name).property.local_remote_pairs
+        if len(pairs) != 1:
+            raise ValueError(f"{self.name}: {name} must join on a single column")
+        return pairs[0]
+
+    def key_attribute(self, name):
+        """Parent attribute holding the key children of name point at"""
+        local, _ = self._pairs(name)
+        return self.model.__mapper__.get_property_by_column(local).key
+
+    def fields(self, name=None):
+        """Loaded attribute names, for a schema's only= (None: the parent)"""
+        if name is None:
+            columns, mapper = self.columns, self.model.__mapper__
+        else:
+            columns = self.relationships[name].columns
+            mapper = self._attribute(name).property.mapper
+        if columns is None:
+            return tuple(prop.key for prop in mapper.column_attrs)
+        keys = [prop.key for prop in mapper.column_attrs if prop.columns[0].primary_key]
+        if name is not None:
+            _, remote = self._pairs(name)
+            keys.append(mapper.get_property_by_column(remote).key)
+        return tuple(dict.fromkeys(keys + list(columns)))
+
+    def options(self):
+        """Loader options for a select(self.model)"""
+        options = []
+        if self.columns is not None:
+            keys = [self.key_attribute(name) for name in self.relationships]
+            columns = dict.fromkeys(self.fields() + tuple(keys))
+            options.append(load_only(*(self._attribute(c) for c in columns)))
+        for name, related in self.relationships.items():
+            if related.strategy == COUNT or related.limit is not None:
+                continue
+            loader = selectinload if related.strategy == SELECTIN else joinedload
+            option = loader(self._attribute(name))
+            if related.columns is not None:
+                child = self._attribute(name).property.mapper.class_
+                option = option.load_only(
+                    *(getattr(child, c) for c in self.fields(name))
+                )
+            options.append(option.raiseload("*", sql_only=True))
+        options.append(raiseload("*", sql_only=True))
+        return options
+
+    def select(self, *criteria):
+        return select(self.model).options(*self.options()).where(*criteria)
+
+    def load(self, session, statement):
+        """Run a statement built from select() and complete its rows"""
+        rows = session.execute(statement).unique().scalars().all()
+        return self.complete(session, rows)
+
+    def get(self, session, primary_key):
+        """One parent by primary key, or None"""
+        key = self.model.__mapper__.primary_key[0]
+        loaded = self.load(session, self.select(key == primary_key))
+        return loaded if loaded.rows else None
+
+    def complete(self, session, rows):
+        """Load the limited and COUNT relationships of already loaded rows"""
+        counts = {}
+        for name, related in self.relationships.items():
+            if related.strategy == COUNT:
+                counts[name] = self._count(session, rows, name)
+            elif related.limit is not None:
+                self._load_limited(session, rows, name, related)
+        return Loaded(self, rows, counts)
+
+    def _batches(self, rows, name):
+        attribute = self.key_attribute(name)
+        keys = list(dict.fromkeys(getattr(row, attribute) for row in rows))
+        keys = [key for key in keys if key is not None]
+        for start in range(0, len(keys), IN_BATCH):
+            yield keys[start : start + IN_BATCH]
+
+    def _count(self, session, rows, name):
+        _, remote = self._pairs(name)
+        counts = {}
+        for keys in self._batches(rows, name):
+            counts.update(
+                session.execute(
+                    select(remote, func.count())
+                    .where(remote.in_(keys))
+                    .group_by(remote)
+                ).all()
+            )
+        return counts
+
+    def _load_limited(self, session, rows, name, related):
+        """First related.limit children per parent, in one query per batch"""
+        _, remote = self._pairs(name)
+        mapper = self._attribute(name).property.mapper
+        child, parent_key = mapper.class_, mapper.get_property_by_column(remote).key
+        attribute = self.key_attribute(name)
+        children = {getattr(row, attribute): [] for row in rows}
+        for keys in self._batches(rows, name):
+            rank = (
+                func.row_number()
+                .over(partition_by=remote, order_by=related.order_by)
+                .label("profile_rank")
+            )
+            ranked = select(child, rank).where(remote.in_(keys)).subquery()
+            ranked_child = aliased(child, ranked)
+            statement = (
+                select(ranked_child)
+                .where(ranked.c.profile_rank <= related.limit)
+                .order_by(ranked.c[remote.key], ranked.c.profile_rank)
+                .options(raiseload("*", sql_only=True))
+            )
+            if related.columns is not None:
+                statement = statement.options(
+                    load_only(*(getattr(ranked_child, c) for c in self.fields(name)))
+                )
+            for instance in session.execute(statement).scalars():
+                children[getattr(instance, parent_key)].append(instance)
+        for row in rows:
+            set_committed_value(row, name, children.get(getattr(row, attribute), []))
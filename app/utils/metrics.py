@@ -0,0 +1,438 @@
+# Per-request latency and SQL instrumentation, exported in Prometheus format
+import hashlib
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from flask import Response, current_app, g, has_request_context, jsonify, request
+from flask import request_started
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+from app.extensions import limiter
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_N_PLUS_ONE_THRESHOLD = 10  # Same statement this often in one request
+MAX_SERIES = 1000  # Label sets kept; further endpoints are counted as "other"
+MAX_SUSPECTS = 200  # Distinct (endpoint, statement) N+1 suspects kept
+METRICS_PATH = "/metrics"
+PREFIX = "landlink"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def copy(self):
+        histogram = _Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.total = self.total
+        return histogram
+
+
+class _Series:
+    """Everything recorded for one (endpoint, method, status)"""
+
+    __slots__ = ("latency", "statements", "sql_seconds", "rows")
+
+    def __init__(self):
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.statements = _Histogram(STATEMENT_BUCKETS)
+        self.sql_seconds = 0.0
+        self.rows = 0
+
+    def copy(self):
+        series = _Series()
+        series.latency = self.latency.copy()
+        series.statements = self.statements.copy()
+        series.sql_seconds, series.rows = self.sql_seconds, self.rows
+        return series
+
+
+class _RequestStats:
+    """Counters for the request in flight, kept on flask.g"""
+
+    __slots__ = ("started", "status", "statements", "sql_seconds", "rows", "shapes")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.status = None
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.shapes = Counter()
+
+
+class PoolTelemetry:
+    """Checkout waits, overflow use, timeouts and invalidations of a pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait = _Histogram(POOL_WAIT_BUCKETS)
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.invalidations = 0
+
+    def checked_out(self, waited, overflow):
+        with self._lock:
+            self.wait.observe(waited)
+            self.overflow_checkouts += overflow
+
+    def timed_out(self, waited):
+        with self._lock:
+            self.wait.observe(waited)
+            self.timeouts += 1
+
+    def invalidated(self, dbapi_connection, connection_record, exception):
+        # Stale or broken connections, including failed pre-pings
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "wait": self.wait.copy(),
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "invalidations": self.invalidations,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that times every checkout, including the wait for a free
+    connection, and counts checkouts made while overflow connections were
+    in use"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.telemetry = PoolTelemetry()
+        if kwargs.get("_dispatch") is None:
+            # A recreated pool copies its predecessor's listeners
+            event.listen(self, "invalidate", self._invalidated)
+
+    def _invalidated(self, *args):
+        self.telemetry.invalidated(*args)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.telemetry = self.telemetry  # Counters survive engine.dispose()
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            self.telemetry.timed_out(time.perf_counter() - started)
+            raise
+        self.telemetry.checked_out(
+            time.perf_counter() - started, self.checkedout() > self.size()
+        )
+        return connection
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if has_request_context() and "_request_metrics" in g:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    stats = g._request_metrics
+    stats.sql_seconds += time.perf_counter() - started
+    stats.statements += 1
+    # The compiled statement string, so one ORM query is one shape
+    stats.shapes[statement] += 1
+    # Rows affected, or rows returned by buffered drivers (PyMySQL);
+    # sqlite3 reports -1 for SELECT
+    if cursor.rowcount > 0:
+        stats.rows += cursor.rowcount
+
+
+SQL_EVENTS = [
+    ("before_cursor_execute", _before_cursor_execute),
+    ("after_cursor_execute", _after_cursor_execute),
+]
+
+
+class RequestMetrics:
+    """Per-endpoint request latency and SQL usage for one app, in process
+
+    Every worker process keeps its own numbers; Prometheus scrapes each
+    one. Label sets are bounded: endpoints come from the URL map, and
+    past MAX_SERIES new ones are folded into endpoint="other". A request
+    running the same statement n_plus_one_threshold times or more is
+    counted as an N+1 suspect, and each new (endpoint, statement) pair is
+    logged once with the statement text.
+    """
+
+    def __init__(self, app, n_plus_one_threshold=DEFAULT_N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self._series = {}
+        self._n_plus_one = Counter()  # endpoint -> requests flagged
+        self._suspects = {}  # (endpoint, statement id) -> most repeats seen
+
+    def start(self, sender=None, **extra):
+        g._request_metrics = _RequestStats()
+
+    def record_status(self, response):
+        stats = g.get("_request_metrics")
+        if stats is not None:
+            stats.status = response.status_code
+        return response
+
+    def finish(self, error=None):
+        stats = g.pop("_request_metrics", None)
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - stats.started
+        endpoint = request.endpoint or "unmatched"
+        status = stats.status or 500
+        repeated = [
+            (statement, count)
+            for statement, count in stats.shapes.items()
+            if count >= self.n_plus_one_threshold
+        ]
+        new_suspects = []
+        with self._lock:
+            key = (endpoint, request.method, status)
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= MAX_SERIES:
+                    key = ("other", request.method, status)
+                series = self._series.setdefault(key, _Series())
+            series.latency.observe(elapsed)
+            series.statements.observe(stats.statements)
+            series.sql_seconds += stats.sql_seconds
+            series.rows += stats.rows
+            if repeated:
+                self._n_plus_one[key[0]] += 1
+            for statement, count in repeated:
+                suspect = (key[0], _statement_id(statement))
+                if suspect in self._suspects:
+                    self._suspects[suspect] = max(self._suspects[suspect], count)
+                elif len(self._suspects) < MAX_SUSPECTS:
+                    self._suspects[suspect] = count
+                    new_suspects.append((suspect, count, statement))
+        for (endpoint, statement_id), count, statement in new_suspects:
+            self.app.logger.warning(
+                "Possible N+1 in %s: statement %s ran %d times in one request: %s",
+                endpoint,
+                statement_id,
+                count,
+                " ".join(statement.split())[:500],
+            )
+
+    def snapshot(self):
+        with self._lock:
+            return (
+                {key: series.copy() for key, series in self._series.items()},
+                dict(self._n_plus_one),
+                dict(self._suspects),
+            )
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        series, n_plus_one, suspects = self.snapshot()
+        lines = []
+        _histogram(
+            lines,
+            "request_duration_seconds",
+            "Request latency by endpoint",
+            {key: s.latency for key, s in series.items()},
+        )
+        _histogram(
+            lines,
+            "request_sql_statements",
+            "SQL statements executed per request",
+            {key: s.statements for key, s in series.items()},
+        )
+        _counter(
+            lines,
+            "request_sql_seconds_total",
+            "Time spent executing SQL",
+            {key: s.sql_seconds for key, s in series.items()},
+        )
+        _counter(
+            lines,
+            "request_sql_rows_total",
+            "Rows affected or returned by SQL, as reported by the driver",
+            {key: s.rows for key, s in series.items()},
+        )
+        name = f"{PREFIX}_sql_n_plus_one_requests_total"
+        lines.append(f"# HELP {name} Requests repeating one statement many times")
+        lines.append(f"# TYPE {name} counter")
+        for endpoint, count in sorted(n_plus_one.items()):
+            lines.append(f"{name}{_labels(endpoint=endpoint)} {count}")
+        name = f"{PREFIX}_sql_repeated_statement_max"
+        lines.append(f"# HELP {name} Most repeats of a suspect statement in a request")
+        lines.append(f"# TYPE {name} gauge")
+        for (endpoint, statement_id), count in sorted(suspects.items()):
+            labels = _labels(endpoint=endpoint, statement=statement_id)
+            lines.append(f"{name}{labels} {count}")
+        router = self.app.extensions.get("db_router")
+        if router is not None and router.binds:
+            _replica_metrics(lines, router.stats())
+        database = self.app.extensions.get("sqlalchemy")
+        if database is not None:
+            _pool_metrics(lines, database.engines)
+        return "\n".join(lines) + "\n"
+
+
+def _statement_id(statement):
+    return hashlib.sha1(statement.encode()).hexdigest()[:12]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _series_labels(key, **extra):
+    endpoint, method, status = key
+    return _labels(endpoint=endpoint, method=method, status=status, **extra)
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _bind_labels(bind, **extra):
+    return _labels(bind=bind or "default", **extra)
+
+
+def _histogram(lines, name, help_text, histograms, labeller=_series_labels):
+    name = f"{PREFIX}_{name}"
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, histogram in sorted(histograms.items(), key=lambda item: str(item[0])):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+            cumulative += count
+            labels = labeller(key, le=bound)
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = labeller(key)
+        lines.append(f"{name}_sum{labels} {_number(histogram.total)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+
+
+def _counter(lines, name, help_text, values):
+    name = f"{PREFIX}_{name}"
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} counter")
+    for key, value in sorted(values.items()):
+        lines.append(f"{name}{_series_labels(key)} {_number(value)}")
+
+
+def _pool_metrics(lines, engines):
+    pools = {
+        bind: engine.pool
+        for bind, engine in engines.items()
+        if isinstance(engine.pool, TimedQueuePool)
+    }
+    snapshots = {bind: pool.telemetry.snapshot() for bind, pool in pools.items()}
+    gauges = (
+        ("db_pool_size", "Connections kept open by the pool", QueuePool.size),
+        ("db_pool_checked_out", "Connections in use", QueuePool.checkedout),
+        (
+            "db_pool_overflow",
+            "Connections open beyond the pool size",
+            lambda pool: max(0, pool.overflow()),
+        ),
+    )
+    for name, help_text, read in gauges:
+        name = f"{PREFIX}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for bind, pool in pools.items():
+            lines.append(f"{name}{_bind_labels(bind)} {read(pool)}")
+    _histogram(
+        lines,
+        "db_pool_wait_seconds",
+        "Time to check a connection out of the pool",
+        {bind: snapshot["wait"] for bind, snapshot in snapshots.items()},
+        labeller=_bind_labels,
+    )
+    for key, help_text in (
+        ("overflow_checkouts", "Checkouts while more than pool_size were in use"),
+        ("timeouts", "Checkouts that gave up after pool_timeout"),
+        ("invalidations", "Connections discarded as stale or broken"),
+    ):
+        name = f"{PREFIX}_db_pool_{key}_total"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for bind, snapshot in snapshots.items():
+            lines.append(f"{name}{_bind_labels(bind)} {snapshot[key]}")
+
+
+def _replica_metrics(lines, stats):
+    name = f"{PREFIX}_db_replica_lag_seconds"
+    lines.append(f"# HELP {name} Replica lag behind the primary (NaN: unreachable)")
+    lines.append(f"# TYPE {name} gauge")
+    for bind, lag in sorted(stats["replicas"].items()):
+        value = "NaN" if lag is None else _number(float(lag))
+        lines.append(f"{name}{_labels(bind=bind)} {value}")
+    name = f"{PREFIX}_db_read_requests_total"
+    lines.append(f"# HELP {name} Read-only requests by where their reads went")
+    lines.append(f"# TYPE {name} counter")
+    for route, count in sorted(stats["requests"].items()):
+        lines.append(f"{name}{_labels(route=route)} {count}")
+
+
+@limiter.exempt  # Scraped every few seconds
+def metrics():
+    return Response(
+        current_app.extensions["request_metrics"].render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def pool_exhausted(error):
+    # pool_timeout expired: shed the request instead of queueing it longer
+    response = jsonify({"Error": "Database busy, please retry"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+def init_request_metrics(app):
+    """Instrument every request of app and serve the numbers on METRICS_PATH
+
+    SQL is measured with engine events on every Engine (read replicas and
+    other binds included); statements outside a request, such as those of
+    background writers, are not counted. Pools created as TimedQueuePool
+    are reported per bind, and a request that times out waiting for a
+    connection gets a 503.
+    """
+    recorder = RequestMetrics(
+        app,
+        app.config.get("METRICS_N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD),
+    )
+    app.extensions["request_metrics"] = recorder
+    for name, listener in SQL_EVENTS:
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+    # A signal rather than before_request, so requests rejected by an
+    # earlier before_request hook (the rate limiter) are timed too
+    request_started.connect(recorder.start, app, weak=False)
+    app.after_request(recorder.record_status)
+    app.teardown_request(recorder.finish)
+    app.register_error_handler(PoolTimeout, pool_exhausted)
+    app.add_url_rule(METRICS_PATH, "metrics", metrics)
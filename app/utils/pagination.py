@@ -0,0 +1,122 @@
+# Keyset (cursor) pagination shared by the list endpoints
+import base64
+import json
+from datetime import date
+from flask import request
+from sqlalchemy import and_, or_
+from app.models import db
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class CursorError(ValueError):
+    """Raised for malformed cursors or page sizes (respond with 400)"""
+
+
+class Page:
+    """One page of rows plus the cursor for the page after it"""
+
+    def __init__(self, items, next_cursor, page_size):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+
+
+def encode_cursor(values):
+    """Opaque cursor for a (sort key, primary key) pair"""
+    payload = [
+        value.isoformat() if isinstance(value, date) else value for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into values typed like the given columns"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise CursorError("Invalid cursor")
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise CursorError("Invalid cursor")
+
+    values = []
+    for value, column in zip(payload, columns):
+        python_type = column.type.python_type
+        try:
+            if python_type is date:
+                value = date.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                raise TypeError
+        except (ValueError, TypeError):
+            raise CursorError("Invalid cursor")
+        values.append(value)
+    return values
+
+
+def page_args():
+    """Read cursor and page_size from the query string"""
+    cursor = request.args.get("cursor") or None
+    page_size = request.args.get("page_size", DEFAULT_PAGE_SIZE)
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        raise CursorError("page_size must be an integer")
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise CursorError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    return cursor, page_size
+
+
+def keyset_filter(sort_column, key_column, sort_value, key_value, descending):
+    """Rows strictly after (sort_value, key_value) in the page order
+
+    Written as `sort <= x AND (sort < x OR key < y)` rather than a row-value
+    comparison so every backend can use a range scan on the sort index.
+    """
+    if descending:
+        return and_(
+            sort_column <= sort_value,
+            or_(sort_column < sort_value, key_column < key_value),
+        )
+    return and_(
+        sort_column >= sort_value,
+        or_(sort_column > sort_value, key_column > key_value),
+    )
+
+
+def paginate(
+    statement,
+    sort_column,
+    key_column,
+    cursor=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    descending=True,
+):
+    """Run a select one keyset page at a time
+
+    The cost of a page depends only on page_size, not on how deep the page
+    is, as long as (sort_column, key_column) is backed by an index.
+    """
+    if cursor:
+        sort_value, key_value = decode_cursor(cursor, (sort_column, key_column))
+        statement = statement.where(
+            keyset_filter(sort_column, key_column, sort_value, key_value, descending)
+        )
+
+    if descending:
+        statement = statement.order_by(sort_column.desc(), key_column.desc())
+    else:
+        statement = statement.order_by(sort_column.asc(), key_column.asc())
+
+    # One extra row tells us whether another page exists
+    rows = db.session.execute(statement.limit(page_size + 1)).scalars().all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, sort_column.key), getattr(last, key_column.key)]
+        )
+    return Page(rows, next_cursor, page_size)
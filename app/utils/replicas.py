@@ -0,0 +1,299 @@
+# Read-replica routing for db.session
+import atexit
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.sql.expression import TextClause, UpdateBase
+
+DEFAULT_MAX_LAG = 5.0  # Seconds behind the primary before a replica is skipped
+DEFAULT_CHECK_INTERVAL = 1.0  # Seconds between heartbeat/lag checks
+DEFAULT_PIN_SECONDS = 5  # Reads stay on the primary this long after a write
+PIN_COOKIE = "db_primary_until"
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+HEARTBEAT_NAME = "primary"
+
+
+class _Route:
+    """Where the current request or job may read from"""
+
+    __slots__ = ("replica_ok", "wrote", "replica_used")
+
+    def __init__(self, replica_ok):
+        self.replica_ok = replica_ok
+        self.wrote = False
+        self.replica_used = False
+
+
+_route = ContextVar("db_route", default=None)
+
+
+def _writes(clause):
+    """True for statements that must run on the primary"""
+    if isinstance(clause, (UpdateBase, TextClause)):
+        # INSERT/UPDATE/DELETE, and raw SQL we cannot inspect
+        return True
+    return getattr(clause, "_for_update_arg", None) is not None
+
+
+class RoutingSession(Session):
+    """db.session that sends reads to a replica when the route allows it
+
+    A flush, a DML statement, raw SQL or SELECT ... FOR UPDATE goes to the
+    primary and pins the rest of the request (or job) there, so it reads
+    its own writes. Everything else, outside a route or with no healthy
+    replica, is bound as usual.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        route = _route.get()
+        if bind is None and route is not None:
+            if self._flushing or _writes(clause):
+                route.wrote = True
+                route.replica_ok = False
+            elif route.replica_ok and has_app_context():
+                router = current_app.extensions.get("db_router")
+                engine = router.engine() if router is not None else None
+                if engine is not None:
+                    route.replica_used = True
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def read_replica():
+    """Let db.session reads in this block use a replica (export jobs)"""
+    token = _route.set(_Route(replica_ok=True))
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+@contextmanager
+def read_primary():
+    """Keep db.session reads in this block on the primary
+
+    For reads whose result outlives the request (cache fills, snapshots
+    stamped with a version read from the primary), where a lagging
+    replica would be remembered as current.
+    """
+    route = _route.get()
+    if route is None or not route.replica_ok:
+        yield
+        return
+    route.replica_ok = False
+    try:
+        yield
+    finally:
+        route.replica_ok = not route.wrote
+
+
+class ReplicaRouter:
+    """Replica binds for read-only work, and how far each one lags
+
+    A background thread (started lazily per process) bumps a heartbeat row
+    on the primary every check_interval seconds and reads it back from
+    every replica; a replica whose copy is more than max_lag seconds old,
+    or that cannot be reached, gets no reads until it catches up.
+    """
+
+    def __init__(
+        self,
+        app,
+        db,
+        heartbeat_model,
+        binds,
+        max_lag=DEFAULT_MAX_LAG,
+        check_interval=DEFAULT_CHECK_INTERVAL,
+        pin_seconds=DEFAULT_PIN_SECONDS,
+    ):
+        self.app = app
+        self.db = db
+        self.heartbeat = heartbeat_model
+        self.binds = list(binds)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.pin_seconds = pin_seconds
+        self.lag = {bind: None for bind in self.binds}  # None: unknown
+        self._healthy = []
+        self._turn = itertools.count()
+        self._counts = {"replica": 0, "primary_fallback": 0, "pinned": 0}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self._wake.set)
+
+    def engine(self):
+        """A healthy replica's engine (round robin), or None"""
+        if not self.binds:
+            return None
+        self.ensure_running()
+        healthy = self._healthy
+        if not healthy:
+            return None
+        return self.db.engines[healthy[next(self._turn) % len(healthy)]]
+
+    def ensure_running(self):
+        # Started lazily so forked workers each get their own monitor
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="replica-monitor", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self.app.app_context():
+                self.check()
+            if self._wake.wait(self.check_interval):
+                return
+
+    def _beat(self, now):
+        """Bump the primary's heartbeat unless another worker just did"""
+        table = self.heartbeat.__table__
+        with self.db.engines[None].begin() as connection:
+            bumped = connection.execute(
+                update(table)
+                .where(table.c.name == HEARTBEAT_NAME)
+                .where(table.c.beat_at < now - self.check_interval / 2)
+                .values(beat_at=now)
+            ).rowcount
+            if bumped:
+                return
+            exists = connection.execute(
+                select(table.c.name).where(table.c.name == HEARTBEAT_NAME)
+            ).first()
+        if exists is None:
+            try:
+                with self.db.engines[None].begin() as connection:
+                    connection.execute(
+                        insert(table).values(name=HEARTBEAT_NAME, beat_at=now)
+                    )
+            except IntegrityError:
+                pass  # Another worker created it
+
+    def check(self):
+        """Refresh every replica's lag; returns {bind: seconds or None}"""
+        now = time.time()
+        try:
+            self._beat(now)
+        except SQLAlchemyError:
+            self.app.logger.exception("Replica heartbeat on the primary failed")
+        table = self.heartbeat.__table__
+        for bind in self.binds:
+            try:
+                with self.db.engines[bind].connect() as connection:
+                    beat = connection.execute(
+                        select(table.c.beat_at).where(table.c.name == HEARTBEAT_NAME)
+                    ).scalar()
+            except SQLAlchemyError:
+                if self.lag[bind] is not None:
+                    self.app.logger.warning("Replica %s is unreachable", bind)
+                beat = None
+            self.lag[bind] = None if beat is None else max(0.0, now - beat)
+        self._healthy = [
+            bind
+            for bind, lag in self.lag.items()
+            if lag is not None and lag <= self.max_lag
+        ]
+        return dict(self.lag)
+
+    def count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "replicas": {
+                bind: None if lag is None else round(lag, 3)
+                for bind, lag in self.lag.items()
+            },
+            "healthy": list(self._healthy),
+            "max_lag": self.max_lag,
+            "requests": counts,
+        }
+
+    # Request hooks
+
+    def start_request(self):
+        pinned = False
+        if request.method in READ_METHODS:
+            try:
+                pinned = float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+            except ValueError:
+                pass
+        route = _Route(replica_ok=request.method in READ_METHODS and not pinned)
+        g._db_route = (route, _route.set(route), pinned)
+
+    def pin_writer(self, response):
+        """Keep this client's reads on the primary for a while after a write"""
+        route, _, _ = g.get("_db_route", (None, None, None))
+        if route is not None and route.wrote and self.pin_seconds:
+            response.set_cookie(
+                PIN_COOKIE,
+                f"{time.time() + self.pin_seconds:.3f}",
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def end_request(self, error=None):
+        state = g.pop("_db_route", None)
+        if state is None:
+            return
+        route, token, pinned = state
+        _route.reset(token)
+        if route.replica_used:
+            self.count("replica")
+        elif pinned:
+            self.count("pinned")
+        elif route.replica_ok and self.binds:
+            self.count("primary_fallback")
+
+
+def init_replica_routing(app, db, heartbeat_model):
+    """Route read-only requests to DB_REPLICA_BINDS
+
+    Each name in DB_REPLICA_BINDS is a SQLALCHEMY_BINDS key holding a copy
+    of the default database. GET/HEAD/OPTIONS requests read from a healthy
+    replica (and so does code inside read_replica()); everything else, and
+    any request that writes, uses the primary. With no replica binds the
+    hooks are not installed at all.
+    """
+    router = ReplicaRouter(
+        app,
+        db,
+        heartbeat_model,
+        app.config.get("DB_REPLICA_BINDS", ()),
+        max_lag=app.config.get("DB_REPLICA_MAX_LAG", DEFAULT_MAX_LAG),
+        check_interval=app.config.get(
+            "DB_REPLICA_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL
+        ),
+        pin_seconds=app.config.get("DB_PRIMARY_PIN_SECONDS", DEFAULT_PIN_SECONDS),
+    )
+    app.extensions["db_router"] = router
+    missing = set(router.binds) - set(app.config.get("SQLALCHEMY_BINDS") or {})
+    if missing:
+        raise ValueError(f"DB_REPLICA_BINDS not in SQLALCHEMY_BINDS: {sorted(missing)}")
+    if router.binds:
+        app.before_request(router.start_request)
+        app.after_request(router.pin_writer)
+        app.teardown_request(router.end_request)
+    return router
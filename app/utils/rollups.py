@@ -0,0 +1,362 @@
+# Incrementally maintained rollup tables for dashboards
+import atexit
+import os
+import threading
+from datetime import date, datetime
+from flask import request
+from sqlalchemy import Column, delete, event, inspect, select, update, insert, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.visitors import iterate
+from app.models import db, RollupWatermark
+
+DEFAULT_BATCH_SIZE = 50000  # Source ids absorbed per step (one commit each)
+DEFAULT_REFRESH_INTERVAL = 60.0  # Seconds between background refreshes
+
+# GROUP BY ... FOR SHARE is accepted (PostgreSQL refuses it; SQLite
+# serializes writers anyway)
+LOCKING_READ_DIALECTS = ("mysql", "mariadb")
+
+watermarks = RollupWatermark.__table__
+
+
+class RollupError(ValueError):
+    """Raised for bad dashboard queries (respond with 400)"""
+
+
+class Rollup:
+    """How one rollup table is derived from a source table
+
+    keys maps each rollup key column to the source expression it groups by
+    (one of them must be "day"); measures maps each counter column to an
+    aggregate over the source rows. settled, if given, is called with the
+    current time and returns a criterion for source rows that will not
+    change any more; the watermark never passes an unsettled row.
+    """
+
+    def __init__(self, name, target, source_id, keys, measures, settled=None):
+        self.name = name
+        self.target = target.__table__
+        self.source_id = source_id
+        self.keys = keys
+        self.measures = measures
+        self.settled = settled
+
+    def aggregate(self, *criteria):
+        """GROUP BY the keys over the source rows matching criteria"""
+        return (
+            select(
+                *(expr.label(column) for column, expr in self.keys.items()),
+                *(expr.label(column) for column, expr in self.measures.items()),
+            )
+            .where(*criteria)
+            .group_by(*self.keys.values())
+        )
+
+    def _add(self, session, group):
+        """Add one aggregated group to its rollup row, creating it if needed"""
+        target = self.target
+        added = session.execute(
+            update(target)
+            .where(*(target.c[column] == group[column] for column in self.keys))
+            .values(
+                {column: target.c[column] + group[column] for column in self.measures}
+            )
+        ).rowcount
+        if not added:
+            session.execute(insert(target).values(dict(group)))
+
+    def key_columns(self):
+        """Names of the source columns the keys are computed from"""
+        return {
+            column.key
+            for expr in self.keys.values()
+            for column in iterate(expr.expression)
+            if isinstance(column, Column)
+        }
+
+    def group_of(self, session, source_id):
+        """Keys and measures of one source row as stored now, or None"""
+        return (
+            session.execute(self.aggregate(self.source_id == source_id))
+            .mappings()
+            .first()
+        )
+
+    def move(self, session, source_id, old, new):
+        """Re-key an absorbed source row from its old group to its new one
+
+        The watermark is read with a lock, so a refresh claiming the same id
+        either committed before (and the row is moved here) or waits for
+        this transaction and absorbs the new key (see refresh). Returns True
+        if moved.
+        """
+        last_id = session.execute(
+            select(watermarks.c.last_id)
+            .where(watermarks.c.rollup_name == self.name)
+            .with_for_update()
+        ).scalar()
+        if last_id is None or source_id > last_id:
+            return False
+        self._add(session, {**old, **{m: -old[m] for m in self.measures}})
+        target = self.target
+        session.execute(
+            delete(target)
+            .where(*(target.c[column] == old[column] for column in self.keys))
+            .where(*(target.c[column] == 0 for column in self.measures))
+        )  # Emptied
+        self._add(session, {**new, **{m: old[m] for m in self.measures}})
+        return True
+
+
+_rekeyed = {}  # Model -> rollups whose keys its rows feed
+
+
+def _collect_rekeyed(session, flush_context, instances):
+    moves = session.info.setdefault("rollup_moves", [])
+    for instance in session.dirty:
+        for rollup in _rekeyed.get(type(instance), ()):
+            state = inspect(instance)
+            if not any(
+                state.attrs[key].history.has_changes() for key in rollup.key_columns()
+            ):
+                continue
+            source_id = getattr(instance, rollup.source_id.key)
+            old = rollup.group_of(session, source_id)  # Still the committed row
+            if old is not None:
+                moves.append((rollup, source_id, old))
+
+
+def _apply_rekeyed(session, flush_context):
+    for rollup, source_id, old in session.info.pop("rollup_moves", []):
+        new = rollup.group_of(session, source_id)
+        if new is not None and any(old[key] != new[key] for key in rollup.keys):
+            rollup.move(session, source_id, old, new)
+
+
+def track_rekeying(session, rollup, model):
+    """Keep rollup rows right when an absorbed source row changes key
+
+    Before a flush, rows of model whose key columns changed are read as
+    committed; after it, a row whose key really changed has its measures
+    moved from the old rollup row to the new one in the same transaction.
+    Only ORM changes are seen; Core UPDATEs of key columns are not. Safe
+    to call once per create_app.
+    """
+    rollups = _rekeyed.setdefault(model, [])
+    if rollup not in rollups:
+        rollups.append(rollup)
+    for name, listener in (
+        ("before_flush", _collect_rekeyed),
+        ("after_flush", _apply_rekeyed),
+    ):
+        if not event.contains(session, name, listener):
+            event.listen(session, name, listener)
+
+
+def _watermark(session, name):
+    row = session.execute(
+        select(watermarks.c.last_id, watermarks.c.seen_max_id).where(
+            watermarks.c.rollup_name == name
+        )
+    ).first()
+    if row is not None:
+        return row
+    try:
+        session.execute(
+            insert(watermarks).values(rollup_name=name, last_id=0, seen_max_id=0)
+        )
+        session.commit()
+    except IntegrityError:
+        session.rollback()  # Created by a concurrent refresh
+    return _watermark(session, name)
+
+
+def refresh(rollup, batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Absorb new source rows into the rollup; returns source ids consumed
+
+    Only ids up to the highest id seen by the previous refresh are taken,
+    so rows from transactions still in flight at that point (autoincrement
+    ids commit out of order) are never skipped. Each step claims its id
+    range with a conditional update of the watermark, so concurrent
+    refreshes (workers, cron) never count a row twice.
+    """
+    session = db.session
+    now = now or datetime.now()
+    mark = _watermark(session, rollup.name)
+    bound = mark.seen_max_id
+    observed = session.execute(select(func.max(rollup.source_id))).scalar() or 0
+    last_id = mark.last_id
+    consumed = 0
+    while True:
+        upto = min(bound, last_id + batch_size)
+        if rollup.settled is not None and upto > last_id:
+            unsettled = session.execute(
+                select(func.min(rollup.source_id)).where(
+                    rollup.source_id > last_id,
+                    rollup.source_id <= upto,
+                    ~rollup.settled(now),
+                )
+            ).scalar()
+            if unsettled is not None:
+                upto = unsettled - 1
+        claimed = session.execute(
+            update(watermarks)
+            .where(watermarks.c.rollup_name == rollup.name)
+            .where(watermarks.c.last_id == last_id)
+            .values(
+                last_id=max(upto, last_id),
+                seen_max_id=max(bound, observed),
+                refreshed_at=now,
+            )
+        ).rowcount
+        if not claimed:
+            # Another refresh moved the watermark; it will finish the job
+            session.rollback()
+            return consumed
+        if upto > last_id:
+            statement = rollup.aggregate(
+                rollup.source_id > last_id, rollup.source_id <= upto
+            )
+            if session.get_bind().dialect.name in LOCKING_READ_DIALECTS:
+                # Read committed rows, not this transaction's older snapshot,
+                # so a key change that committed meanwhile is seen (Rollup.move)
+                statement = statement.with_for_update(read=True)
+            groups = session.execute(statement).mappings()
+            for group in groups.all():
+                rollup._add(session, group)
+        session.commit()
+        if upto <= last_id:
+            return consumed
+        consumed += upto - last_id
+        last_id = upto
+
+
+def read(rollup, start_date=None, end_date=None, **filters):
+    """Rollup rows merged with the not-yet-absorbed source tail
+
+    Returns (rows, last_id): one dict per key combination, exact as of now.
+    filters are equality filters on key columns.
+    """
+    unknown = set(filters) - set(rollup.keys)
+    if unknown:
+        raise RollupError(f"Unknown filters: {', '.join(sorted(unknown))}")
+    target = rollup.target
+    day = rollup.keys["day"]
+    session = db.session
+    last_id = (
+        session.execute(
+            select(watermarks.c.last_id).where(watermarks.c.rollup_name == rollup.name)
+        ).scalar()
+        or 0
+    )
+
+    stored = select(target)
+    tail = [rollup.source_id > last_id]
+    if start_date:
+        stored = stored.where(target.c.day >= start_date)
+        tail.append(day >= start_date)
+    if end_date:
+        stored = stored.where(target.c.day <= end_date)
+        tail.append(day <= end_date)
+    for column, value in filters.items():
+        stored = stored.where(target.c[column] == value)
+        tail.append(rollup.keys[column] == value)
+
+    merged = {}
+    for result in (session.execute(stored), session.execute(rollup.aggregate(*tail))):
+        for row in result.mappings():
+            key = tuple(row[column] for column in rollup.keys)
+            if key in merged:
+                for column in rollup.measures:
+                    merged[key][column] += row[column]
+            else:
+                merged[key] = dict(row)
+    rows = [merged[key] for key in sorted(merged, key=lambda key: tuple(map(str, key)))]
+    return rows, last_id
+
+
+def _parse_date(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise RollupError(f"{name} must be an ISO date (YYYY-MM-DD)")
+
+
+def dashboard(rollup, filter_names):
+    """Answer a dashboard request from the rollup
+
+    Query params: start_date, end_date (inclusive ISO dates) and any of
+    filter_names. Days are returned as ISO dates.
+    """
+    start_date = _parse_date("start_date")
+    end_date = _parse_date("end_date")
+    if start_date and end_date and start_date > end_date:
+        raise RollupError("start_date must not be after end_date")
+    filters = {
+        name: request.args[name] for name in filter_names if request.args.get(name)
+    }
+    rows, last_id = read(rollup, start_date, end_date, **filters)
+    for row in rows:
+        row["day"] = row["day"].isoformat()
+    return {"rows": rows, "as_of_id": last_id}
+
+
+class RollupRefresher:
+    """Background thread refreshing every registered rollup"""
+
+    def __init__(self, app, interval=DEFAULT_REFRESH_INTERVAL):
+        self.app = app
+        self.interval = interval
+        self.rollups = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self._wake.set)
+
+    def register(self, rollup):
+        self.rollups[rollup.name] = rollup
+
+    def ensure_running(self):
+        # Started lazily so forked workers each get their own refresher
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wake.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="rollup-refresher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refresh_all()
+            if self._wake.wait(self.interval):
+                return
+
+    def refresh_all(self):
+        """Refresh every rollup now; returns source ids consumed per rollup"""
+        consumed = {}
+        for name, rollup in self.rollups.items():
+            try:
+                with self.app.app_context():
+                    consumed[name] = refresh(rollup)
+            except Exception:
+                self.app.logger.exception("Rollup %s refresh failed", name)
+        return consumed
+
+
+def init_rollups(app):
+    app.extensions["rollups"] = RollupRefresher(
+        app, app.config.get("ROLLUP_REFRESH_INTERVAL", DEFAULT_REFRESH_INTERVAL)
+    )
+
+
+def register_rollup(app, rollup):
+    app.extensions["rollups"].register(rollup)
@@ -0,0 +1,192 @@
+# Compiled fast-path serializer for SQLAlchemyAutoSchema list responses
+from datetime import date, datetime
+from marshmallow import fields
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+from sqlalchemy.engine import Row
+
+# Expression templates for field types whose marshmallow serialization is a
+# plain conversion; {v} is the local holding the attribute value
+DATE_FORMATS = (None, "iso", "iso8601")
+FAST_FIELDS = {
+    fields.String: "None if {v} is None else {v} if {v}.__class__ is _str else _text({v})",
+    fields.Integer: "None if {v} is None else int({v})",
+    fields.Float: "None if {v} is None else float({v})",
+    fields.Boolean: "{v}",
+    fields.Raw: "{v}",
+    fields.Date: "None if {v} is None else _date_iso({v})",
+    fields.DateTime: "None if {v} is None else _datetime_iso({v})",
+}
+
+# Value sources for compile_schema (a Row._fields tuple is the third kind)
+ATTRIBUTES = "attributes"
+INSTANCE_STATE = "instance_state"
+
+# One compiled serializer per schema class, field selection and value source
+_compiled = {}
+
+
+def _text(value):
+    # Same as marshmallow.utils.ensure_text_type
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return str(value)
+
+
+def _has_dump_hooks(schema):
+    """True if the schema class has a @pre_dump or @post_dump method"""
+    for klass in type(schema).__mro__:
+        for member in vars(klass).values():
+            tags = getattr(member, "__marshmallow_hook__", None) or ()
+            if PRE_DUMP in tags or POST_DUMP in tags:
+                return True
+    return False
+
+
+def _field_expression(field, value_name):
+    """Inline expression for a field, or None if it needs marshmallow"""
+    template = FAST_FIELDS.get(type(field))
+    if template is None:
+        return None
+    if getattr(field, "as_string", False):
+        return None
+    if isinstance(field, (fields.Date, fields.DateTime)):
+        if field.format not in DATE_FORMATS:
+            return None
+    return template.format(v=value_name)
+
+
+def compile_schema(schema, source=ATTRIBUTES):
+    """Build a function that dumps one row the same way schema.dump does
+
+    source says how values are read from a row:
+        ATTRIBUTES - getattr on anything (ORM instances, Row tuples)
+        INSTANCE_STATE - straight from an ORM instance's __dict__, skipping
+            the attribute descriptors (KeyError if a value is not loaded)
+        a tuple of Row._fields - by position from a column-only select row
+    Returns None when the schema has dump hooks, which the compiled path
+    cannot reproduce.
+    """
+    if _has_dump_hooks(schema):
+        return None
+
+    namespace = {
+        "_text": _text,
+        "_str": str,
+        "_date_iso": date.isoformat,
+        "_datetime_iso": datetime.isoformat,
+        "_missing": fields.missing_,
+    }
+    reads = []
+    entries = []
+    fallback = False
+    for index, (name, field) in enumerate(schema.dump_fields.items()):
+        attribute = field.attribute or name
+        key = field.data_key if field.data_key is not None else name
+        value_name = f"v{index}"
+        expression = _field_expression(field, value_name)
+
+        if expression is None or not attribute.isidentifier():
+            # Anything unusual (nested, method, dotted attribute...) goes
+            # through the field itself
+            namespace[f"field{index}"] = field
+            reads.append(f"{value_name} = field{index}.serialize({attribute!r}, row)")
+            entries.append((key, value_name, True))
+            fallback = True
+            continue
+
+        if source == ATTRIBUTES:
+            reads.append(f"{value_name} = row.{attribute}")
+        elif source == INSTANCE_STATE:
+            reads.append(f"{value_name} = state[{attribute!r}]")
+        else:
+            reads.append(f"{value_name} = row[{source.index(attribute)}]")
+        entries.append((key, expression, False))
+
+    lines = ["def dump_row(row):"]
+    if source == INSTANCE_STATE:
+        lines.append("    state = row.__dict__")
+    lines.extend(f"    {read}" for read in reads)
+    if fallback:
+        # Built key by key so missing values are left out like marshmallow does
+        lines.append("    data = {}")
+        for key, expression, maybe_missing in entries:
+            if maybe_missing:
+                lines.append(f"    if {expression} is not _missing:")
+                lines.append(f"        data[{key!r}] = {expression}")
+            else:
+                lines.append(f"    data[{key!r}] = {expression}")
+        lines.append("    return data")
+    else:
+        lines.append("    return {")
+        lines.extend(
+            f"        {key!r}: {expression}," for key, expression, _ in entries
+        )
+        lines.append("    }")
+
+    exec("\n".join(lines), namespace)
+    return namespace["dump_row"]
+
+
+def _cache_key(schema):
+    only = tuple(sorted(schema.only)) if schema.only else None
+    return (
+        type(schema),
+        only,
+        tuple(sorted(schema.exclude)),
+        tuple(sorted(schema.load_only)),
+    )
+
+
+def compiled_for(schema, source):
+    """compile_schema(schema, source), built once per schema and source"""
+    key = (_cache_key(schema), source)
+    if key not in _compiled:
+        _compiled[key] = compile_schema(schema, source)
+    return _compiled[key]
+
+
+def _source_for(schema, row):
+    """Fastest way to read values from rows shaped like this one"""
+    if isinstance(row, Row):
+        names = tuple(row._fields)
+        wanted = [field.attribute or name for name, field in schema.dump_fields.items()]
+        if all(name in names for name in wanted if name.isidentifier()):
+            return names
+        return ATTRIBUTES
+    if hasattr(type(row), "__mapper__"):
+        return INSTANCE_STATE
+    return ATTRIBUTES
+
+
+def fast_dump(schema, rows):
+    """Drop-in for schema.dump(rows) on list (or single-row) responses"""
+    if not schema.many:
+        rows = [rows]
+    if not rows:
+        return []
+
+    source = _source_for(schema, rows[0])
+    dump_row = compiled_for(schema, source)
+    if dump_row is None:
+        return schema.dump(rows if schema.many else rows[0])
+
+    if source == INSTANCE_STATE:
+        dump_attributes = compiled_for(schema, ATTRIBUTES)
+        data = []
+        for row in rows:
+            try:
+                data.append(dump_row(row))
+            except KeyError:
+                # Expired or deferred attribute: let the ORM load it
+                data.append(dump_attributes(row))
+    else:
+        data = [dump_row(row) for row in rows]
+    return data if schema.many else data[0]
+
+
+def schema_columns(schema, model):
+    """Model columns a column-only select needs to feed fast_dump"""
+    columns = []
+    for name, field in schema.dump_fields.items():
+        columns.append(getattr(model, field.attribute or name))
+    return columns
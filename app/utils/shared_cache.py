@@ -0,0 +1,432 @@
+# Shared, tag-invalidated cache backends for Flask-Caching
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from flask_caching.backends.base import BaseCache
+from app.utils.replicas import read_primary
+
+DEFAULT_CACHE_FILE = "landlink_cache.sqlite"
+PRUNE_EVERY_WRITES = 500  # Expired rows are swept every N writes
+# Seconds a tag's version outlives its last entry; far longer than any loader,
+# so remember() still sees a bump that happened while it was loading
+VERSION_GRACE = 600
+
+
+ALL_ROWS = "*"
+
+# Names of the models served through cached_read; commits of anything else
+# are not tagged (see init_cache_invalidation)
+_cached_models = set()
+
+
+def model_tag(model, primary_key=None):
+    """Tag for every cached read of a model, or of one row of it
+
+    A list read is tagged with model_tag(Program); a single-row read with
+    row_tags(Program, program_id). Committing a change to a row invalidates
+    its row tag and its model tag; a bulk UPDATE/DELETE invalidates the
+    model tag and model_tag(Program, ALL_ROWS).
+    """
+    name = model if isinstance(model, str) else model.__name__
+    if primary_key is None:
+        return name
+    return f"{name}:{primary_key}"
+
+
+def row_tags(model, primary_key):
+    """Tags for a single-row read (its own row plus any bulk statement)"""
+    return [model_tag(model, primary_key), model_tag(model, ALL_ROWS)]
+
+
+class TaggedCacheMixin:
+    """Tag bookkeeping shared by the SQLite backend and its local stand-in
+
+    Each tag carries a version that is bumped on invalidation. remember()
+    reads the versions before running the loader and only stores the result
+    if they are unchanged, so a read that raced with a commit never caches
+    the pre-commit value.
+    """
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return 0 if timeout == 0 else time.time() + timeout
+
+    def remember(self, key, loader, tags=(), timeout=None):
+        """Return the cached value for key, or load, tag and cache it"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        versions = self.tag_versions(tags)
+        value = loader()
+        if value is not None:
+            self.set(key, value, timeout, tags=tags, expected_versions=versions)
+        return value
+
+
+class SQLiteTaggedCache(TaggedCacheMixin, BaseCache):
+    """Cache stored in one SQLite file that every worker on the host shares"""
+
+    def __init__(self, path=None, default_timeout=300, **kwargs):
+        super().__init__(default_timeout=default_timeout, **kwargs)
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(), DEFAULT_CACHE_FILE)
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as connection:
+            columns = {
+                row[1]
+                for row in connection.execute("PRAGMA table_info(cache_tag_versions)")
+            }
+            if columns and "bumped" not in columns:
+                # Cache file from before versions were pruned; start it over
+                connection.executescript("""
+                    DROP TABLE cache_tag_versions;
+                    DELETE FROM cache_entries;
+                    DELETE FROM cache_tags;
+                    """)
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key)
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key);
+                CREATE TABLE IF NOT EXISTS cache_tag_versions (
+                    tag TEXT PRIMARY KEY, version INTEGER NOT NULL, bumped REAL NOT NULL
+                );
+                """)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        # Resolved against the instance folder, not the working directory, so
+        # every worker on the host opens the same file
+        cache_dir = config["CACHE_DIR"]
+        if cache_dir:
+            cache_dir = os.path.join(app.instance_path, cache_dir)
+        else:
+            cache_dir = tempfile.gettempdir()
+        os.makedirs(cache_dir, exist_ok=True)
+        kwargs.pop("ignore_delete_many_errors", None)
+        return cls(os.path.join(cache_dir, DEFAULT_CACHE_FILE), *args, **kwargs)
+
+    def _connection(self):
+        # One connection per thread and per process (workers fork after init)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        row = (
+            self._connection()
+            .execute("SELECT value, expires FROM cache_entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        value, expires = row
+        if expires and expires < time.time():
+            return None
+        return pickle.loads(value)
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def tag_versions(self, tags):
+        if not tags:
+            return {}
+        tags = list(tags)
+        placeholders = ", ".join("?" for _ in tags)
+        rows = self._connection().execute(
+            "SELECT tag, version FROM cache_tag_versions "
+            f"WHERE tag IN ({placeholders})",
+            tags,
+        )
+        versions = dict.fromkeys(tags, 0)
+        versions.update(rows)
+        return versions
+
+    def set(self, key, value, timeout=None, tags=(), expected_versions=None):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if expected_versions is not None and expected_versions != (
+                self.tag_versions(expected_versions)
+            ):
+                connection.execute("ROLLBACK")
+                return False  # Invalidated while the value was being loaded
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires) "
+                "VALUES (?, ?, ?)",
+                (key, data, self._expires_at(timeout)),
+            )
+            connection.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            connection.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags],
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        self._wrote()
+        return True
+
+    def add(self, key, value, timeout=None):
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout)
+
+    def delete(self, key):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        deleted = connection.execute(
+            "DELETE FROM cache_entries WHERE key = ?", (key,)
+        ).rowcount
+        connection.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+        connection.execute("COMMIT")
+        return deleted > 0
+
+    def invalidate_tags(self, tags):
+        """Drop every entry carrying any of the tags and bump their versions"""
+        tags = list(tags)
+        if not tags:
+            return
+        placeholders = ", ".join("?" for _ in tags)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_tags "
+                f"WHERE tag IN ({placeholders}))",
+                tags,
+            )
+            connection.execute(
+                "DELETE FROM cache_tags WHERE key NOT IN "
+                "(SELECT key FROM cache_entries)"
+            )
+            now = time.time()
+            connection.executemany(
+                "INSERT INTO cache_tag_versions (tag, version, bumped) "
+                "VALUES (?, 1, ?) ON CONFLICT (tag) DO UPDATE "
+                "SET version = version + 1, bumped = excluded.bumped",
+                [(tag, now) for tag in tags],
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        self._wrote()
+
+    def clear(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM cache_entries")
+        connection.execute("DELETE FROM cache_tags")
+        connection.execute("COMMIT")
+        return True
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes % PRUNE_EVERY_WRITES == 0:
+            self._prune()
+
+    def _prune(self):
+        """Drop expired entries, and versions of tags nothing is cached under"""
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute(
+            "DELETE FROM cache_entries WHERE expires > 0 AND expires < ?", (now,)
+        )
+        connection.execute(
+            "DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)"
+        )
+        connection.execute(
+            "DELETE FROM cache_tag_versions WHERE bumped < ? "
+            "AND tag NOT IN (SELECT tag FROM cache_tags)",
+            (now - VERSION_GRACE,),
+        )
+        connection.execute("COMMIT")
+
+
+class LocalTaggedCache(TaggedCacheMixin, BaseCache):
+    """In-process stand-in with the same tagging API (tests, single worker)"""
+
+    def __init__(self, default_timeout=300, **kwargs):
+        super().__init__(default_timeout=default_timeout, **kwargs)
+        self._entries = {}  # key -> (value, expires)
+        self._tags = {}  # tag -> set of keys
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.pop("ignore_delete_many_errors", None)
+        return cls(*args, **kwargs)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires and expires < time.time():
+            return None
+        return value
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def tag_versions(self, tags):
+        return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def set(self, key, value, timeout=None, tags=(), expected_versions=None):
+        with self._lock:
+            if expected_versions is not None and expected_versions != (
+                self.tag_versions(expected_versions)
+            ):
+                return False
+            self._entries[key] = (value, self._expires_at(timeout))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+        return True
+
+    def add(self, key, value, timeout=None):
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._entries.pop(key, None)
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+        return True
+
+
+def _on_primary(loader):
+    def load():
+        with read_primary():
+            return loader()
+
+    return load
+
+
+def cached_read(cache, key, loader, tags=(), timeout=None):
+    """cache.cache.remember(), degrading to get/set on backends without tags
+
+    loader reads from the primary: a replica's rows cached under the
+    primary's tag versions would stay stale until the next invalidation.
+    """
+    backend = cache.cache
+    loader = _on_primary(loader)
+    if hasattr(backend, "remember"):
+        return backend.remember(key, loader, tags, timeout)
+    value = backend.get(key)
+    if value is None:
+        value = loader()
+        if value is not None:
+            backend.set(key, value, timeout)
+    return value
+
+
+def _changed_tags(instances):
+    tags = set()
+    for instance in instances:
+        model = type(instance)
+        mapper = getattr(model, "__mapper__", None)
+        if mapper is None or model.__name__ not in _cached_models:
+            continue
+        tags.add(model_tag(model))
+        identity = mapper.identity_key_from_instance(instance)[1]
+        if len(identity) == 1:
+            tags.add(model_tag(model, identity[0]))
+    return tags
+
+
+def _pending(session):
+    return session.info.setdefault("cache_tags", set())
+
+
+def invalidate_on_commit(session, tags):
+    """Queue tags for invalidation when the session next commits
+
+    For writes the session events cannot attribute to rows, such as Core
+    statements against a table.
+    """
+    _pending(session).update(tags)
+
+
+def _collect_flushed(session, flush_context):
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    _pending(session).update(_changed_tags(changed))
+
+
+def _collect_bulk(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.class_.__name__ in _cached_models:
+            # Rows are unknown, so every read of the model is invalidated
+            _pending(orm_execute_state.session).update(
+                [model_tag(mapper.class_), model_tag(mapper.class_, ALL_ROWS)]
+            )
+
+
+def _invalidate(session):
+    tags = session.info.pop("cache_tags", None)
+    if not tags or not has_app_context():
+        return
+    for backend in current_app.extensions.get("cache", {}).values():
+        if hasattr(backend, "invalidate_tags"):
+            backend.invalidate_tags(tags)
+
+
+def _discard(session, *args):
+    session.info.pop("cache_tags", None)
+
+
+INVALIDATION_EVENTS = [
+    ("after_flush", _collect_flushed),
+    ("do_orm_execute", _collect_bulk),
+    ("after_commit", _invalidate),
+    ("after_rollback", _discard),
+]
+
+
+def init_cache_invalidation(session, models):
+    """Invalidate tagged cache entries when a change to their rows commits
+
+    models are the ones read through cached_read; only their changes are
+    tagged, so commits of other models never write to the shared cache.
+    Tags are collected at flush time (ORM objects and ORM-enabled bulk
+    UPDATE/DELETE statements), applied to every tag-aware cache of the
+    current app after a successful commit and discarded on rollback.
+    Safe to call once per create_app.
+    """
+    _cached_models.update(model.__name__ for model in models)
+    for name, listener in INVALIDATION_EVENTS:
+        if not event.contains(session, name, listener):
+            event.listen(session, name, listener)
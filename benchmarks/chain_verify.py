@@ -0,0 +1,180 @@
+# Benchmark: full vs incremental wallet hash-chain verification
+#
+#   python -m benchmarks.chain_verify --wallets 5000 --transactions 20
+#
+# Builds valid chains, verifies them all (one process, then a pool), adds
+# a few transactions and verifies again from the checkpoints, then
+# tampers with three wallets and checks each break is reported.
+import argparse
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from sqlalchemy import create_engine, delete, event, update
+from sqlalchemy.orm import Session
+from app.models import db, Wallet, Transaction, WalletChainCheckpoint
+from app.blueprints.wallets.ledger import chain_hash
+from app.blueprints.wallets.chain import verify_chains
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 60})
+
+    @event.listens_for(engine, "connect")
+    def set_wal(connection, _):
+        connection.execute("PRAGMA journal_mode=WAL")
+
+    return engine
+
+
+def extend_chains(session, heads, count, day, rng, prefix):
+    """Append count valid transactions to every wallet in heads"""
+    rows = []
+    for wallet_id in list(heads):
+        for n in range(count):
+            transaction = SimpleNamespace(
+                transaction_id=f"{prefix}-{wallet_id}-{n:04d}",
+                wallet_id=wallet_id,
+                transaction_type=rng.choice(["ISSUANCE", "REDEMPTION"]),
+                transaction_amount=Decimal(rng.randrange(100, 10000)) / 100,
+                transaction_timestamp=day,
+            )
+            transaction_hash = chain_hash(heads[wallet_id], transaction)
+            rows.append(
+                dict(
+                    vars(transaction),
+                    transaction_status="COMPLETED",
+                    completed_at=day,
+                    previous_hash=heads[wallet_id],
+                    transaction_hash=transaction_hash,
+                    retry_count=0,
+                )
+            )
+            heads[wallet_id] = transaction_hash
+        if len(rows) >= 20000:
+            session.execute(Transaction.__table__.insert(), rows)
+            rows = []
+    if rows:
+        session.execute(Transaction.__table__.insert(), rows)
+    for wallet_id, head in heads.items():
+        session.execute(
+            update(Wallet)
+            .where(Wallet.wallet_id == wallet_id)
+            .values(last_transaction_hash=head)
+            .execution_options(synchronize_session=False)
+        )
+    session.commit()
+
+
+def run(session, label, **options):
+    summary = verify_chains(session, **options)
+    print(
+        f"{label:28} {summary['wallets_checked']:6} wallets "
+        f"{summary['transactions_verified']:8} transactions in "
+        f"{summary['seconds']:6.2f}s ({summary['processes']} processes), "
+        f"{summary['wallets_broken']} broken"
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hash-chain verification speed")
+    parser.add_argument("--wallets", type=int, default=5000)
+    parser.add_argument("--transactions", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "chains.db")
+    engine = make_engine(path)
+    db.metadata.create_all(
+        engine,
+        tables=[
+            Wallet.__table__,
+            Transaction.__table__,
+            WalletChainCheckpoint.__table__,
+        ],
+    )
+    rng = random.Random(3)
+    today = date.today()
+    with Session(engine) as session:
+        heads = {}
+        wallets = []
+        for i in range(args.wallets):
+            wallet_id = f"wallet-{i:07d}"
+            heads[wallet_id] = f"genesis-{i}"
+            wallets.append(
+                {
+                    "wallet_id": wallet_id,
+                    "client_id": f"client-{i}",
+                    "wallet_hash": heads[wallet_id],
+                    "created_at": today,
+                }
+            )
+        session.execute(Wallet.__table__.insert(), wallets)
+        extend_chains(
+            session, heads, args.transactions, today - timedelta(days=1), rng, "old"
+        )
+
+        run(session, "full, 1 process", full=True, processes=1)
+        run(session, "full, pool", full=True, processes=args.processes)
+        run(session, "incremental, nothing new", processes=args.processes)
+
+        moved = dict(rng.sample(sorted(heads.items()), max(3, args.wallets // 10)))
+        extend_chains(session, moved, 3, today, rng, "new")
+        heads.update(moved)
+        run(session, "incremental, 10% moved", processes=args.processes)
+
+        tampered, deleted, forked = sorted(moved)[:3]
+        session.execute(
+            update(Transaction)
+            .where(Transaction.transaction_id == f"new-{tampered}-0001")
+            .values(transaction_amount=Decimal("999.99"))
+        )
+        session.execute(
+            delete(Transaction).where(
+                Transaction.transaction_id == f"new-{deleted}-0001"
+            )
+        )
+        session.execute(
+            Transaction.__table__.insert(),
+            {
+                "transaction_id": f"forged-{forked}",
+                "wallet_id": forked,
+                "transaction_type": "REDEMPTION",
+                "transaction_amount": Decimal("1.00"),
+                "transaction_timestamp": today,
+                "transaction_status": "COMPLETED",
+                "completed_at": today,
+                "previous_hash": f"unknown-{forked}",
+                "transaction_hash": f"forged-{forked}",
+                "retry_count": 0,
+            },
+        )
+        # Each damaged wallet needs new activity (or full) to be looked at
+        session.execute(
+            update(WalletChainCheckpoint)
+            .where(WalletChainCheckpoint.wallet_id.in_([tampered, deleted, forked]))
+            .values(last_hash="stale")
+        )
+        session.commit()
+        summary = run(session, "full after tampering", full=True, processes=1)
+        kinds = {
+            report["wallet_id"]: {b["kind"] for b in report["breaks"]}
+            for report in summary["broken"]
+        }
+        assert kinds == {
+            tampered: {"hash_mismatch"},
+            deleted: {"missing_link"},
+            forked: {"orphan"},
+        }, kinds
+        print("  breaks reported:", {w: sorted(k) for w, k in kinds.items()})
+        # Broken wallets are re-checked (and still reported) on every run
+        assert run(session, "incremental, still broken")["wallets_broken"] == 3
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# Auto-CRUD checks and micro-benchmarks generated from app.models
+#
+#   python -m benchmarks.crud --update      # record a baseline on this machine
+#   python -m benchmarks.crud               # compare with it
+#
+# Every mapped model is introspected (columns, nullability, foreign keys,
+# defaults) to build valid rows. Each model then goes through create, read,
+# update and delete on in-memory SQLite, with the round trip checked at
+# every step, and every GET endpoint of the blueprints is called with the
+# ids of those rows. Median timings are compared with crud_baseline.json;
+# the script exits non-zero when an operation regresses past --threshold.
+# Timings only mean something on the machine that took them, so the
+# baseline is generated locally and is not checked in.
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from flask import url_for
+from sqlalchemy.exc import IntegrityError
+import config
+from app import create_app
+from app.models import db
+
+BASELINE = os.path.join(os.path.dirname(__file__), "crud_baseline.json")
+NOISE_MS = 1.0  # Smaller differences are run-to-run noise, whatever the ratio
+UPDATABLE = (str, int, float, Decimal)
+
+
+class ModelPlan:
+    """What a valid row of one model needs, read from its mapper"""
+
+    def __init__(self, mapper):
+        self.model = mapper.class_
+        self.table = mapper.local_table
+        self.name = self.model.__name__
+        self.primary_key = list(mapper.primary_key)
+        version = mapper.version_id_col
+        self.generated = {self.table.autoincrement_column, version} - {None}
+        # Required: NOT NULL and nothing fills it in (default or autoincrement)
+        self.required, self.optional, self.defaults = [], [], {}
+        for column in self.table.columns:
+            if column in self.generated:
+                continue
+            if column.default is not None and column.default.is_scalar:
+                self.defaults[column.key] = column.default.arg
+            elif column.nullable and not column.primary_key:
+                self.optional.append(column)
+            else:
+                self.required.append(column)
+        self.parents = {
+            column.key: next(iter(column.foreign_keys)).column
+            for column in self.table.columns
+            if column.foreign_keys
+        }
+        self.updatable = next(
+            (
+                column
+                for column in self.table.columns
+                if not column.primary_key
+                and column not in self.generated
+                and column.key not in self.parents
+                and _python_type(column) in UPDATABLE
+            ),
+            None,
+        )
+
+    def identity(self, instance):
+        return tuple(getattr(instance, column.key) for column in self.primary_key)
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def synthesize(column, n):
+    """A value of column's type, distinct for every n"""
+    python_type = _python_type(column)
+    if python_type is bool:
+        return n % 2 == 0
+    if python_type is int:
+        return n
+    if python_type is float:
+        return float(n)
+    if python_type is Decimal:
+        return Decimal(n)
+    if python_type is datetime:
+        return datetime(2024, 1, 1, n % 24)
+    if python_type is date:
+        return date.fromordinal(date(2024, 1, 1).toordinal() + n % 365)
+    value = f"{column.table.name}-{column.key}-{n}"
+    length = getattr(column.type, "length", None)
+    return value[-length:] if length else value  # Keep the distinct tail
+
+
+def median_ms(samples):
+    return round(statistics.median(samples) * 1000, 4)
+
+
+class CrudRunner:
+    def __init__(self, plans, repeat):
+        self.plans = plans
+        self.repeat = repeat
+        self.counter = 0
+        self.fixtures = {}  # Table name -> {column key: value} of a kept row
+
+    def next_n(self):
+        self.counter += 1
+        return self.counter
+
+    def values(self, plan):
+        """Required columns of a new row of plan
+
+        Foreign keys point at the fixture rows, except a foreign key that is
+        also the primary key (one row per parent), which gets a new parent.
+        """
+        n, row = self.next_n(), {}
+        for column in plan.required:
+            parent = plan.parents.get(column.key)
+            if parent is None:
+                row[column.key] = synthesize(column, n)
+            elif column.primary_key and parent.table.name in self.fixtures:
+                owner = self.plans[parent.table.name]
+                instance = owner.model(**self.values(owner))
+                db.session.add(instance)
+                db.session.commit()
+                row[column.key] = getattr(instance, parent.key)
+            else:
+                row[column.key] = self.fixtures[parent.table.name][parent.key]
+        return row
+
+    def seed_fixtures(self):
+        """One row per table, parents first, for foreign keys and endpoints"""
+        for table in db.metadata.sorted_tables:
+            plan = self.plans.get(table.name)
+            if plan is None:
+                continue
+            instance = plan.model(**self.values(plan))
+            db.session.add(instance)
+            db.session.commit()
+            self.fixtures[table.name] = {
+                column.key: getattr(instance, column.key) for column in table.columns
+            }
+
+    def check_not_null(self, plan):
+        """Leaving out a required column must be refused by the database"""
+        column = next((c for c in plan.required if not c.primary_key), None)
+        if column is None:
+            return
+        values = self.values(plan)
+        values[column.key] = None
+        db.session.add(plan.model(**values))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+        else:
+            raise AssertionError(f"{plan.name}.{column.key} accepted NULL")
+
+    def run(self, plan):
+        """Create/read/update/delete round trips; returns {operation: ms}"""
+        timings = {"create": [], "read": [], "update": [], "delete": []}
+        self.check_not_null(plan)
+        for _ in range(self.repeat):
+            values = self.values(plan)
+            instance = plan.model(**values)
+            started = time.perf_counter()
+            db.session.add(instance)
+            db.session.commit()
+            timings["create"].append(time.perf_counter() - started)
+            identity = plan.identity(instance)
+            db.session.expunge_all()  # Read from the database, not the session
+
+            started = time.perf_counter()
+            instance = db.session.get(plan.model, identity)
+            timings["read"].append(time.perf_counter() - started)
+            assert instance is not None, f"{plan.name} {identity} not found"
+            for key, value in values.items():
+                assert getattr(instance, key) == value, (plan.name, key, value)
+            for key, default in plan.defaults.items():
+                if key not in values:
+                    assert getattr(instance, key) == default, (plan.name, key)
+
+            if plan.updatable is not None:
+                key = plan.updatable.key
+                value = synthesize(plan.updatable, self.next_n())
+                started = time.perf_counter()
+                setattr(instance, key, value)
+                db.session.commit()
+                timings["update"].append(time.perf_counter() - started)
+                db.session.expunge_all()
+                instance = db.session.get(plan.model, identity)
+                assert getattr(instance, key) == value, (plan.name, key, "update")
+
+            started = time.perf_counter()
+            db.session.delete(instance)
+            db.session.commit()
+            timings["delete"].append(time.perf_counter() - started)
+            assert db.session.get(plan.model, identity) is None, plan.name
+        return {
+            name: median_ms(samples) for name, samples in timings.items() if samples
+        }
+
+
+def endpoint_arguments(rule, plans, fixtures):
+    """URL values for rule from fixture rows, or None when one is unknown
+
+    An argument is the primary key of the model it is named after
+    (wallet_id), else the primary key of the blueprint's own table
+    (programs/<program_id>).
+    """
+    values = {}
+    blueprint = rule.endpoint.partition(".")[0]
+    for argument in rule.arguments:
+        for plan in plans.values():
+            keys = [column.key for column in plan.primary_key]
+            if keys == [argument] and plan.table.name in fixtures:
+                values[argument] = fixtures[plan.table.name][argument]
+                break
+        else:
+            plan = plans.get(blueprint)
+            if plan is None or len(plan.primary_key) != 1:
+                return None
+            values[argument] = fixtures[plan.table.name][plan.primary_key[0].key]
+    return values
+
+
+def run_endpoints(app, plans, fixtures, repeat):
+    """Median ms of every blueprint GET endpoint; returns {label: ms}"""
+    blueprints = {name for name in app.blueprints if name != "swagger_ui"}
+    client = app.test_client()
+    timings = {}
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if "GET" not in rule.methods:
+            continue
+        if rule.endpoint.partition(".")[0] not in blueprints:
+            continue
+        arguments = endpoint_arguments(rule, plans, fixtures)
+        if arguments is None:
+            print(f"skipped GET {rule.rule}: no fixture for {sorted(rule.arguments)}")
+            continue
+        with app.test_request_context():
+            url = url_for(rule.endpoint, **arguments)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            samples.append(time.perf_counter() - started)
+            response.close()
+        assert response.status_code < 500, (url, response.status_code)
+        if response.status_code != 200:
+            print(f"GET {url} answered {response.status_code}")
+        timings[f"GET {rule.rule}"] = median_ms(samples)
+    return timings
+
+
+def compare(timings, baseline, threshold):
+    """Regressed operations as (name, baseline ms, current ms)"""
+    regressions = []
+    for name, current in sorted(timings.items()):
+        before = baseline.get(name)
+        if before is None:
+            print(f"new       {name}: {current:.3f}ms")
+        elif current > before * (1 + threshold) and current - before > NOISE_MS:
+            regressions.append((name, before, current))
+    for name in sorted(set(baseline) - set(timings)):
+        print(f"missing   {name} (in the baseline only)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generated CRUD checks and timings")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--threshold", type=float, default=0.5)  # +50% fails
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update", action="store_true")
+    args = parser.parse_args()
+
+    testing = config.TestingConfig
+    testing.SQLALCHEMY_DATABASE_URI = "sqlite://"
+    testing.SQLALCHEMY_ENGINE_OPTIONS = {}  # In-memory: one shared connection
+    testing.RATELIMIT_ENABLED = False
+    app = create_app("TestingConfig")
+
+    timings = {}
+    with app.app_context():
+        db.create_all()
+        plans = {
+            mapper.local_table.name: ModelPlan(mapper)
+            for mapper in db.Model.registry.mappers
+        }
+        runner = CrudRunner(plans, args.repeat)
+        runner.seed_fixtures()
+        for name, plan in sorted(plans.items()):
+            for operation, ms in runner.run(plan).items():
+                timings[f"{operation} {plan.name}"] = ms
+        print(f"CRUD round trips passed for {len(plans)} models")
+    timings.update(run_endpoints(app, plans, runner.fixtures, args.repeat))
+    width = max(map(len, timings))
+    for name, ms in sorted(timings.items()):
+        print(f"{name:{width}} {ms:9.3f}ms")
+
+    if args.update or not os.path.exists(args.baseline):
+        with open(args.baseline, "w") as handle:
+            json.dump(timings, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    regressions = compare(timings, baseline, args.threshold)
+    for name, before, current in regressions:
+        print(f"REGRESSED {name}: {before:.3f}ms -> {current:.3f}ms")
+    if regressions:
+        sys.exit(1)
+    print(f"no operation regressed more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# Benchmark: query plans and latency of the hot lookups with and without
+# the secondary indexes declared in app/models.py
+#
+#   python -m benchmarks.index_plan --rows 1000000
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine, text
+from app.models import (
+    db,
+    Token,
+    PublicPoolToken,
+    Transaction,
+    VerificationLog,
+    AlertLog,
+)
+from app.blueprints.fakedata.seeding import (
+    SeedContext,
+    resolve_scale,
+    token_rows,
+    public_pool_token_rows,
+    transaction_rows,
+    verification_log_rows,
+    alert_log_rows,
+)
+
+BENCHMARK_TABLES = [
+    (Token, token_rows),
+    (PublicPoolToken, public_pool_token_rows),
+    (Transaction, transaction_rows),
+    (VerificationLog, verification_log_rows),
+    (AlertLog, alert_log_rows),
+]
+
+# (name, SQL) pairs for the access patterns the indexes were designed for
+QUERIES = [
+    (
+        "tokens by area + status",
+        "SELECT count(*) FROM tokens "
+        "WHERE area_code = :area_code AND claim_status = 'ACTIVE'",
+    ),
+    (
+        "tokens by program + status",
+        "SELECT token_id FROM tokens "
+        "WHERE program_id = :program_id AND claim_status = 'ACTIVE' LIMIT 100",
+    ),
+    (
+        "pool tokens available in area",
+        "SELECT token_id FROM public_pool_tokens "
+        "WHERE area_code = :area_code AND claim_status = 'AVAILABLE' LIMIT 50",
+    ),
+    (
+        "wallet transaction history",
+        "SELECT transaction_id FROM transactions WHERE wallet_id = :wallet_id "
+        "ORDER BY transaction_timestamp DESC LIMIT 20",
+    ),
+    (
+        "kiosk verifications since date",
+        "SELECT count(*) FROM verification_logs "
+        "WHERE kiosk_id = :kiosk_id AND verification_timestamp >= :since",
+    ),
+    (
+        "client verification history",
+        "SELECT log_id FROM verification_logs WHERE client_id = :client_id "
+        "ORDER BY verification_timestamp DESC LIMIT 20",
+    ),
+    (
+        "verifications in date range",
+        "SELECT count(*) FROM verification_logs "
+        "WHERE verification_timestamp BETWEEN :since AND :until",
+    ),
+    (
+        "open critical alerts",
+        "SELECT alert_id FROM alert_logs "
+        "WHERE alert_status = 'OPEN' AND alert_severity = 'CRITICAL' LIMIT 100",
+    ),
+]
+
+
+def load_rows(engine, ctx, chunk_size=20000):
+    tables = [model.__table__ for model, _ in BENCHMARK_TABLES]
+    db.metadata.create_all(engine, tables=tables)
+    with engine.begin() as connection:
+        for model, row_generator in BENCHMARK_TABLES:
+            rows = row_generator(
+                ctx, ctx.rng_for(model.__tablename__), 0, ctx.scale[model.__tablename__]
+            )
+            bulk_insert_core(connection, model, rows, chunk_size)
+            print(f"  loaded {ctx.scale[model.__tablename__]} {model.__tablename__}")
+        connection.exec_driver_sql("ANALYZE")
+
+
+def bulk_insert_core(connection, model, rows, chunk_size):
+    # Same chunking as the seeding engine, on a plain connection (no app)
+    batch = []
+    statement = model.__table__.insert()
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_size:
+            connection.execute(statement, batch)
+            batch = []
+    if batch:
+        connection.execute(statement, batch)
+
+
+def query_params(ctx):
+    today = date.today()
+    return {
+        "area_code": "TX003",
+        "program_id": ctx.row_id("programs", 7),
+        "wallet_id": ctx.row_id("wallets", 42),
+        "kiosk_id": ctx.row_id("kiosks", 3),
+        "client_id": ctx.row_id("clients", 42),
+        "since": today - timedelta(days=30),
+        "until": today - timedelta(days=23),
+    }
+
+
+def run_queries(engine, params, repeats):
+    results = {}
+    with engine.connect() as connection:
+        for name, sql in QUERIES:
+            plan = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params)
+            plan_text = "; ".join(row[-1] for row in plan)
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                connection.execute(text(sql), params).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = (plan_text, statistics.median(timings))
+    return results
+
+
+def set_indexes(engine, create):
+    for model, _ in BENCHMARK_TABLES:
+        for index in model.__table__.indexes:
+            if create:
+                index.create(engine, checkfirst=True)
+            else:
+                index.drop(engine, checkfirst=True)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Query plans and latency with/without secondary indexes"
+    )
+    parser.add_argument("--rows", type=int, default=1000000, help="Rows per table")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--database", help="SQLite file (default: temporary)")
+    args = parser.parse_args()
+
+    scale = resolve_scale(
+        {
+            "clients": max(args.rows // 10, 1),
+            "wallets": max(args.rows // 10, 1),
+            "programs": 200,
+            "kiosks": 500,
+            "supervisors": 50,
+            "tokens": args.rows,
+            "public_pool_tokens": args.rows,
+            "transactions": args.rows,
+            "verification_logs": args.rows,
+            "alert_logs": args.rows,
+        }
+    )
+    ctx = SeedContext(scale, seed=1)
+
+    path = args.database or os.path.join(tempfile.mkdtemp(), "index_plan.db")
+    engine = create_engine(f"sqlite:///{path}")
+    print(f"Loading {args.rows} rows per table into {path}")
+    load_rows(engine, ctx)
+
+    params = query_params(ctx)
+    set_indexes(engine, create=True)
+    indexed = run_queries(engine, params, args.repeats)
+    set_indexes(engine, create=False)
+    unindexed = run_queries(engine, params, args.repeats)
+
+    for name, _ in QUERIES:
+        plan_with, ms_with = indexed[name]
+        plan_without, ms_without = unindexed[name]
+        print(f"\n{name}")
+        print(f"  without indexes: {ms_without:9.2f} ms  {plan_without}")
+        print(f"  with indexes:    {ms_with:9.2f} ms  {plan_with}")
+        print(f"  speedup:         {ms_without / max(ms_with, 0.001):9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
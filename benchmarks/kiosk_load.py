@@ -0,0 +1,483 @@
+# Load test: virtual kiosks running the visitor flow end to end
+#
+#   python -m benchmarks.kiosk_load --kiosks 32 --duration 30 --save before
+#   python -m benchmarks.kiosk_load --kiosks 32 --duration 30 --compare before
+#   python -m benchmarks.kiosk_load --server      # through a local WSGI server
+#
+# Each virtual kiosk is one thread bound to a seeded kiosk. It beats every
+# few seconds and serves one visitor after another from the seeded
+# population: start a session, verify, check the wallet, redeem a token,
+# sometimes transfer or claim from the public pool, end the session. The
+# app is driven in-process through the test client, or with --server over
+# HTTP through a threaded werkzeug server on localhost. Latency
+# percentiles and throughput are reported per step; --save keeps the run
+# under instance/load_runs and --compare prints the change against one.
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func, select, update
+from werkzeug.serving import make_server
+import config
+from app import create_app
+from app.models import db, Client, Kiosk, PublicPoolToken, Token, Wallet
+from app.blueprints.fakedata.seeding import seed
+
+# Seeded population; override per table with --scale table=count
+LOAD_SCALE = {
+    "kiosks": 40,
+    "clients": 2000,
+    "wallets": 2000,
+    "programs": 20,
+    "tokens": 4000,
+    "public_pool_tokens": 2000,
+    "transactions": 2000,
+    "kiosk_sessions": 500,
+    "verification_logs": 500,
+    "alert_logs": 50,
+}
+HEARTBEAT_INTERVAL = 5.0  # Seconds between beats of one kiosk
+VERIFIED_RATE = 0.9  # Visitors who pass verification
+TRANSFER_RATE = 0.2  # Verified visitors who also transfer
+CLAIM_RATE = 0.1  # Verified visitors who also claim a pool token
+
+# Step -> (endpoint, statuses that are normal outcomes rather than errors)
+STEPS = {
+    "heartbeat": ("POST /kiosks/<kiosk_id>/heartbeat", {202}),
+    "start_session": ("POST /kiosk-sessions/", {201}),
+    "verify": ("POST /verification/", {202}),
+    "wallet": ("GET /wallets/<wallet_id>", {200}),
+    # 422: insufficient balance, 429: kiosk daily limit, 409: hot wallet
+    "redeem": ("POST /wallets/<wallet_id>/transactions", {201, 409, 422, 429}),
+    "transfer": ("POST /wallets/<wallet_id>/transactions", {201, 409, 422, 429}),
+    "pool_claim": ("POST /public-pool-tokens/claim", {201, 404}),  # 404: exhausted
+    "end_session": ("POST /kiosk-sessions/<session_id>/end", {200}),
+}
+
+
+class Population:
+    """Kiosks and verifiable visitors (active wallet, a token) from the seed"""
+
+    def __init__(self):
+        self.kiosks = db.session.execute(
+            select(Kiosk.kiosk_id, Kiosk.kiosk_location).order_by(Kiosk.kiosk_id)
+        ).all()
+        tokens = {}
+        for client_id, token_id, program_id in db.session.execute(
+            select(Token.client_id, Token.token_id, Token.program_id)
+        ):
+            tokens.setdefault(client_id, (token_id, program_id))
+        self.visitors = [
+            (client_id, area_code, wallet_id) + tokens[client_id]
+            for client_id, area_code, wallet_id in db.session.execute(
+                select(Client.client_id, Client.area_code, Wallet.wallet_id)
+                .join(Wallet, Wallet.client_id == Client.client_id)
+                .where(Wallet.wallet_status == "ACTIVE")
+                .order_by(Client.client_id)
+            )
+            if client_id in tokens
+        ]
+        self.pool_tokens = db.session.scalar(
+            select(func.count())
+            .select_from(PublicPoolToken)
+            .where(PublicPoolToken.claim_status == "AVAILABLE")
+        )
+        if not self.kiosks or not self.visitors:
+            raise SystemExit("No kiosks or no active wallets with tokens to visit")
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        data = response.get_json(silent=True)
+        response.close()
+        return response.status_code, data
+
+
+class HttpClient:
+    def __init__(self, host, port):
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+
+    def request(self, method, path, body=None):
+        headers = {}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # Reopened by the next request
+            return 0, None
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = None
+        return response.status, data
+
+
+class Recorder:
+    """Latency samples and statuses per step, shared by every kiosk"""
+
+    def __init__(self):
+        self.samples = {step: [] for step in STEPS}
+        self.statuses = {step: Counter() for step in STEPS}
+        self.visits = 0
+        self._lock = threading.Lock()
+
+    def record(self, step, status, seconds):
+        with self._lock:
+            self.samples[step].append(seconds)
+            self.statuses[step][status] += 1
+
+    def visited(self):
+        with self._lock:
+            self.visits += 1
+
+
+class VirtualKiosk(threading.Thread):
+    def __init__(self, number, kiosk, population, client, recorder, args, stop):
+        super().__init__(name=f"kiosk-{number}", daemon=True)
+        self.kiosk_id, self.location = kiosk
+        self.population = population
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.stop = stop
+        self.rng = random.Random(f"{args.seed}:{number}")
+        self.delay = args.ramp_up * number / max(1, args.kiosks)
+
+    def call(self, step, method, path, body=None):
+        started = time.perf_counter()
+        status, data = self.client.request(method, path, body)
+        self.recorder.record(step, status, time.perf_counter() - started)
+        if self.args.think:
+            time.sleep(self.rng.uniform(0, 2 * self.args.think))
+        return status, data
+
+    def run(self):
+        if self.stop.wait(self.delay):
+            return
+        next_beat = 0.0
+        while not self.stop.is_set():
+            if time.monotonic() >= next_beat:
+                next_beat = time.monotonic() + HEARTBEAT_INTERVAL
+                self.call(
+                    "heartbeat",
+                    "POST",
+                    f"/kiosks/{self.kiosk_id}/heartbeat",
+                    {
+                        "kiosk_status": "ONLINE",
+                        "uptime_percentage": round(self.rng.uniform(95, 100), 2),
+                    },
+                )
+            self.visit(self.rng.choice(self.population.visitors))
+            self.recorder.visited()
+
+    def visit(self, visitor):
+        client_id, area_code, wallet_id, token_id, program_id = visitor
+        status, session = self.call(
+            "start_session",
+            "POST",
+            "/kiosk-sessions/",
+            {"kiosk_id": self.kiosk_id, "hashed_user_id": client_id},
+        )
+        verified = self.rng.random() < VERIFIED_RATE
+        self.call(
+            "verify",
+            "POST",
+            "/verification/",
+            {
+                "client_id": client_id,
+                "program_id": program_id,
+                "kiosk_id": self.kiosk_id,
+                "kiosk_location": self.location,
+                "verification_status": "SUCCESS" if verified else "FAILED",
+                "ai_confidence_score": round(self.rng.uniform(0.3, 0.99), 3),
+                "dual_verification_passed": verified,
+            },
+        )
+        if verified:
+            self.call("wallet", "GET", f"/wallets/{wallet_id}")
+            self.call(
+                "redeem",
+                "POST",
+                f"/wallets/{wallet_id}/transactions",
+                {
+                    "transaction_type": "REDEMPTION",
+                    "amount": self.rng.randint(1, 20),
+                    "token_id": token_id,
+                    "kiosk_id": self.kiosk_id,
+                    "transaction_location": self.location,
+                },
+            )
+            if self.rng.random() < TRANSFER_RATE:
+                self.call(
+                    "transfer",
+                    "POST",
+                    f"/wallets/{wallet_id}/transactions",
+                    {
+                        "transaction_type": "TRANSFER",
+                        "amount": self.rng.randint(1, 10),
+                        "kiosk_id": self.kiosk_id,
+                    },
+                )
+            if self.rng.random() < CLAIM_RATE:
+                self.call(
+                    "pool_claim",
+                    "POST",
+                    "/public-pool-tokens/claim",
+                    {
+                        "area_code": area_code,
+                        "user_id": client_id,
+                        "kiosk_id": self.kiosk_id,
+                    },
+                )
+        if status == 201:
+            self.call(
+                "end_session",
+                "POST",
+                f"/kiosk-sessions/{session['session_id']}/end",
+                {
+                    "session_status": "COMPLETED" if verified else "ABANDONED",
+                    "identity_verified": verified,
+                },
+            )
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(recorder, elapsed):
+    steps, requests, errors = {}, 0, 0
+    for step, samples in recorder.samples.items():
+        if not samples:
+            continue
+        samples = sorted(seconds * 1000 for seconds in samples)
+        statuses = recorder.statuses[step]
+        failed = sum(n for s, n in statuses.items() if s not in STEPS[step][1])
+        steps[step] = {
+            "endpoint": STEPS[step][0],
+            "requests": len(samples),
+            "errors": failed,
+            "statuses": {str(s): n for s, n in sorted(statuses.items())},
+            "rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(samples, 0.5), 3),
+            "p95_ms": round(percentile(samples, 0.95), 3),
+            "p99_ms": round(percentile(samples, 0.99), 3),
+        }
+        requests += len(samples)
+        errors += failed
+    return {
+        "visits": recorder.visits,
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 2),
+        "visits_per_second": round(recorder.visits / elapsed, 2),
+        "steps": steps,
+    }
+
+
+def report(summary):
+    print(
+        f"{'step':13} {'endpoint':38} {'requests':>8} {'errors':>6} {'req/s':>7} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}  statuses"
+    )
+    for step, row in summary["steps"].items():
+        statuses = " ".join(f"{s}:{n}" for s, n in row["statuses"].items())
+        print(
+            f"{step:13} {row['endpoint']:38} {row['requests']:8} {row['errors']:6} "
+            f"{row['rps']:7.1f} {row['p50_ms']:7.1f} {row['p95_ms']:7.1f} "
+            f"{row['p99_ms']:7.1f}  {statuses}"
+        )
+    print(
+        f"{summary['visits']} visits ({summary['visits_per_second']}/s), "
+        f"{summary['requests']} requests ({summary['rps']}/s), "
+        f"{summary['errors']} errors"
+    )
+
+
+def compare(summary, saved):
+    """Change of each step's throughput and percentiles against a saved run"""
+    print(f"\nagainst {saved['name']} ({saved['started_at']}, {saved['mode']}):")
+    print(f"{'step':13} {'req/s':>16} {'p50 ms':>16} {'p95 ms':>16} {'p99 ms':>16}")
+
+    def change(before, after):
+        if not before:
+            return f"{after:>16}"
+        return f"{after:7.1f} ({(after - before) / before:+5.0%})"
+
+    for step, row in summary["steps"].items():
+        before = saved["summary"]["steps"].get(step)
+        if before is None:
+            print(f"{step:13} (not in the saved run)")
+            continue
+        print(
+            f"{step:13} "
+            + " ".join(
+                change(before[key], row[key])
+                for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            )
+        )
+    print(
+        f"{'total':13} "
+        + change(saved["summary"]["rps"], summary["rps"])
+        + f"  errors {saved['summary']['errors']} -> {summary['errors']}"
+    )
+
+
+def prepare(args):
+    """App on the load database, seeded (reproducibly) unless it has kiosks"""
+    testing = config.TestingConfig
+    path = None
+    if args.database is None:
+        path = os.path.join(tempfile.mkdtemp(), "kiosk_load.db")
+        args.database = f"sqlite:///{path}"
+    testing.SQLALCHEMY_DATABASE_URI = args.database
+    testing.RATELIMIT_ENABLED = False  # Every virtual kiosk shares one address
+    app = create_app("TestingConfig")
+    scale = dict(LOAD_SCALE)
+    for item in args.scale:
+        table, _, count = item.partition("=")
+        scale[table] = int(count)
+    with app.app_context():
+        db.create_all()
+        if db.session.scalar(select(Kiosk.kiosk_id).limit(1)) is None:
+            started = time.perf_counter()
+            created = seed(scale=scale, seed=args.seed)
+            # Seeded daily limits are a few hundred per kiosk; raise them so
+            # the run measures the ledger rather than a wall of 429s
+            if not args.keep_limits:
+                db.session.execute(
+                    update(Kiosk).values(
+                        daily_transaction_limit=10**9, current_daily_count=0
+                    )
+                )
+                db.session.commit()
+            print(
+                f"seeded {sum(created.values())} rows in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+        population = Population()
+    return app, population, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Virtual kiosk load test")
+    parser.add_argument("--kiosks", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--ramp-up", type=float, default=2.0)
+    parser.add_argument("--think", type=float, default=0.0)  # Mean seconds
+    parser.add_argument("--server", action="store_true")
+    parser.add_argument("--database")  # Default: a fresh seeded SQLite file
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--scale",
+        action="append",
+        default=[],
+        metavar="TABLE=COUNT",
+        help="Row count override, e.g. --scale clients=10000",
+    )
+    parser.add_argument("--keep-limits", action="store_true")
+    parser.add_argument("--save", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--runs-dir")
+    args = parser.parse_args()
+
+    app, population, path = prepare(args)
+    runs_dir = args.runs_dir or os.path.join(app.instance_path, "load_runs")
+    saved = None
+    if args.compare:
+        with open(os.path.join(runs_dir, f"{args.compare}.json")) as handle:
+            saved = json.load(handle)
+
+    server = None
+    if args.server:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)  # No access log
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def client():
+            return HttpClient("127.0.0.1", server.server_port)
+
+    else:
+
+        def client():
+            return InProcessClient(app)
+
+    mode = "server" if args.server else "in-process"
+    print(
+        f"{args.kiosks} virtual kiosks ({mode}) for {args.duration}s over "
+        f"{len(population.kiosks)} kiosks, {len(population.visitors)} visitors, "
+        f"{population.pool_tokens} pool tokens"
+    )
+    recorder, stop = Recorder(), threading.Event()
+    kiosks = [
+        VirtualKiosk(
+            number,
+            population.kiosks[number % len(population.kiosks)],
+            population,
+            client(),
+            recorder,
+            args,
+            stop,
+        )
+        for number in range(args.kiosks)
+    ]
+    started_at = datetime.now().isoformat(timespec="seconds")
+    started = time.perf_counter()
+    for kiosk in kiosks:
+        kiosk.start()
+    time.sleep(args.duration)
+    stop.set()
+    for kiosk in kiosks:
+        kiosk.join()
+    summary = summarize(recorder, time.perf_counter() - started)
+    if server is not None:
+        server.shutdown()
+
+    report(summary)
+    if saved is not None:
+        compare(summary, saved)
+    if args.save:
+        os.makedirs(runs_dir, exist_ok=True)
+        run = {
+            "name": args.save,
+            "started_at": started_at,
+            "mode": mode,
+            "kiosks": args.kiosks,
+            "duration": args.duration,
+            "think": args.think,
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split("://")[0],
+            "summary": summary,
+        }
+        with open(os.path.join(runs_dir, f"{args.save}.json"), "w") as handle:
+            json.dump(run, handle, indent=2)
+            handle.write("\n")
+        print(f"saved as {args.save}")
+    if path is not None:
+        # Write what the background writers hold before the file goes
+        for name in ("kiosk_heartbeats", "kiosk_counters", "audit_writer"):
+            app.extensions[name].close()
+        with app.app_context():
+            db.engine.dispose()
+        os.remove(path)
+    if summary["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# Stress check: many parallel redeemers against a few hot wallets
+#
+#   python -m benchmarks.ledger_stress --workers 16 --redemptions 50
+#
+# Every worker process redeems against the same wallets at once. At the end
+# each wallet must satisfy
+#   balance == opening balance + credited - debited amounts
+#   received/redeemed == counts of its COMPLETED credits/debits
+# and its COMPLETED transactions must form one unbroken hash chain, i.e. no
+# update was lost and none was applied twice.
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+from app.models import db, Wallet, Transaction
+from app.blueprints.wallets.ledger import (
+    new_transaction,
+    apply_transaction,
+    apply_pending,
+    chain_hash,
+)
+
+OPENING_BALANCE = Decimal("1000.00")
+# SQLite locks the whole file, so every writer contends with every other one;
+# allow far more optimistic retries than the production default
+STRESS_RETRIES = 500
+
+
+def make_engine(path):
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"timeout": 30, "isolation_level": None}
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_wal(connection, _):
+        connection.execute("PRAGMA journal_mode=WAL")
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        # Deferred on purpose: a writer whose snapshot went stale fails its
+        # UPDATE and has to take the ledger's retry path
+        connection.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+def redeemer(path, wallet_ids, redemptions, seed):
+    engine = make_engine(path)
+    rng = random.Random(seed)
+    outcomes = {"COMPLETED": 0, "FAILED": 0, "retries": 0}
+    with Session(engine) as session:
+        for _ in range(redemptions):
+            wallet_id = rng.choice(wallet_ids)
+            if rng.random() < 0.2:
+                transaction_type = "ISSUANCE"
+            else:
+                transaction_type = "REDEMPTION"
+            amount = Decimal(rng.randint(1, 5000)) / 100
+            transaction = apply_transaction(
+                new_transaction(wallet_id, amount, transaction_type),
+                session,
+                max_retries=STRESS_RETRIES,
+            )
+            outcomes[transaction.transaction_status] += 1
+            outcomes["retries"] += transaction.retry_count
+    engine.dispose()
+    return outcomes
+
+
+def check_wallet(session, wallet):
+    transactions = (
+        session.execute(
+            select(Transaction).where(
+                Transaction.wallet_id == wallet.wallet_id,
+                Transaction.transaction_status == "COMPLETED",
+            )
+        )
+        .scalars()
+        .all()
+    )
+    credits = [t for t in transactions if t.transaction_type == "ISSUANCE"]
+    debits = [t for t in transactions if t.transaction_type != "ISSUANCE"]
+    received = sum((t.transaction_amount for t in credits), Decimal("0.00"))
+    redeemed = sum((t.transaction_amount for t in debits), Decimal("0.00"))
+    assert wallet.total_tokens_received == len(credits), (wallet.wallet_id, "received")
+    assert wallet.total_tokens_redeemed == len(debits), (wallet.wallet_id, "redeemed")
+    assert wallet.wallet_balance == OPENING_BALANCE + received - redeemed
+    assert wallet.wallet_balance >= 0
+
+    # Walk the chain from the wallet hash; every link must be used exactly once
+    by_previous = {t.previous_hash: t for t in transactions}
+    assert len(by_previous) == len(transactions), "forked hash chain"
+    link = wallet.wallet_hash
+    for _ in transactions:
+        transaction = by_previous[link]
+        assert transaction.transaction_hash == chain_hash(link, transaction)
+        link = transaction.transaction_hash
+    assert link == wallet.last_transaction_hash
+    return len(transactions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel wallet ledger stress")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--redemptions", type=int, default=50)
+    parser.add_argument("--wallets", type=int, default=2)
+    parser.add_argument("--queued", type=int, default=2000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "ledger_stress.db")
+    engine = make_engine(path)
+    db.metadata.create_all(engine, tables=[Wallet.__table__, Transaction.__table__])
+    wallet_ids = [f"wallet-{i}" for i in range(args.wallets)]
+    with Session(engine) as session:
+        for wallet_id in wallet_ids:
+            session.add(
+                Wallet(
+                    wallet_id=wallet_id,
+                    client_id=wallet_id,  # SQLite does not enforce the FK
+                    wallet_balance=OPENING_BALANCE,
+                    wallet_hash=f"genesis-{wallet_id}",
+                    created_at=date.today(),
+                )
+            )
+        session.commit()
+
+    started = time.perf_counter()
+    totals = {"COMPLETED": 0, "FAILED": 0, "retries": 0}
+    with ProcessPoolExecutor(args.workers) as pool:
+        futures = [
+            pool.submit(redeemer, path, wallet_ids, args.redemptions, seed)
+            for seed in range(args.workers)
+        ]
+        for future in futures:
+            for status, count in future.result().items():
+                totals[status] += count
+    elapsed = time.perf_counter() - started
+    applied = args.workers * args.redemptions
+    print(
+        f"{applied} parallel transactions on {args.wallets} wallets in "
+        f"{elapsed:.2f}s ({applied / elapsed:.0f}/s): "
+        f"{totals['COMPLETED']} completed, {totals['FAILED']} refused, "
+        f"{totals['retries']} optimistic retries"
+    )
+
+    # Queue a backlog and drain it with competing batch appliers; a few rows
+    # point at a wallet that does not exist and must be dropped, not stored
+    rng = random.Random(0)
+    with Session(engine) as session:
+        session.add_all(
+            new_transaction(
+                rng.choice(wallet_ids + ["missing"] * (rng.random() < 0.01)),
+                Decimal(rng.randint(1, 5000)) / 100,
+                rng.choice(["ISSUANCE", "REDEMPTION"]),
+            )
+            for _ in range(args.queued)
+        )
+        session.commit()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(4) as pool:
+        results = list(pool.map(drain, [path] * 4))
+    elapsed = time.perf_counter() - started
+    drained = sum(completed + failed for completed, failed in results)
+    assert drained == args.queued, (drained, args.queued)
+    print(
+        f"{args.queued} queued transactions drained by 4 appliers in "
+        f"{elapsed:.2f}s ({args.queued / elapsed:.0f}/s)"
+    )
+
+    with Session(engine) as session:
+        orphans = select(Transaction).where(Transaction.wallet_id == "missing")
+        assert session.execute(orphans).first() is None, "orphan transaction kept"
+        chained = 0
+        for wallet in session.execute(select(Wallet)).scalars():
+            chained += check_wallet(session, wallet)
+    print(f"OK: no lost or duplicated updates ({chained} chained transactions)")
+
+
+def drain(path):
+    engine = make_engine(path)
+    with Session(engine) as session:
+        result = apply_pending(session, batch_size=100, max_retries=STRESS_RETRIES)
+    engine.dispose()
+    return result
+
+
+if __name__ == "__main__":
+    main()
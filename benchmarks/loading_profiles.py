@@ -0,0 +1,215 @@
+# Benchmark: statements per read with loading profiles vs lazy loading
+#
+#   python -m benchmarks.loading_profiles --scale 20
+#
+# Loads client summaries, kiosk details and wallet details at a small and a
+# large size and checks each profile runs the same number of statements at
+# both (while lazy loading grows with the rows), that child caps hold and
+# that nothing outside a profile is lazily loaded.
+import argparse
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session
+from app.models import (
+    db,
+    Client,
+    Kiosk,
+    KioskSession,
+    Token,
+    Transaction,
+    VerificationLog,
+    Wallet,
+)
+from app.blueprints.client.profiles import client_summary, RECENT_VERIFICATIONS
+from app.blueprints.kiosks.profiles import kiosk_detail, RECENT_TRANSACTIONS
+from app.blueprints.wallets.profiles import wallet_detail
+from app.utils.pagination import MAX_PAGE_SIZE
+
+TABLES = [Client, Kiosk, KioskSession, Token, Transaction, VerificationLog, Wallet]
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self.listener)
+
+    def listener(self, *args):
+        self.count += 1
+
+    def measure(self, action):
+        self.count = 0
+        started = time.perf_counter()
+        result = action()
+        return self.count, time.perf_counter() - started, result
+
+
+def seed(session, clients, children, tag):
+    """clients clients, each with children wallets, tokens, logs, ...; one
+    kiosk and the first wallet carry clients * children rows"""
+    today = date.today()
+    kiosk_id, busy_wallet = f"kiosk-{tag}", f"wallet-{tag}-00000-000"
+    session.add(
+        Kiosk(
+            kiosk_id=kiosk_id,
+            kiosk_location="location",
+            area_code=tag,
+            installed_date=today,
+        )
+    )
+    rows = {model: [] for model in TABLES}
+    for c in range(clients):
+        client_id = f"client-{tag}-{c:05d}"
+        rows[Client].append(
+            dict(
+                client_id=client_id,
+                client_name=f"Client {c}",
+                area_code=tag,
+                created_at=today - timedelta(days=c),
+                login_location_IP=0,
+            )
+        )
+        for n in range(children):
+            wallet_id = f"wallet-{tag}-{c:05d}-{n:03d}"
+            day = today - timedelta(days=n)
+            rows[Wallet].append(
+                dict(
+                    wallet_id=wallet_id,
+                    client_id=client_id,
+                    wallet_hash=wallet_id,
+                    created_at=today,
+                )
+            )
+            rows[Token].append(
+                dict(
+                    token_id=f"token-{tag}-{c:05d}-{n:03d}",
+                    client_id=client_id,
+                    program_id="program",
+                    token_amount=10.0,
+                    weekly_limit=10.0,
+                    area_code=tag,
+                    issued_at=today,
+                )
+            )
+            rows[VerificationLog].append(
+                dict(
+                    client_id=client_id,
+                    program_id="program",
+                    verification_status="SUCCESS",
+                    kiosk_location="location",
+                    kiosk_id=kiosk_id,
+                    verification_timestamp=day,
+                )
+            )
+            rows[KioskSession].append(
+                dict(
+                    session_id=f"session-{tag}-{c:05d}-{n:03d}",
+                    kiosk_id=kiosk_id,
+                    session_status="COMPLETED",
+                    session_start=day,
+                    last_activity=day,
+                )
+            )
+            rows[Transaction].append(
+                dict(
+                    transaction_id=f"transaction-{tag}-{c:05d}-{n:03d}",
+                    wallet_id=busy_wallet,
+                    kiosk_id=kiosk_id,
+                    transaction_type="REDEMPTION",
+                    transaction_amount=1,
+                    transaction_hash=f"hash-{c}-{n}",
+                    transaction_timestamp=day,
+                )
+            )
+    for model, values in rows.items():
+        if values:
+            session.execute(model.__table__.insert(), values)
+    session.commit()
+    return kiosk_id, busy_wallet
+
+
+def lazy_summaries(session, tag):
+    clients = session.scalars(select(Client).where(Client.area_code == tag)).all()
+    return [(len(c.wallets), len(c.tokens), len(c.verification_logs)) for c in clients]
+
+
+def profile_summaries(session, tag):
+    statement = client_summary.select(Client.area_code == tag)
+    return client_summary.load(session, statement)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loading profile statement counts")
+    parser.add_argument("--scale", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "profiles.db")
+    engine = create_engine(f"sqlite:///{path}")
+    db.metadata.create_all(engine, tables=[model.__table__ for model in TABLES])
+    counter = StatementCounter(engine)
+    # A full page of clients at most: IN lists are split every IN_BATCH keys
+    sizes = {"small": (5, 2), "large": (MAX_PAGE_SIZE, args.scale)}
+
+    statements = {}
+    with Session(engine) as session:
+        seeded = {tag: seed(session, *size, tag) for tag, size in sizes.items()}
+    for tag, (clients, children) in sizes.items():
+        kiosk_id, wallet_id = seeded[tag]
+        with Session(engine) as session:
+            lazy, lazy_seconds, _ = counter.measure(
+                lambda: lazy_summaries(session, tag)
+            )
+        results = {}
+        with Session(engine) as session:
+            for name, action in (
+                ("client_summary", lambda: profile_summaries(session, tag)),
+                ("kiosk_detail", lambda: kiosk_detail.get(session, kiosk_id)),
+                ("wallet_detail", lambda: wallet_detail.get(session, wallet_id)),
+            ):
+                count, seconds, loaded = counter.measure(action)
+                statements.setdefault(name, set()).add(count)
+                results[name] = loaded
+                print(f"{tag:5} {name:15} {count:3} statements {seconds * 1000:8.1f}ms")
+            print(
+                f"{tag:5} {'lazy summaries':15} {lazy:3} statements "
+                f"{lazy_seconds * 1000:8.1f}ms ({clients} clients x {children})"
+            )
+
+            summaries = results["client_summary"]
+            assert len(summaries.rows) == clients
+            for client in summaries.rows:
+                assert len(client.wallets) == children
+                assert summaries.count(client, "tokens") == children
+                logs = client.verification_logs
+                assert len(logs) == min(children, RECENT_VERIFICATIONS)
+                days = [log.verification_timestamp for log in logs]
+                assert days == sorted(days, reverse=True)
+            kiosk = results["kiosk_detail"].rows[0]
+            assert len(kiosk.transactions) == min(
+                clients * children, RECENT_TRANSACTIONS
+            )
+            assert results["kiosk_detail"].count(kiosk, "verification_logs") == (
+                clients * children
+            )
+            wallet = results["wallet_detail"].rows[0]
+            assert wallet.client.client_name == "Client 0"
+            # Anything outside the profile raises instead of querying
+            try:
+                summaries.rows[0].tokens
+            except InvalidRequestError:
+                pass
+            else:
+                raise AssertionError("client_summary lazily loaded tokens")
+
+    for name, counts in statements.items():
+        assert len(counts) == 1, f"{name} statement count varies: {sorted(counts)}"
+    print("statement counts are constant:", {n: c.pop() for n, c in statements.items()})
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Benchmark: N concurrent claimers draining one area of the public pool
+#
+#   python -m benchmarks.pool_claims --tokens 4000 --processes 4 --threads 4
+#
+# Compares naive "first AVAILABLE row, then conditional UPDATE" claiming
+# with ClaimAllocator. Both must hand out every token exactly once; the
+# naive one wastes most attempts fighting over the same first rows.
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from sqlalchemy import create_engine, event, select, func
+from sqlalchemy.orm import Session
+from app.models import db, PublicPoolToken
+from app.blueprints.public_pool_tokens.claims import (
+    ClaimAllocator,
+    PoolExhausted,
+    _claim_statement,
+)
+
+AREA = "AREA-1"
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"timeout": 60})
+
+    @event.listens_for(engine, "connect")
+    def set_wal(connection, _):
+        connection.execute("PRAGMA journal_mode=WAL")
+
+    return engine
+
+
+def naive_claim(session, user_id, stats):
+    while True:
+        token_id = session.execute(
+            select(PublicPoolToken.token_id)
+            .where(PublicPoolToken.area_code == AREA)
+            .where(PublicPoolToken.claim_status == "AVAILABLE")
+            .order_by(PublicPoolToken.token_id)
+            .limit(1)
+        ).scalar()
+        if token_id is None:
+            session.commit()
+            raise PoolExhausted(AREA)
+        claimed = session.execute(
+            _claim_statement(token_id, user_id, "kiosk", date.today())
+        ).rowcount
+        session.commit()
+        if claimed:
+            return token_id
+        stats["conflicts"] += 1
+
+
+def claimer_process(path, strategy, threads, worker):
+    engine = make_engine(path)
+    allocator = ClaimAllocator()
+    stats = {"claimed": 0, "conflicts": 0}
+    lock = threading.Lock()
+
+    def claim_until_empty(thread):
+        local = {"claimed": 0, "conflicts": 0}
+        user_id = f"user-{worker}-{thread}"
+        with Session(engine) as session:
+            while True:
+                try:
+                    if strategy == "naive":
+                        naive_claim(session, user_id, local)
+                    else:
+                        allocator.claim(AREA, user_id, "kiosk", session=session)
+                except PoolExhausted:
+                    break
+                local["claimed"] += 1
+        with lock:
+            stats["claimed"] += local["claimed"]
+            stats["conflicts"] += local["conflicts"]
+
+    workers = [
+        threading.Thread(target=claim_until_empty, args=(thread,))
+        for thread in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    stats["conflicts"] += allocator.conflicts
+    engine.dispose()
+    return stats
+
+
+def run(strategy, args):
+    path = os.path.join(tempfile.mkdtemp(), f"pool_{strategy}.db")
+    engine = make_engine(path)
+    db.metadata.create_all(engine, tables=[PublicPoolToken.__table__])
+    with Session(engine) as session:
+        session.execute(
+            PublicPoolToken.__table__.insert(),
+            [
+                {
+                    "token_id": f"pool-token-{i:08d}",
+                    "token_amount": 50.0,
+                    "area_code": AREA,
+                    "pool_entry_date": date.today(),
+                    "claim_status": "AVAILABLE",
+                    "original_program_id": "program",
+                    "transfer_reason": "EXPIRED",
+                }
+                for i in range(args.tokens)
+            ],
+        )
+        session.commit()
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(args.processes) as pool:
+        results = list(
+            pool.map(
+                claimer_process,
+                [path] * args.processes,
+                [strategy] * args.processes,
+                [args.threads] * args.processes,
+                range(args.processes),
+            )
+        )
+    elapsed = time.perf_counter() - started
+
+    claimed = sum(result["claimed"] for result in results)
+    conflicts = sum(result["conflicts"] for result in results)
+    with Session(engine) as session:
+        rows = session.execute(
+            select(func.count(), func.count(PublicPoolToken.claimed_by_user_id)).where(
+                PublicPoolToken.claim_status == "CLAIMED"
+            )
+        ).one()
+    # Every token claimed exactly once, by exactly one successful caller
+    assert claimed == args.tokens == rows[0] == rows[1], (claimed, rows)
+    print(
+        f"{strategy:9} {claimed} claims in {elapsed:6.2f}s "
+        f"({claimed / elapsed:7.0f}/s), {conflicts} wasted attempts"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent pool claim throughput")
+    parser.add_argument("--tokens", type=int, default=4000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    print(
+        f"{args.processes} processes x {args.threads} threads claiming "
+        f"{args.tokens} tokens in one area"
+    )
+    for strategy in ("naive", "allocator"):
+        run(strategy, args)
+
+
+if __name__ == "__main__":
+    main()
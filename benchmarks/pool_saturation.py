@@ -0,0 +1,113 @@
+# Load test: what a saturated connection pool looks like
+#
+#   python -m benchmarks.pool_saturation --pool-size 4 --max-overflow 2
+#
+# Every request holds a connection for --hold seconds. Concurrency is
+# raised past pool_size + max_overflow: first requests start opening
+# overflow connections, then wait for a free one, then give up after
+# pool_timeout and get a 503. Pool telemetry is printed for each level,
+# followed by the pool section of /metrics.
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select
+import config
+from app import create_app
+from app.models import db
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def wait_quantile(histogram, fraction):
+    """Upper bucket bound below which fraction of checkouts waited"""
+    target, cumulative = fraction * sum(histogram.counts), 0
+    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connection pool saturation")
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--max-overflow", type=int, default=2)
+    # Whole seconds: engine_from_config coerces pool_timeout to int
+    parser.add_argument("--pool-timeout", type=int, default=1)
+    parser.add_argument("--hold", type=float, default=0.1)
+    parser.add_argument("--requests", type=int, default=120)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "pool.db")
+    testing = config.TestingConfig
+    testing.SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+    testing.SQLALCHEMY_ENGINE_OPTIONS = dict(
+        testing.SQLALCHEMY_ENGINE_OPTIONS,
+        pool_size=args.pool_size,
+        max_overflow=args.max_overflow,
+        pool_timeout=args.pool_timeout,
+    )
+    testing.RATELIMIT_ENABLED = False
+    app = create_app("TestingConfig")
+
+    def hold():
+        db.session.execute(select(1))
+        time.sleep(args.hold)
+        db.session.commit()
+        return {"held": args.hold}
+
+    app.add_url_rule("/hold", "hold", hold)
+    with app.app_context():
+        pool = db.engine.pool
+    capacity = args.pool_size + args.max_overflow
+    print(
+        f"pool_size={args.pool_size} max_overflow={args.max_overflow} "
+        f"pool_timeout={args.pool_timeout}s, each request holds {args.hold}s"
+    )
+    print(
+        "concurrency  req/s   p50 ms   p99 ms  503s  overflow  timeouts  "
+        "wait p50  wait p99"
+    )
+
+    def request(_):
+        client = app.test_client()
+        started = time.perf_counter()
+        status = client.get("/hold").status_code
+        return status, time.perf_counter() - started
+
+    for concurrency in (1, args.pool_size, capacity, 2 * capacity, 4 * capacity):
+        pool.telemetry = type(pool.telemetry)()  # Per-level counters
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            results = list(executor.map(request, range(args.requests)))
+        elapsed = time.perf_counter() - started
+        statuses = Counter(status for status, _ in results)
+        latencies = [seconds * 1000 for _, seconds in results]
+        telemetry = pool.telemetry.snapshot()
+        print(
+            f"{concurrency:11} {args.requests / elapsed:6.1f} "
+            f"{percentile(latencies, 0.5):8.1f} {percentile(latencies, 0.99):8.1f} "
+            f"{statuses[503]:5} {telemetry['overflow_checkouts']:9} "
+            f"{telemetry['timeouts']:9} "
+            f"{wait_quantile(telemetry['wait'], 0.5):8}s "
+            f"{wait_quantile(telemetry['wait'], 0.99):8}s"
+        )
+        assert set(statuses) <= {200, 503}, statuses
+        if concurrency <= args.pool_size:
+            assert telemetry["overflow_checkouts"] == 0
+        if concurrency <= capacity:
+            assert statuses[503] == 0, "timeouts below pool capacity"
+
+    body = app.test_client().get("/metrics").get_data(as_text=True)
+    print("\n".join(line for line in body.splitlines() if "_db_pool_" in line)[:3000])
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
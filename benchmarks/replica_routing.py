@@ -0,0 +1,133 @@
+# Read-replica routing checked against two SQLite files
+#
+#   python -m benchmarks.replica_routing
+#
+# primary.db and replica.db stand in for a primary and its replica;
+# "replication" is a sqlite3 backup of the whole file plus a thread that
+# copies the heartbeat row. The script checks that GETs read the replica,
+# that a client which wrote reads the primary (read-your-writes), that a
+# lagging replica is skipped, and times GETs with and without routing.
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date
+import config
+from app import create_app
+from app.models import db, ReplicaHeartbeat, Wallet
+from app.utils.replicas import read_replica
+
+CHECK_INTERVAL = 0.1
+MAX_LAG = 0.5
+
+
+class Replicator:
+    """Copies the primary into the replica, all of it or just heartbeats"""
+
+    def __init__(self, primary, replica):
+        self.primary, self.replica = primary, replica
+        self.running = threading.Event()
+        threading.Thread(target=self._heartbeats, daemon=True).start()
+
+    def copy_all(self):
+        with sqlite3.connect(self.primary) as src, sqlite3.connect(self.replica) as dst:
+            src.backup(dst)
+
+    def _heartbeats(self):
+        while True:
+            if self.running.is_set():
+                with sqlite3.connect(self.primary) as src:
+                    rows = src.execute("SELECT name, beat_at FROM replica_heartbeats")
+                    rows = rows.fetchall()
+                with sqlite3.connect(self.replica) as dst:
+                    dst.executemany(
+                        "INSERT OR REPLACE INTO replica_heartbeats VALUES (?, ?)", rows
+                    )
+            time.sleep(CHECK_INTERVAL / 2)
+
+
+def wallet_status(client, wallet_id):
+    return client.get(f"/wallets/{wallet_id}").get_json()["wallet_status"]
+
+
+def wait_for(router, healthy):
+    deadline = time.time() + 10 * MAX_LAG
+    while bool(router.stats()["healthy"]) != healthy:
+        assert time.time() < deadline, router.stats()
+        time.sleep(CHECK_INTERVAL)
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    primary = os.path.join(directory, "primary.db")
+    replica = os.path.join(directory, "replica.db")
+    testing = config.TestingConfig
+    testing.SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary}"
+    testing.SQLALCHEMY_BINDS = {"replica": f"sqlite:///{replica}"}
+    testing.DB_REPLICA_BINDS = ["replica"]
+    testing.DB_REPLICA_CHECK_INTERVAL = CHECK_INTERVAL
+    testing.DB_REPLICA_MAX_LAG = MAX_LAG
+    testing.RATELIMIT_ENABLED = False
+    app = create_app("TestingConfig")
+
+    def suspend(wallet_id):
+        db.session.get(Wallet, wallet_id).wallet_status = "SUSPENDED"
+        db.session.commit()
+        return {"suspended": wallet_id}
+
+    app.add_url_rule("/suspend/<wallet_id>", "suspend", suspend, methods=["POST"])
+    router = app.extensions["db_router"]
+
+    with app.app_context():
+        db.create_all()
+        for wallet_id in ("w1", "w2"):
+            db.session.add(
+                Wallet(
+                    wallet_id=wallet_id,
+                    client_id="client",
+                    wallet_hash=wallet_id,
+                    created_at=date.today(),
+                )
+            )
+        db.session.add(ReplicaHeartbeat(name="primary", beat_at=time.time()))
+        db.session.commit()
+    replicator = Replicator(primary, replica)
+    replicator.copy_all()
+    replicator.running.set()
+    reader, writer = app.test_client(), app.test_client()
+    reader.get("/wallets/w1")  # Starts the lag monitor
+    wait_for(router, healthy=True)
+
+    # A write the replica has not received yet (only heartbeats replicate)
+    assert writer.post("/suspend/w1").status_code == 200
+    assert wallet_status(reader, "w1") == "ACTIVE", "GET should read the replica"
+    assert wallet_status(writer, "w1") == "SUSPENDED", "writer should be pinned"
+    print("replica reads and read-your-writes:", router.stats()["requests"])
+    with app.app_context(), read_replica():
+        assert db.session.get(Wallet, "w1").wallet_status == "ACTIVE"
+        db.session.rollback()
+
+    # Replication stalls: the replica falls behind and is skipped
+    replicator.running.clear()
+    wait_for(router, healthy=False)
+    assert wallet_status(reader, "w1") == "SUSPENDED", "lagging replica was used"
+    print("lagging replica skipped:", router.stats())
+    replicator.copy_all()
+    replicator.running.set()
+    wait_for(router, healthy=True)
+    assert wallet_status(reader, "w1") == "SUSPENDED"
+
+    for label, binds in (("replica", ["replica"]), ("primary only", [])):
+        router.binds = binds
+        started = time.perf_counter()
+        for _ in range(1000):
+            wallet_status(reader, "w2")
+        print(f"1000 GETs, {label:12}: {time.perf_counter() - started:.2f}s")
+
+    os.remove(primary)
+    os.remove(replica)
+
+
+if __name__ == "__main__":
+    main()